@@ -0,0 +1,83 @@
+"""
+Week and month agendas: the entries due on each day of a period.
+
+Stored entries are kept in buckets by due date by a Diary index as they change, so an agenda only reads the buckets of
+the days it shows, and only sorts the entries of each day.
+"""
+import datetime
+
+from DiaryEntry import Occurrence
+from SortedEntries import sort_key
+
+WEEK_START = 0  # Weekday which weeks start on, Monday
+
+
+def week_of(date):
+    """Returns the datetime.date of the first and last days of the week containing a date."""
+    first = date - datetime.timedelta(days=(date.weekday() - WEEK_START) % 7)
+    return first, first + datetime.timedelta(days=6)
+
+
+def month_of(date):
+    """Returns the datetime.date of the first and last days of the month containing a date."""
+    first = date.replace(day=1)
+    following = (first + datetime.timedelta(days=31)).replace(day=1)
+    return first, following - datetime.timedelta(days=1)
+
+
+class AgendaIndex(object):
+    """
+    The stored entries in buckets by due date, kept up to date as a Diary index.
+    Recurring entries are kept aside, as their occurrences depend on the period being shown.
+
+    :param entries: An iterable of the stored DiaryEntry objects.
+    """
+
+    def __init__(self, entries=()):
+        """Initialise instance variables."""
+        self.days = {}  # Entries by key for each due date, without undated entries
+        self.recurring = {}  # Recurring entries by key
+        for entry in entries:
+            self.insert(entry)
+
+    def insert(self, entry):
+        """Add an entry to the bucket of its due date."""
+        if entry.recurrence is not None:
+            self.recurring[entry.key] = entry
+        elif entry.due_date is not None:
+            self.days.setdefault(entry.due_date, {})[entry.key] = entry
+
+    def discard(self, entry):
+        """Remove an entry from the bucket of its due date."""
+        if entry.recurrence is not None:
+            self.recurring.pop(entry.key, None)
+            return
+        bucket = self.days.get(entry.due_date)
+        if bucket is not None:
+            bucket.pop(entry.key, None)
+            if not bucket:
+                del self.days[entry.due_date]
+
+    def between(self, first, last, numbered=()):
+        """
+        Find the entries due on each day of a period, with recurring entries replaced by their occurrences.
+
+        :param first:       The datetime.date of the first day.
+        :param last:        The datetime.date of the last day.
+        :param numbered:    An iterable of Occurrence objects which have been given uids, used in place of equal
+                            occurrences so that they can be referred to by uid.
+        :return:            A list of (datetime.date, list of entries in display order) tuples for every day.
+        """
+        length = (last - first).days + 1
+        days = [list(self.days.get(first + datetime.timedelta(days=offset), {}).values()) for offset in range(length)]
+        numbered = {(occurrence.series.key, occurrence.date): occurrence for occurrence in numbered}
+        for series in self.recurring.values():
+            for date in series.recurrence.dates(series.due_date, first, last):
+                occurrence = numbered.get((series.key, date))
+                if occurrence is None:
+                    occurrence = Occurrence(series, date)
+                    occurrence.uid = None  # Not in the diary table, so it has no uid to be referred to by
+                if occurrence.due_date is not None and first <= occurrence.due_date <= last:
+                    days[(occurrence.due_date - first).days].append(occurrence)
+        return [(first + datetime.timedelta(days=offset), sorted(entries, key=sort_key))
+                for offset, entries in enumerate(days)]
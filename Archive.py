@@ -0,0 +1,82 @@
+import gzip
+import pickle
+import os.path
+
+from DiaryEntry import DiaryEntry
+from SortedEntries import SortedEntries
+
+ARCHIVE_EXTENSION = '.archive'
+
+
+class Archive(object):
+    """
+    A compressed cold store for entries which have been moved out of a Diary so that they no longer have to be loaded,
+    sorted, filtered and saved with it.
+
+    Archiving appends a compressed block to the file without reading what is already there. The archived entries are
+    only read when they are first needed, e.g. to search or restore them.
+
+    :param archive_file:    The path of the file storing the archived entries.
+    """
+
+    def __init__(self, archive_file):
+        """Initialise instance variables."""
+        self.archive_file = archive_file
+        self._keyed = None  # Archived entries by key, once loaded
+
+    @property
+    def loaded(self):
+        """Returns True if the archived entries have been read."""
+        return self._keyed is not None
+
+    @property
+    def entries(self):
+        """Returns a SortedEntries list of all archived entries, reading them if necessary."""
+        return SortedEntries(self.load().values())
+
+    def load(self):
+        """
+        Read the archived entries if they have not been read yet.
+
+        :return:        A dict mapping keys to archived DiaryEntry objects.
+        """
+        if self._keyed is None:
+            self._keyed = {}
+            if os.path.isfile(self.archive_file):
+                with gzip.open(self.archive_file, 'rb') as source:  # Appended blocks are read as one stream
+                    try:
+                        while True:
+                            for data in pickle.load(source):
+                                entry = DiaryEntry(**data)
+                                self._keyed[entry.key] = entry
+                    except EOFError:  # Stop looping through data at end of file
+                        pass
+        return self._keyed
+
+    def add(self, entries):
+        """
+        Append entries to the archive.
+
+        :param entries:     A list of DiaryEntry objects.
+        :return:            None.
+        """
+        if not entries:
+            return
+        with gzip.open(self.archive_file, 'ab') as file:
+            pickle.dump([entry.data for entry in entries], file, pickle.HIGHEST_PROTOCOL)
+        if self._keyed is not None:
+            self._keyed.update((entry.key, entry) for entry in entries)
+
+    def remove(self, keys):
+        """
+        Take entries out of the archive, rewriting the archive without them.
+
+        :param keys:        A list of key strs of archived entries.
+        :return:            A list of the removed DiaryEntry objects.
+        """
+        keyed = self.load()
+        removed = [keyed.pop(key) for key in keys if key in keyed]
+        if removed:
+            with gzip.open(self.archive_file, 'wb') as file:
+                pickle.dump([entry.data for entry in keyed.values()], file, pickle.HIGHEST_PROTOCOL)
+        return removed
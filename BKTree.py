@@ -0,0 +1,142 @@
+import re
+
+from string_analysis import levenshtein
+
+MAX_DISTANCE = 3  # Most edits allowed between a searched word and a match
+LETTERS_PER_EDIT = 3  # Words allow one edit per this many letters, so short words must match more closely
+COMPACT_RATIO = 1  # Rebuild the tree once it holds this many removed words for every word still in use
+
+RE_WORD = re.compile(r'\w+')
+
+
+def words_of(text, split=True):
+    """Returns a list of the lower case words of a str, or the whole str as one word if `split` is False."""
+    text = text.lower()
+    return RE_WORD.findall(text) if split else [text] if text else []
+
+
+def max_distance(word):
+    """Returns the number of edits allowed between a searched word and a match."""
+    return min(MAX_DISTANCE, len(word) // LETTERS_PER_EDIT)
+
+
+class BKTree(object):
+    """
+    A Burkhard-Keller tree of words, which finds the words within an edit distance of a word while only comparing it
+    to a fraction of them. The children of each node are keyed by their distance from it, so by the triangle
+    inequality only the children whose key is within the searched distance of the node's own distance can lead to a
+    match.
+
+    Each word is counted, so a word added for several entries stays until it has been removed for all of them. Removed
+    words are left in the tree, as the words below them were placed by their distance from it, and are skipped by
+    searches until the tree is rebuilt.
+
+    :param words:   An optional iterable of words to add.
+    """
+
+    def __init__(self, words=()):
+        """Initialise instance variables."""
+        self.root = None  # A node is a tuple of its word and a dict of its children by distance
+        self.counts = {}  # Number of occurrences of each word in the tree, 0 for removed words
+        self.removed = 0  # Number of removed words still in the tree
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Add one occurrence of a word."""
+        count = self.counts.get(word)
+        if count is not None:
+            self.counts[word] = count + 1
+            self.removed -= not count
+            return
+        self.counts[word] = 1
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = levenshtein(word, node[0])
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def remove(self, word):
+        """Remove one occurrence of a word, rebuilding the tree once many words have been removed."""
+        if not self.counts.get(word):
+            return
+        self.counts[word] -= 1
+        if self.counts[word]:
+            return
+        self.removed += 1
+        if self.removed > COMPACT_RATIO * (len(self.counts) - self.removed):
+            self.compact()
+
+    def compact(self):
+        """Rebuild the tree from the words still in use."""
+        counts = self.counts
+        self.root = None
+        self.counts = {}
+        self.removed = 0
+        for word, count in counts.items():
+            if count:
+                self.add(word)
+                self.counts[word] = count
+
+    def __contains__(self, word):
+        return bool(self.counts.get(word))
+
+    def search(self, word, limit=None):
+        """
+        Find the words within an edit distance of a word.
+
+        :param word:    The str to search for.
+        :param limit:   The greatest distance of a match. Defaults to `max_distance(word)`.
+        :return:        A list of (distance, word) tuples, closest first.
+        """
+        limit = max_distance(word) if limit is None else limit
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= limit and self.counts[node_word]:
+                matches.append((distance, node_word))
+            stack.extend(child for key, child in children.items() if distance - limit <= key <= distance + limit)
+        return sorted(matches)
+
+
+class AttributeBKTree(BKTree):
+    """
+    A BKTree of the lower case values, or words of the values, of one attribute of the stored entries, kept up to date
+    as a Diary index. Values changed for single occurrences of recurring entries are included.
+
+    :param attr:    The str name of the attribute.
+    :param entries: An iterable of the stored DiaryEntry objects.
+    :param split:   True to add each word of the values, False to add whole values.
+    """
+
+    def __init__(self, attr, entries=(), split=False):
+        """Initialise instance variables."""
+        self.attr = attr
+        self.split = split
+        super().__init__(word for entry in entries for word in self.words(entry))
+
+    def words(self, entry):
+        """Returns a list of the words of the attribute value of an entry and any of its occurrences."""
+        values = [getattr(entry, self.attr)]
+        if entry.recurrence is not None:
+            values.extend(override[self.attr] for override in entry.recurrence.overrides.values()
+                          if self.attr in override)
+        return [word for value in values if value for word in words_of(str(value), self.split)]
+
+    def insert(self, entry):
+        """Add the words of an entry."""
+        for word in self.words(entry):
+            self.add(word)
+
+    def discard(self, entry):
+        """Remove the words of an entry."""
+        for word in self.words(entry):
+            self.remove(word)
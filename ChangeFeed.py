@@ -0,0 +1,232 @@
+"""
+A feed of the changes made to a diary, so that other programs can follow it without reloading the data file:
+
+    python cmdiary.py --events [--file data.pickle] [--after SEQ] [--follow]
+
+Each saved change to an entry is published as an event with the next sequence number, to callbacks in the same process
+and as a line of JSON appended to an events file alongside the data file. Events carry the whole data of the entry, so
+applying an event twice has no further effect. A consumer can load the data file, then apply the events after the
+sequence number it last saw.
+
+This module must stay free of third-party and diary imports so that following the feed is fast.
+"""
+import os
+import sys
+import json
+import time
+import datetime
+from collections import namedtuple, deque
+
+EVENTS_EXTENSION = '.events'
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+UID = 'uid'  # Display number of an entry, which is left out of events as it is not stable
+MAX_EVENTS = 10000  # Number of events in the file at which the oldest are dropped
+KEEP_EVENTS = 5000  # Number of events kept when the oldest are dropped
+POLL_INTERVAL = 0.5  # Seconds between checks for new events when following the file
+
+Event = namedtuple('Event', ['seq', 'type', 'key', 'data'])
+Event.__doc__ = """
+A change to a stored entry.
+
+:param seq:     The int sequence number, one more than that of the previous event.
+:param type:    ADDED, CHANGED or REMOVED.
+:param key:     The key str of the entry.
+:param data:    A dict of the data of the entry after the change, without its uid, or None if it was removed.
+"""
+
+
+def to_json(value):
+    """Convert entry data to values which can be written as JSON. Dates become ISO format strs and sets sorted lists."""
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(to_json(key)): to_json(item) for key, item in value.items()}
+    if isinstance(value, (set, frozenset, list, tuple)):
+        return sorted(map(to_json, value)) if isinstance(value, (set, frozenset)) else list(map(to_json, value))
+    return value
+
+
+def encode(event):
+    """Returns the line of JSON which stores an event."""
+    return json.dumps({'seq': event.seq, 'type': event.type, 'key': event.key, 'data': to_json(event.data)},
+                      separators=(',', ':')) + '\n'
+
+
+def decode(line):
+    """Returns the Event stored in a line of JSON. Dates are left as ISO format strs."""
+    values = json.loads(line)
+    return Event(values['seq'], values['type'], values['key'], values['data'])
+
+
+def read_events(path, after=0):
+    """
+    Read the events after a sequence number.
+
+    :param path:        The path of the events file.
+    :param after:       The int sequence number of the last event already seen, or 0 for all events.
+    :return:            A list of Event objects, or None if events after `after` have been dropped from the file, in
+                        which case the data file must be loaded again.
+    """
+    if not os.path.isfile(path):
+        return []
+    with open(path) as file:
+        events = [decode(line) for line in file]
+    if after and events and events[0].seq > after + 1:
+        return None
+    return [event for event in events if event.seq > after]
+
+
+def follow(path, after=0, interval=POLL_INTERVAL):
+    """
+    Generate events as they are appended to the events file, like `tail -f`. Only new lines are read.
+
+    :param path:        The path of the events file.
+    :param after:       The int sequence number of the last event already seen, or 0 for all events.
+    :param interval:    The number of seconds to wait between checks for new events.
+    :return:            A generator of Event objects, which stops if events have been dropped before they were seen.
+    """
+    position = 0
+    while True:
+        if os.path.isfile(path):
+            if os.path.getsize(path) < position:  # The oldest events were dropped, so the file was rewritten
+                position = 0
+            with open(path, 'rb') as file:
+                file.seek(position)
+                for line in iter(file.readline, b''):
+                    if not line.endswith(b'\n'):
+                        break  # Still being written
+                    position += len(line)
+                    event = decode(line)
+                    if event.seq > after + 1 and after:
+                        return
+                    if event.seq > after:
+                        after = event.seq
+                        yield event
+        time.sleep(interval)
+
+
+class ChangeFeed(object):
+    """
+    Publishes the changes made to stored entries, kept up to date as a Diary index.
+
+    The changes to each entry are combined until they are published, which the Diary does after saving, so an entry
+    which was changed several times or moved within one batch produces one event.
+
+    :param events_file:     An optional path of a file to append events to.
+    """
+
+    def __init__(self, events_file=None):
+        """Initialise instance variables and find the last sequence number in the events file."""
+        self.events_file = events_file
+        self.callbacks = []
+        self.before = {}  # Data of each entry changed since the last publish, as it was before, or None if it was added
+        self.after = {}  # Each entry changed since the last publish, or None if it has been removed
+        self.first = self.seq = 0  # Sequence numbers of the first event in the file and the last event published
+        if events_file is not None and os.path.isfile(events_file):
+            with open(events_file) as file:
+                first = file.readline()
+                last = deque(file, maxlen=1)
+            if first:
+                self.first = decode(first).seq
+                self.seq = decode(last[0] if last else first).seq
+
+    def subscribe(self, callback):
+        """Call a function with each Event from now on."""
+        self.callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        """Stop calling a function with events."""
+        self.callbacks.remove(callback)
+
+    def insert(self, entry):
+        """Record that an entry has been added or changed."""
+        self.before.setdefault(entry.key, None)
+        self.after[entry.key] = entry
+
+    def discard(self, entry):
+        """Record that an entry has been removed or is about to change."""
+        if entry.key not in self.before:
+            self.before[entry.key] = self.data(entry)
+        self.after[entry.key] = None
+
+    @staticmethod
+    def data(entry):
+        """Returns the data of an entry without its uid."""
+        data = entry.data
+        del data[UID]
+        return data
+
+    def publish(self):
+        """
+        Create the events for the changes recorded since the last publish, append them to the events file and call
+        the callbacks with them.
+
+        :return:        A list of the new Event objects.
+        """
+        events = []
+        for key, old in self.before.items():
+            entry = self.after[key]
+            new = self.data(entry) if entry is not None else None
+            if new == old:
+                continue  # Changed back, or added and removed again
+            event_type = ADDED if old is None else REMOVED if new is None else CHANGED
+            self.seq += 1
+            events.append(Event(self.seq, event_type, key, new))
+        self.before.clear()
+        self.after.clear()
+        if events and self.events_file is not None:
+            with open(self.events_file, 'a') as file:
+                file.write(''.join(map(encode, events)))
+            if self.seq - self.first >= MAX_EVENTS:
+                self.trim()
+        for event in events:
+            for callback in self.callbacks:
+                callback(event)
+        return events
+
+    def trim(self):
+        """Drop all but the newest events from the events file."""
+        with open(self.events_file) as file:
+            lines = deque(file, maxlen=KEEP_EVENTS)
+        with open(self.events_file, 'w') as file:
+            file.writelines(lines)
+        self.first = decode(lines[0]).seq
+
+
+def main(args):
+    """
+    Print the events of a diary as lines of JSON.
+
+    :param args:        A list of command line arguments.
+    :return:            An int exit status.
+    """
+    data_file = 'data.pickle'
+    after = 0
+    follow_file = False
+    args = [arg for arg in args if arg != '--events']
+    while args:
+        option = args.pop(0)
+        if option == '--file' and args:
+            data_file = args.pop(0)
+        elif option == '--after' and args and args[0].isdigit():
+            after = int(args.pop(0))
+        elif option == '--follow':
+            follow_file = True
+        else:
+            sys.stderr.write('Usage: cmdiary.py --events [--file DATA_FILE] [--after SEQ] [--follow]\n')
+            return 2
+
+    path = data_file + EVENTS_EXTENSION
+    events = follow(path, after) if follow_file else read_events(path, after)
+    if events is None:
+        sys.stderr.write('Events after {} are no longer available; reload {}\n'.format(after, data_file))
+        return 1
+    try:
+        for event in events:
+            sys.stdout.write(encode(event))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,104 @@
+import re
+from collections import namedtuple
+
+MAX_DATE_TOKENS = 3  # A due date is at most day, month and year
+
+# Text between command separators (;), where separators inside quotes do not count. Unmatched quotes are kept as text.
+RE_COMMAND = re.compile(r'''(?:[^;"']|"[^"]*"|'[^']*'|["'])+''')
+RE_DATE_TOKENS = re.compile(r'[0-9]{1,2}( [0-9]{1,2})?( [0-9]{4})?')
+
+
+class Command(namedtuple('Command', ['name', 'function', 'args', 'text', 'date'])):
+    """
+    A single command from a line of input, tokenised once.
+
+    :param name:        The str name of the command as it was resolved, e.g. 'a' or 'add'.
+    :param function:    The command function.
+    :param args:        A list of str positional arguments, not including any due date.
+    :param text:        The unsplit str of everything after the command name, for commands which take free text.
+    :param date:        The str due date found at the end of the arguments, or None.
+    """
+    __slots__ = ()
+
+    def arg(self, index):
+        """Returns the positional argument at `index`, or False if it was not given."""
+        return self.args[index] if index < len(self.args) else False
+
+    def rest(self, index):
+        """Returns the positional arguments from `index` onwards joined into a str."""
+        return ' '.join(self.args[index:])
+
+
+class CommandParser(object):
+    """
+    Split lines of input into commands and tokenise each command once.
+
+    Several commands can be entered on one line by separating them with semicolons.
+
+    :param commands:    A dict mapping command names and abbreviations to command functions.
+    :param dated:       A dict mapping command functions whose arguments may end with a due date to the number of
+                        leading arguments which come before the free text and the date.
+    :param correct:     An optional function which is passed an unknown command name and returns a replacement name or
+                        None to skip the command.
+    """
+
+    def __init__(self, commands, dated=None, correct=None):
+        """Initialise instance variables."""
+        self.commands = commands
+        self.dated = {} if dated is None else dated
+        self.correct = correct
+
+    def parse(self, line):
+        """
+        Parse a line of input.
+
+        :param line:    The str entered by the user.
+        :return:        A list of Command objects in the order they were entered.
+        """
+        commands = []
+        for text in RE_COMMAND.findall(line):
+            command = self.parse_command(text)
+            if command is not None:
+                commands.append(command)
+        return commands
+
+    def parse_command(self, text):
+        """
+        Tokenise the text of a single command.
+
+        :param text:    The str of one command and its arguments.
+        :return:        A Command object, or None if the text is blank or names an unknown command.
+        """
+        tokens = text.split()
+        if not tokens:
+            return None
+        name = tokens[0]
+        if name not in self.commands:
+            name = self.correct(name) if self.correct is not None else None
+            if name is None:
+                return None
+
+        function = self.commands[name]
+        args = tokens[1:]
+        date = None
+        if function in self.dated:
+            args, date = split_date(args, self.dated[function])
+        arg_text = text.split(maxsplit=1)[1] if len(tokens) > 1 else ''
+        return Command(name, function, args, arg_text, date)
+
+
+def split_date(args, leading):
+    """
+    Separate a due date from the end of a list of arguments. At least one argument must remain between the leading
+    arguments and the date so that the date is not mistaken for free text.
+
+    :param args:        A list of str arguments.
+    :param leading:     The int number of arguments before the free text.
+    :return:            A tuple of the remaining arguments and the date str, or None if there is no date.
+    """
+    for count in range(MAX_DATE_TOKENS, 0, -1):
+        if len(args) - count > leading:
+            date = ' '.join(args[-count:])
+            if RE_DATE_TOKENS.fullmatch(date):
+                return args[:-count], date
+    return args, None
@@ -0,0 +1,142 @@
+"""
+Per-command profiles of the diary, turned on with 'cmdiary.py --profile' or the 'profile on' command:
+
+    profiles/<time>-<number>-<command>.folded       collapsed stacks with microseconds, for flamegraph.pl or speedscope
+    profiles/<time>-<number>-<command>.alloc.txt    the lines which allocated the most memory that was still held
+
+Commands are run normally while profiling is off.
+"""
+import os
+import re
+import time
+import pstats
+import cProfile
+import tracemalloc
+
+PROFILE_DIRECTORY = 'profiles'
+STACKS_EXTENSION = '.folded'  # Collapsed stacks, one line per stack, as read by flamegraph.pl and speedscope
+ALLOCATIONS_EXTENSION = '.alloc.txt'
+TOP_ALLOCATIONS = 25  # Number of allocation sites listed for each command
+MAX_DEPTH = 100  # Deepest stack written, which also ends cycles of calls missed by the recursion check
+MIN_MICROSECONDS = 1  # Stacks which took less time are left out
+
+RE_UNSAFE = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+def frame_name(function):
+    """Returns the name of a function in a collapsed stack, e.g. Diary.py:edit."""
+    filename, _, name = function
+    return '{}:{}'.format(os.path.basename(filename), name) if filename != '~' else name.strip('<>')
+
+
+def collapse_stacks(stats):
+    """
+    Convert the statistics of a cProfile run to collapsed stacks.
+
+    cProfile only records which function called which, so the time of a function is shared between the stacks it was
+    called from in proportion to the time of the calls made from each of them.
+
+    :param stats:   A pstats.Stats object.
+    :return:        A dict mapping stack strs of frame names separated by semicolons to times in microseconds.
+    """
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((function, edge[3]))
+    roots = [function for function, (_, _, _, _, callers) in stats.stats.items() if not callers]
+
+    stacks = {}
+
+    def walk(function, path, share):
+        _, _, own, total, _ = stats.stats[function]
+        fraction = share / total if total else 0
+        stack = ';'.join(path)
+        stacks[stack] = stacks.get(stack, 0) + own * fraction
+        if len(path) >= MAX_DEPTH:
+            return
+        for callee, edge_time in callees.get(function, ()):
+            name = frame_name(callee)
+            if name not in path:  # Recursive calls are counted in the outermost call
+                walk(callee, path + [name], edge_time * fraction)
+
+    for root in roots:
+        walk(root, [frame_name(root)], stats.stats[root][3])
+    return {stack: round(seconds * 1e6) for stack, seconds in stacks.items()
+            if round(seconds * 1e6) >= MIN_MICROSECONDS}
+
+
+class CommandProfiler(object):
+    """
+    Runs commands under cProfile and tracemalloc, writing collapsed stacks and the top allocation sites of each one to
+    a directory. Nothing is traced outside of `run`.
+
+    :param directory:   The path of the directory to write profiles to, which is created if necessary.
+    """
+
+    def __init__(self, directory=PROFILE_DIRECTORY):
+        """Initialise instance variables."""
+        self.directory = directory
+        self.count = 0  # Number of commands profiled, which orders the files
+        self.active = False
+
+    def run(self, name, function, *args):
+        """
+        Profile a function call. Calls made while another is being profiled are included in its profile.
+
+        :param name:        The str name of the command, used in the file names.
+        :param function:    The function to call.
+        :param args:        The arguments to call it with.
+        :return:            The return value of the function.
+        """
+        if self.active:
+            return function(*args)
+        self.active = True
+        profile = cProfile.Profile()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                return function(*args)
+            finally:
+                profile.disable()
+        finally:
+            seconds = time.perf_counter() - start
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if not tracing:
+                tracemalloc.stop()
+            self.active = False
+            self.write(name, profile, before, after, seconds, peak)
+
+    def write(self, name, profile, before, after, seconds, peak):
+        """
+        Write the profile of one command.
+
+        :param name:        The str name of the command.
+        :param profile:     The cProfile.Profile of the command.
+        :param before:      The tracemalloc.Snapshot taken before the command.
+        :param after:       The tracemalloc.Snapshot taken after the command.
+        :param seconds:     The float number of seconds the command took.
+        :param peak:        The peak number of bytes traced.
+        :return:            The path of the files without their extensions.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.count += 1
+        path = os.path.join(self.directory, '{}-{:04}-{}'.format(time.strftime('%Y%m%d-%H%M%S'), self.count,
+                                                                 RE_UNSAFE.sub('_', name) or 'command'))
+        stacks = collapse_stacks(pstats.Stats(profile))
+        with open(path + STACKS_EXTENSION, 'w') as file:
+            file.writelines('{} {}\n'.format(stack, microseconds) for stack, microseconds in sorted(stacks.items()))
+
+        snapshot_filter = tracemalloc.Filter(False, tracemalloc.__file__)  # Leave out the tracing itself
+        differences = after.filter_traces([snapshot_filter]).compare_to(before.filter_traces([snapshot_filter]),
+                                                                        'lineno')
+        with open(path + ALLOCATIONS_EXTENSION, 'w') as file:
+            file.write('{}: {:.3f}s, peak traced memory {:.1f} KiB\n\n'.format(name, seconds, peak / 1024))
+            for difference in differences[:TOP_ALLOCATIONS]:
+                file.write('{}\n'.format(difference))
+        return path
@@ -0,0 +1,120 @@
+import re
+
+try:
+    import readline
+except ImportError:  # Not available on Windows
+    readline = None
+
+from Trie import Trie
+
+COMMAND = 'command'  # Kind of word which is a command name
+CONDITION = 'condition'  # Kind of word which is a filter condition
+VALUE = 'value'  # Kind of word which is a value of the attribute given before it, e.g. in edit()
+DELIMITERS = ' \t;&|()'  # Characters which separate the words being completed
+
+RE_CONDITION = re.compile(r'(!*)([A-Za-z_]+)(!?(?:~~|[=<>:~]))(.*)')
+
+
+class Completer(object):
+    """
+    Tab completion for readline which knows the kind of word expected at each position of each command.
+
+    Candidates come from prefix tries built once when the Completer is created, apart from tries passed in which are
+    maintained elsewhere, e.g. the subjects of a Diary.
+
+    :param commands:    A dict mapping command names and abbreviations to command functions.
+    :param grammar:     A dict mapping command functions to a tuple of the kinds of their arguments in order. A kind
+                        is a key of `tries`, CONDITION, VALUE or None for arguments which are not completed.
+    :param tries:       A dict mapping kinds of words to Trie objects or lists of words.
+    :param attributes:  A dict mapping attribute names and abbreviations to the kinds of their values.
+    :param filter_attributes:   A dict mapping filter attribute names and abbreviations to the kinds of their values.
+    """
+
+    def __init__(self, commands, grammar, tries, attributes, filter_attributes):
+        """Initialise instance variables."""
+        self.commands = commands
+        self.grammar = grammar
+        self.tries = {kind: words if isinstance(words, Trie) else Trie(words) for kind, words in tries.items()}
+        self.tries[COMMAND] = Trie(commands)
+        self.tries[CONDITION] = Trie(filter_attributes)
+        self.attributes = attributes
+        self.filter_attributes = filter_attributes
+        self.filter_mode = False  # In filter mode, conditions can be entered and commands do not take UIDs
+        self.matches = []
+
+    def install(self):
+        """
+        Use this Completer for tab completion of input, if readline is available.
+
+        :return:        True if completion was installed.
+        """
+        if readline is None:
+            return False
+        readline.set_completer(self.complete)
+        readline.set_completer_delims(DELIMITERS)
+        if 'libedit' in (readline.__doc__ or ''):  # macOS ships libedit in place of GNU readline
+            readline.parse_and_bind('bind ^I rl_complete')
+        else:
+            readline.parse_and_bind('tab: complete')
+        return True
+
+    def line_buffer(self):
+        """Returns the line typed so far at the current prompt, or '' if readline is not available."""
+        return readline.get_line_buffer() if readline is not None else ''
+
+    def complete(self, text, state):
+        """
+        The completion function called by readline.
+
+        :param text:    The word being completed.
+        :param state:   The index of the match to return.
+        :return:        A str match or None when there are no more matches.
+        """
+        if state == 0:
+            line = readline.get_line_buffer()[:readline.get_begidx()]
+            self.matches = self.candidates(line, text)
+        return self.matches[state] if state < len(self.matches) else None
+
+    def candidates(self, line, text):
+        """
+        Find the completions of a word.
+
+        :param line:    The str of the line before the word.
+        :param text:    The word being completed.
+        :return:        A sorted list of completed words.
+        """
+        words = line.rsplit(';', 1)[-1].split()  # Only the last of several commands is being completed
+        if not words:
+            kinds = (COMMAND, CONDITION) if self.filter_mode else (COMMAND,)
+            return sorted(set(match for kind in kinds for match in self.words(kind, text)))
+
+        function = self.commands.get(words[0])
+        if function is None:
+            return self.words(CONDITION, text) if self.filter_mode else []
+        kinds = self.grammar.get(function, ())
+        if self.filter_mode and kinds[:1] == (None,):  # UIDs of the selected entries are inserted automatically
+            kinds = kinds[1:]
+        position = len(words) - 1
+        kind = kinds[position] if position < len(kinds) else (kinds[-1] if kinds[-1:] == (CONDITION,) else None)
+        if kind == VALUE:
+            kind = self.attributes.get(words[-1])
+        return self.words(kind, text)
+
+    def words(self, kind, text):
+        """
+        Complete a word of a particular kind.
+
+        :param kind:    The kind of word, or None if it is not completed.
+        :param text:    The word being completed.
+        :return:        A sorted list of completed words.
+        """
+        if kind == CONDITION:
+            match = RE_CONDITION.fullmatch(text)
+            if match is None:  # Still typing the attribute
+                negation = text[:len(text) - len(text.lstrip('!'))]
+                return [negation + attr for attr in self.tries[CONDITION].complete(text[len(negation):])]
+            negation, attr, operator, value = match.groups()
+            kind = self.filter_attributes.get(attr.lower())
+            return [negation + attr + operator + word for word in self.words(kind, value)]
+        trie = self.tries.get(kind)
+        return trie.complete(text) if trie is not None else []
@@ -1,23 +1,43 @@
 import pickle
 import os.path
 import datetime
-from random import randint
+import heapq
+from contextlib import contextmanager
 
-from DiaryEntry import DiaryEntry
+from DiaryEntry import DiaryEntry, Occurrence, UID, SUBJECT, DESCRIPTION, DUE_DATE, PRIORITY, RECURRENCE, KEY
+from Recurrence import Recurrence
+from History import History
+from SortedEntries import SortedEntries, sort_key
+from SavedFilter import SavedFilter
+from FilterCache import FilterCache
+from Archive import Archive, ARCHIVE_EXTENSION
+from Trie import AttributeTrie
+from BKTree import AttributeBKTree
+from Workload import WorkloadIndex
+from HashSummary import HashSummary, HASH_EXTENSION
+from Reminders import ReminderIndex
+from ChangeFeed import ChangeFeed, EVENTS_EXTENSION
+from Agenda import AgendaIndex
+from summary import SUMMARY_EXTENSION, write_summary
+import storage
+
+RECURRENCE_LOOKBEHIND = 7  # Days of past occurrences of recurring entries to show
+RECURRENCE_LOOKAHEAD = 28  # Days of future occurrences of recurring entries to show
+RECURRENCE_LIMIT = 366  # Days either side of today beyond which occurrences are not generated for filters
+ARCHIVE_AGE = 30  # Days after its due date that an entry is moved to the archive
 
 
 def update_data(func):
     """
     A decorator which automatically updates the data.pickle file after the diary has been changed.
+    Inside a `Diary.batch` block the update is deferred until the end of the batch.
 
     :param func:    The function which changes the state of the diary.
     :return:        A function that automatically updates the locally stored diary data.
     """
     def wrapper(self, *args, **kwargs):
-        retval = func(self, *args, **kwargs)
-        with open(self.data_file, 'wb') as file:
-            for entry in self.entries:
-                file.write(pickle.dumps(entry.data, pickle.HIGHEST_PROTOCOL))
+        with self.batch():
+            retval = func(self, *args, **kwargs)
         return retval
 
     return wrapper
@@ -26,38 +46,421 @@ def update_data(func):
 class Diary(object):
     """
     A Diary class that contains a list of DiaryEntry objects and has methods to modify them.
+    The entries are kept in display order and indexed by other structures in `indexes`, so any change to a stored
+    entry must be made within `changing`.
     This class also handles local storing and fetching of all DiaryEntry data.
     """
 
-    def __init__(self, data_file='data.pickle'):
+    def __init__(self, data_file='data.pickle', history_file=None, archive_age=ARCHIVE_AGE):
         """
         Load any locally stored data into the `entries` variable.
+
+        :param data_file:       The path of the file storing the diary entries.
+        :param history_file:    An optional path of a file to persist the undo history to.
+        :param archive_age:     The number of days after their due date that entries are archived when the diary is
+                                loaded, or None to only archive entries explicitly.
         :return: None.
         """
         self.data_file = data_file
+        self.filters_file = data_file + '.filters'
+        self.archive_age = archive_age
+        self.archive = Archive(data_file + ARCHIVE_EXTENSION)
         self.entries = self.load_data()
+        self.keyed = {entry.key: entry for entry in self.entries}
+        self.visible = []  # Entries and occurrences from the most recent call to `expand`
+        self.occurrences = []  # Occurrences from the most recent call to `expand`
+        self.uid_index = {}  # Visible entries, and occurrences numbered by `find_within`, by uid
+        self.history = History(history_file)
+        self.saved_filters = self.load_filters()
+        self.subjects = AttributeTrie(SUBJECT, self.entries)  # For completion of subjects
+        self.workload = WorkloadIndex(self.entries)  # Columns counted by the analytics command
+        self.fingerprints = HashSummary(self.entries)  # Content hashes for syncing with other diary files
+        self.reminders = ReminderIndex(self.entries)  # Times of upcoming reminders
+        self.feed = ChangeFeed(data_file + EVENTS_EXTENSION)  # Publishes saved changes to other programs
+        self.agenda = AgendaIndex(self.entries)  # Entries by due date for the week and month views
+        self.fuzzy = {SUBJECT: AttributeBKTree(SUBJECT, self.entries),  # For ~~ conditions in filter mode
+                      DESCRIPTION: AttributeBKTree(DESCRIPTION, self.entries, split=True)}
+        # Objects with insert and discard methods
+        self.indexes = list(self.saved_filters.values()) + [self.subjects, self.workload, self.fingerprints,
+                                                            self.reminders, self.feed, self.agenda,
+                                                            *self.fuzzy.values()]
+        self.generation = 0  # Incremented whenever a stored entry changes
+        self.filter_cache = FilterCache()
+        self._batch_depth = 0
+        self.rollover()
+        self.archive_old()
+        self.history.prune(self.keyed)  # Entries may have been archived, or the data file replaced, since it was saved
+        if not os.path.isfile(self.data_file + SUMMARY_EXTENSION):
+            write_summary(self.data_file + SUMMARY_EXTENSION, self.occurring()[0])
+
+    def save_data(self):
+        """
+        Serialise the DiaryEntry objects and write them to the data file in the compact format, then publish the
+        changes made since the last save.
+        :return: None.
+        """
+        with open(self.data_file, 'wb') as file:
+            storage.dump(self.entries, file)
+        self.fingerprints.write(self.data_file + HASH_EXTENSION, self.data_file,
+                                {entry.key: number for number, entry in enumerate(self.entries)})
+        with open(self.filters_file, 'wb') as file:
+            pickle.dump([saved.data for saved in self.saved_filters.values()], file, pickle.HIGHEST_PROTOCOL)
+        write_summary(self.data_file + SUMMARY_EXTENSION, self.occurring()[0])
+        self.feed.publish()
+
+    def load_filters(self):
+        """
+        Read the saved filters and their results.
+        :return: A dict mapping names to SavedFilter objects.
+        """
+        if not os.path.isfile(self.filters_file):
+            return {}
+        with open(self.filters_file, 'rb') as source:
+            saved_filters = {data[0]: SavedFilter(*data) for data in pickle.load(source)}
+        for saved in saved_filters.values():
+            saved.prune(self.keyed)  # Entries may have been removed, e.g. by a sync, since the results were saved
+        return saved_filters
+
+    def insert(self, entry):
+        """Add a stored entry to the sorted entries and every index."""
+        self.entries.add(entry)
+        self.keyed[entry.key] = entry
+        self.generation += 1
+        for index in self.indexes:
+            index.insert(entry)
+
+    def discard(self, entry):
+        """Remove a stored entry from the sorted entries and every index."""
+        self.entries.remove(entry)
+        del self.keyed[entry.key]
+        self.generation += 1
+        for index in self.indexes:
+            index.discard(entry)
+
+    @contextmanager
+    def changing(self, entry):
+        """
+        Update the sorted position and indexes of a stored entry after the changes made within the block.
+        Only the changed entry is moved.
+
+        :param entry:   The stored DiaryEntry which is about to change.
+        :return:        A context manager.
+        """
+        self.discard(entry)
+        try:
+            yield
+        finally:
+            self.insert(entry)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group changes made within the block so they are saved once and undone as a single step.
+
+        :return: A context manager.
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.history.commit()
+                self.save_data()
 
     def load_data(self):
         """
-        Read and de-serialise each stored DiaryEntry object and load them into a list
-        :return: A list of loaded DiaryEntry objects.
+        Read and de-serialise each stored DiaryEntry object and load them into a sorted list.
+        Files in the compact format are detected by their header; any other file is read as a stream of pickled dicts.
+        :return: A SortedEntries list of loaded DiaryEntry objects.
         """
-        entry_data = []
         if not os.path.isfile(self.data_file):
             open(self.data_file, 'w').close()  # Create file if none exists
-        with open(self.data_file, 'rb') as source:
-            try:
-                while True:
-                    entry_data.append(pickle.load(source))
-            except EOFError:  # Stop looping through data at end of file
-                pass
-
-        return [DiaryEntry(**dataset) for dataset in entry_data]  # Create DiaryEntrys from stored data
+        entry_data = storage.read_file(self.data_file)
+        return SortedEntries(DiaryEntry(**dataset) for dataset in entry_data)  # Create DiaryEntrys from stored data
 
     @property
     def taken_uids(self):
-        """Returns a list of uids that are already in use."""
-        return [entry.uid for entry in self.entries]
+        """Returns the uids that are already in use."""
+        return self.uid_index.keys()
+
+    def expand(self, first=None, last=None):
+        """
+        Create a list of all entries with recurring entries replaced by their occurrences within a window of dates.
+        Occurrences are only generated for the requested window and are merged into the already sorted entries.
+        Entries are numbered in display order and indexed by their new uids.
+
+        :param first:   A datetime.date specifying the start of the window. Defaults to RECURRENCE_LOOKBEHIND days ago.
+        :param last:    A datetime.date specifying the end of the window. Defaults to RECURRENCE_LOOKAHEAD days ahead.
+        :return:        A list of DiaryEntry and Occurrence objects.
+        """
+        self.visible, self.occurrences = self.occurring(first, last)
+        for uid, entry in enumerate(self.visible, 1):
+            entry.uid = uid
+        self.uid_index = {entry.uid: entry for entry in self.visible}
+        return self.visible
+
+    def occurring(self, first=None, last=None):
+        """
+        Generate the occurrences of recurring entries within a window of dates, without changing the visible entries.
+        Series with no occurrences within the window are represented by their next occurrence after it, if any.
+
+        :param first:   A datetime.date specifying the start of the window. Defaults to RECURRENCE_LOOKBEHIND days ago.
+        :param last:    A datetime.date specifying the end of the window. Defaults to RECURRENCE_LOOKAHEAD days ahead.
+        :return:        A tuple of a sorted list of all entries and occurrences, and a sorted list of the occurrences.
+        """
+        today = datetime.date.today()
+        first = first if first is not None else today - datetime.timedelta(days=RECURRENCE_LOOKBEHIND)
+        last = last if last is not None else today + datetime.timedelta(days=RECURRENCE_LOOKAHEAD)
+
+        single = []
+        occurrences = []
+        for entry in self.entries:
+            if entry.recurrence is None:
+                single.append(entry)
+            else:
+                dates = list(entry.recurrence.dates(entry.due_date, first, last))
+                if not dates:  # Series which do not occur within the window still show when they next occur
+                    following = next(entry.recurrence.dates(entry.due_date, last + datetime.timedelta(days=1),
+                                                            datetime.date.max), None)
+                    dates = [following] if following is not None else []
+                occurrences.extend(Occurrence(entry, date) for date in dates)
+        occurrences.sort(key=sort_key)
+        return (list(heapq.merge(single, occurrences, key=sort_key)) if occurrences else single), occurrences
+
+    def find_within(self, first=None, last=None):
+        """
+        Create a list of all entries with recurring entries replaced by their occurrences within a window of dates
+        asked for by a filter, without changing the visible entries. Occurrences which are not visible are numbered
+        after the visible entries so that they can be found by uid until the entries are next expanded.
+
+        :param first:   A datetime.date specifying the start of the window, or None to start RECURRENCE_LOOKBEHIND
+                        days ago or, for a window ending before then, the length of the default window before its end.
+        :param last:    A datetime.date specifying the end of the window, or None to end RECURRENCE_LOOKAHEAD days
+                        ahead or, for a window starting after then, the length of the default window after its start.
+        :return:        A list of DiaryEntry and Occurrence objects.
+        """
+        if not self.visible:
+            self.expand()
+        today = datetime.date.today()
+        limit = datetime.timedelta(days=RECURRENCE_LIMIT)
+        length = datetime.timedelta(days=RECURRENCE_LOOKBEHIND + RECURRENCE_LOOKAHEAD)
+        first = max(first, today - limit) if first is not None else None
+        last = min(last, today + limit) if last is not None else None
+        if first is None:
+            first = today - datetime.timedelta(days=RECURRENCE_LOOKBEHIND)
+            if last is not None:
+                first = min(first, last - length)
+        if last is None:
+            last = max(today + datetime.timedelta(days=RECURRENCE_LOOKAHEAD), first + length)
+
+        numbered = {(occurrence.series.key, occurrence.date): occurrence for occurrence in self.occurrences}
+        uid = max(self.taken_uids, default=0)
+        entries = self.occurring(first, last)[0]
+        for number, entry in enumerate(entries):
+            if isinstance(entry, Occurrence):
+                visible = numbered.get((entry.series.key, entry.date))
+                if visible is None:
+                    uid += 1
+                    entry.uid = uid
+                    self.uid_index[uid] = entry
+                else:
+                    entries[number] = visible  # Keeps its uid
+        return entries
+
+    def find(self, *uids):
+        """
+        Find the visible entries with the given uids.
+
+        :param uids:    A list of ints which are uids of objects to find. Unknown and repeated uids are ignored.
+        :return:        A list of DiaryEntry and Occurrence objects.
+        """
+        if not self.visible:
+            self.expand()
+        return [self.uid_index[uid] for uid in dict.fromkeys(uids) if uid in self.uid_index]
+
+    def find_key(self, key):
+        """
+        Find the stored entry with the given key.
+
+        :param key:     The key str of the entry.
+        :return:        A DiaryEntry object or None if no entry has the key.
+        """
+        return self.keyed.get(key)
+
+    def cache_key(self, source):
+        """
+        Create the part of a filter cache key which identifies the entries being filtered.
+
+        :param source:      A str naming where the entries came from, e.g. 'visible' or a saved filter name.
+        :return:            A tuple of the source, generation and today's date.
+        """
+        return source, self.generation, datetime.date.today()
+
+    def save_filter(self, name, condition):
+        """
+        Save a filter expression under a name and calculate its result.
+
+        :param name:        The str name of the filter.
+        :param condition:   The filter expression str.
+        :return:            None.
+        """
+        self.delete_filter(name)
+        saved = SavedFilter(name, condition)
+        saved.rebuild(self.entries)
+        self.saved_filters[name] = saved
+        self.indexes.append(saved)
+        self.save_data()
+
+    def delete_filter(self, name):
+        """
+        Delete a saved filter.
+
+        :param name:        The str name of the filter.
+        :return:            True if the filter existed.
+        """
+        saved = self.saved_filters.pop(name, None)
+        if saved is None:
+            return False
+        self.indexes.remove(saved)
+        self.save_data()
+        return True
+
+    def open_filter(self, name):
+        """
+        Get the visible entries matching a saved filter without scanning the diary.
+
+        :param name:        The str name of the filter.
+        :return:            A sorted list of DiaryEntry and Occurrence objects.
+        """
+        saved = self.saved_filters[name]
+        if saved.is_stale():
+            self.rollover()
+        matched = sorted((self.keyed[key] for key in saved.keys if key in self.keyed), key=sort_key)
+        occurrences = [entry for entry in self.find_within(*saved.expression.window(datetime.date.today()))
+                       if isinstance(entry, Occurrence) and saved.matches(entry)]
+        return list(heapq.merge(matched, occurrences, key=sort_key)) if occurrences else matched
+
+    def rollover(self):
+        """
+        Recalculate saved filters whose results depend on today's date, if the date has changed since they were
+        calculated. Called when the diary is loaded and before a saved filter is opened.
+
+        :return:            None.
+        """
+        stale = [saved for saved in self.saved_filters.values() if saved.is_stale()]
+        for saved in stale:
+            saved.rebuild(self.entries)
+
+    def apply(self, operation):
+        """
+        Perform a single operation on the stored entries and create the operation which reverses it.
+
+        The operations are ('add', data), ('remove', key), ('edit', key, attr, value), ('extend', days, keys),
+        ('replace', key, data), ('archive', keys) and ('restore', keys).
+
+        :param operation:   A tuple whose first item is the name of the operation.
+        :return:            The inverse operation tuple.
+        """
+        name, *args = operation
+        if name == 'add':
+            entry = DiaryEntry(**args[0])
+            self.insert(entry)
+            self.show(entry)
+            return 'remove', entry.key
+        elif name == 'remove':
+            entry = self.find_key(args[0])
+            self.discard(entry)
+            self.hide(entry)
+            return 'add', entry.data
+        elif name == 'edit':
+            key, attr, value = args
+            entry = self.find_key(key)
+            old_value = getattr(entry, attr)
+            with self.changing(entry):
+                entry.edit(attr, value)
+            return 'edit', key, attr, old_value
+        elif name == 'extend':
+            days, keys = args
+            for key in keys:
+                entry = self.find_key(key)
+                with self.changing(entry):
+                    entry.due_date += datetime.timedelta(days=days)
+            return 'extend', -days, keys
+        elif name == 'replace':
+            key, data = args
+            entry = self.find_key(key)
+            old_data = entry.data
+            with self.changing(entry):
+                for attr, value in data.items():
+                    entry.edit(attr, value)
+                entry.recurrence = Recurrence(**data[RECURRENCE]) if data[RECURRENCE] is not None else None
+            return 'replace', key, old_data
+        elif name == 'archive':
+            entries = [self.find_key(key) for key in args[0]]
+            for entry in entries:
+                self.discard(entry)
+                self.hide(entry)
+            self.archive.add(entries)
+            return 'restore', args[0]
+        elif name == 'restore':
+            for entry in self.archive.remove(args[0]):
+                self.insert(entry)
+                self.show(entry)
+            return 'archive', args[0]
+
+    def show(self, entry):
+        """Add an entry to the visible entries until they are next expanded."""
+        self.visible.append(entry)
+        self.uid_index[entry.uid] = entry
+
+    def hide(self, entry):
+        """Remove an entry from the visible entries if it is there."""
+        if self.uid_index.get(entry.uid) is entry:
+            del self.uid_index[entry.uid]
+            if entry in self.visible:  # Occurrences numbered by `find_within` are not visible
+                self.visible.remove(entry)
+
+    @contextmanager
+    def changing_series(self, occurrence):
+        """
+        Record the inverse of a change to an occurrence, which is to restore the data of its whole series, and update
+        the series after the changes made within the block.
+
+        :param occurrence:  The Occurrence which is about to change.
+        :return:            A context manager.
+        """
+        self.history.record(('replace', occurrence.series.key, occurrence.series.data))
+        with self.changing(occurrence.series):
+            yield
+
+    @update_data
+    def undo(self):
+        """
+        Revert the most recent undoable step.
+
+        :return:    True if a step was undone, False if there was nothing to undo.
+        """
+        return self._replay(self.history.undo_steps, self.history.redo_steps)
+
+    @update_data
+    def redo(self):
+        """
+        Re-apply the most recently undone step.
+
+        :return:    True if a step was redone, False if there was nothing to redo.
+        """
+        return self._replay(self.history.redo_steps, self.history.undo_steps)
+
+    def _replay(self, source, target):
+        """Apply the last step of `source` and push the operations which reverse it onto `target`."""
+        self.history.commit()  # Earlier changes in the same batch become their own step so they are undone first
+        if not source:
+            return False
+        step = source.pop()
+        target.append([self.apply(operation) for operation in reversed(step)])
+        self.history.save()
+        return True
 
     @update_data
     def add(self, item_type, subject, description, due_date):
@@ -71,7 +474,8 @@ class Diary(object):
         :return:            None.
         """
         uid = self.generate_initial_uid()
-        self.entries.append(DiaryEntry(uid, item_type, subject, description, due_date))
+        data = DiaryEntry(uid, item_type, subject, description, due_date).data
+        self.history.record(self.apply(('add', data)))
 
     @update_data
     def remove(self, *uids):
@@ -81,9 +485,34 @@ class Diary(object):
         :param uids:    A list of ints which are uids of objects to remove.
         :return:        None.
         """
-        for entry in self.entries:
-            if entry.uid in uids:
-                self.entries.remove(entry)
+        for entry in self.find(*uids):
+            if isinstance(entry, Occurrence):
+                with self.changing_series(entry):
+                    entry.skip()  # Only this occurrence is removed, not the whole series
+                self.hide(entry)
+            else:
+                self.history.record(self.apply(('remove', entry.key)))
+
+    @update_data
+    def merge(self, changed, removed):
+        """
+        Take the changes made to entries in another copy of the diary.
+
+        :param changed:     A list of dicts of the data of entries which were added or changed in the other copy.
+        :param removed:     A list of the key strs of entries which were removed in the other copy.
+        :return:            None.
+        """
+        for data in changed:
+            entry = self.find_key(data[KEY])
+            if entry is None:
+                data[UID] = self.generate_initial_uid()
+                self.history.record(self.apply(('add', data)))
+            else:
+                data[UID] = entry.uid  # Keep the uid it is displayed with
+                self.history.record(self.apply(('replace', entry.key, data)))
+        for key in removed:
+            if self.find_key(key) is not None:
+                self.history.record(self.apply(('remove', key)))
 
     @update_data
     def edit(self, attr, value, *uids):
@@ -95,9 +524,8 @@ class Diary(object):
         :param uids:    A list of ints which are uids of objects to edit
         :return:        None.
         """
-        for entry in self.entries:
-            if entry.uid in uids:
-                entry.edit(attr, value)
+        for entry in self.find(*uids):
+            self.change(entry, attr, value)
 
     @update_data
     def extend(self, days, *uids):
@@ -107,11 +535,17 @@ class Diary(object):
         :param uids:    A list of ints which are uids of objects to extend.
         :return:        None.
         """
-        for entry in self.entries:
-            if entry.uid in uids:
-                if entry.due_date is None:
-                    continue
-                entry.due_date += datetime.timedelta(days=days)
+        keys = []
+        for entry in self.find(*uids):
+            if entry.due_date is None:
+                continue
+            if isinstance(entry, Occurrence):
+                with self.changing_series(entry):
+                    entry.edit(DUE_DATE, entry.due_date + datetime.timedelta(days=days))
+            else:
+                keys.append(entry.key)
+        if keys:
+            self.history.record(self.apply(('extend', days, keys)))
 
     @update_data
     def priority(self, priority,  *uids):
@@ -121,17 +555,103 @@ class Diary(object):
         :param uids:        A list of ints which are uids of objects to extend.
         :return:            None.
         """
-        for entry in self.entries:
-            if entry.uid in uids:
-                entry.priority = priority
+        for entry in self.find(*uids):
+            self.change(entry, PRIORITY, priority)
+
+    @update_data
+    def repeat(self, interval, until, *uids):
+        """
+        Make diary entries recur, or stop them from recurring.
+
+        An occurrence with an interval of 0 detaches its series, turning it into a single entry with the data of that
+        occurrence.
+
+        :param interval:    An int specifying the number of days between occurrences, or 0 to stop repeating.
+        :param until:       A datetime.date of the last possible occurrence or None to repeat indefinitely.
+        :param uids:        A list of ints which are uids of objects to repeat.
+        :return:            None.
+        """
+        for entry in self.find(*uids):
+            if isinstance(entry, Occurrence):
+                series = entry.series
+                with self.changing_series(entry):
+                    if interval:
+                        rule = series.recurrence
+                        series.recurrence = Recurrence(interval, until, rule.exceptions, rule.overrides)
+                    else:
+                        for attr, value in entry.data.items():
+                            series.edit(attr, value)
+                        series.recurrence = None
+            elif interval and entry.due_date is not None:  # A series needs a date to start from
+                self.history.record(('replace', entry.key, entry.data))
+                with self.changing(entry):
+                    entry.recurrence = Recurrence(interval, until)
+
+    @update_data
+    def archive_entries(self, *uids):
+        """
+        Move entries to the archive. Archiving an occurrence archives its whole series.
+
+        :param uids:        A list of ints which are uids of objects to archive.
+        :return:            None.
+        """
+        entries = [entry.series if isinstance(entry, Occurrence) else entry for entry in self.find(*uids)]
+        keys = list(dict.fromkeys(entry.key for entry in entries))
+        if keys:
+            self.history.record(self.apply(('archive', keys)))
+
+    @update_data
+    def restore(self, *keys):
+        """
+        Move entries from the archive back into the diary.
+
+        :param keys:        A list of key strs of archived entries.
+        :return:            None.
+        """
+        keys = [key for key in keys if key in self.archive.load()]
+        if keys:
+            self.history.record(self.apply(('restore', keys)))
+
+    def archive_old(self):
+        """
+        Move entries which are more than `archive_age` days overdue to the archive. Recurring entries stay in the diary.
+        The change is saved but cannot be undone, and steps in the history which change the archived entries are
+        dropped.
+
+        :return:            None.
+        """
+        if self.archive_age is None:
+            return
+        cutoff = datetime.date.today() - datetime.timedelta(days=self.archive_age)
+        old = []
+        for entry in self.entries:  # Dated entries come first in order of due date
+            if entry.due_date is None or entry.due_date >= cutoff:
+                break
+            if entry.recurrence is None:
+                old.append(entry)
+        if old:
+            self.apply(('archive', [entry.key for entry in old]))
+            self.save_data()
+
+    def change(self, entry, attr, value):
+        """
+        Change a single attribute of a visible entry and record how to reverse it.
+
+        :param entry:   A DiaryEntry or Occurrence object.
+        :param attr:    A str containing the attribute name to edit.
+        :param value:   The new value to set.
+        :return:        None.
+        """
+        if isinstance(entry, Occurrence):
+            with self.changing_series(entry):
+                entry.edit(attr, value)
+        else:
+            self.history.record(self.apply(('edit', entry.key, attr, value)))
 
     def generate_initial_uid(self):
         """
         Generate a uid that is not already used.
         This will be changed later on based on the order of display.
-        :return:    An int between 100 and 999.
+        :return:    An int greater than every uid in use.
         """
-        while True:
-            uid = randint(100, 999)
-            if uid not in self.taken_uids:
-                return uid
+        return max(self.taken_uids, default=0) + 1
@@ -1,4 +1,7 @@
 import datetime
+import uuid
+
+from Recurrence import Recurrence
 
 HOMEWORK = 'homework'
 ASSESSMENT = 'assessment'
@@ -11,6 +14,8 @@ DUE_DATE = 'due_date'
 ITEM_TYPE = 'item_type'
 PRIORITY = 'priority'
 DAYS_LEFT = 'days_left'
+RECURRENCE = 'recurrence'
+KEY = 'key'
 
 
 class CheckedVar(object):
@@ -68,6 +73,8 @@ class DiaryEntry(object):
     :param description: The description str.
     :param due_date:    A datetime.date object representing the entry's due date.
     :param uid:         An int specifying a UID. Typically only used when loading data from file.
+    :param recurrence:  A Recurrence object (or its data dict) if the entry repeats, otherwise None.
+    :param key:         A str which permanently identifies the entry, unlike the UID which changes with the display.
     """
 
     uid = CheckedVar(int)
@@ -76,8 +83,10 @@ class DiaryEntry(object):
     due_date = CheckedVar(datetime.date)
     item_type = CheckedVar(str, [HOMEWORK, ASSESSMENT, NOTE])
     priority = CheckedVar(int, default=0, options=[0, 1])
+    recurrence = CheckedVar(Recurrence)
+    key = CheckedVar(str)
 
-    def __init__(self, uid, item_type, subject, description, due_date, priority=0):
+    def __init__(self, uid, item_type, subject, description, due_date, priority=0, recurrence=None, key=None):
         """Initialise instance variables."""
         self.uid = uid
         self.item_type = item_type
@@ -85,6 +94,8 @@ class DiaryEntry(object):
         self.description = description
         self.due_date = due_date
         self.priority = priority
+        self.recurrence = Recurrence(**recurrence) if isinstance(recurrence, dict) else recurrence
+        self.key = key if key is not None else uuid.uuid4().hex
 
     def edit(self, attr, value):
         """
@@ -105,7 +116,9 @@ class DiaryEntry(object):
                 DESCRIPTION: self.description,
                 DUE_DATE: self.due_date,
                 ITEM_TYPE: self.item_type,
-                PRIORITY: self.priority}
+                PRIORITY: self.priority,
+                RECURRENCE: self.recurrence.data if self.recurrence is not None else None,
+                KEY: self.key}
 
     @property
     def days_left(self):
@@ -113,3 +126,39 @@ class DiaryEntry(object):
         if self.due_date is None:
             return None
         return (self.due_date - datetime.date.today()).days
+
+
+class Occurrence(DiaryEntry):
+    """
+    A single occurrence of a recurring DiaryEntry. Occurrences are generated on demand and never stored; any changes
+    made to one are recorded as an override (or exception) in the recurrence rule of its series.
+
+    :param series:      The recurring DiaryEntry which the occurrence belongs to.
+    :param date:        The original datetime.date of the occurrence, which identifies it within the series.
+    """
+
+    def __init__(self, series, date):
+        """Initialise instance variables."""
+        data = series.data
+        data[DUE_DATE] = date
+        data[RECURRENCE] = None
+        data.update(series.recurrence.overrides.get(date, {}))
+        super().__init__(**data)
+        self.series = series
+        self.date = date
+
+    def edit(self, attr, value):
+        """
+        Edit the data of this occurrence only.
+
+        :param attr:    The str name of the attribute to edit.
+        :param value:   The new value.
+        :return:        None.
+        """
+        if attr in (SUBJECT, DESCRIPTION, DUE_DATE, ITEM_TYPE, PRIORITY):  # The UID is not part of the series
+            super().edit(attr, value)  # Validate the value before storing it
+            self.series.recurrence.override(self.date, attr, value)
+
+    def skip(self):
+        """Remove this occurrence from its series."""
+        self.series.recurrence.skip(self.date)
@@ -1,19 +1,28 @@
 import re
-from datetime import date
+from datetime import date, timedelta
+from functools import lru_cache
 from DiaryEntry import UID, ITEM_TYPE, SUBJECT, DESCRIPTION, DUE_DATE, PRIORITY, DAYS_LEFT
+from dates import DATE_FORMAT, str_to_date
+from ParallelFilter import PARALLEL_THRESHOLD, default_workers, parallel_match
+from BKTree import words_of, max_distance
+from string_analysis import levenshtein
 
 ATTR_MSG = 'Attribute does not exist'
 VALUE_MSG = 'Invalid value'
+SYNTAX_MSG = 'Invalid condition'
+REGEX_MSG = 'Invalid regular expression'
 FILTER_ATTRIBUTES = {
     'uid': UID, 'u': UID,
     'type': ITEM_TYPE, 't': ITEM_TYPE, 'item_type': ITEM_TYPE,
     'subject': SUBJECT, 's': SUBJECT,
     'description': DESCRIPTION, 'd': DESCRIPTION,
-    'duedate': DUE_DATE, 'due': DUE_DATE,
+    'duedate': DUE_DATE, 'due': DUE_DATE, 'due_date': DUE_DATE,
     'priority': PRIORITY, 'p': PRIORITY,
-    'daysleft': DAYS_LEFT, 'days': DAYS_LEFT
+    'daysleft': DAYS_LEFT, 'days': DAYS_LEFT, 'days_left': DAYS_LEFT
 }
-DATE_FORMAT = '%d/%m/%Y'
+SAMPLE_SIZE = 32  # Number of entries tested to estimate how selective a condition is
+PATTERN_CACHE_SIZE = 128  # Number of compiled regular expressions kept for repeated conditions
+WORD_ATTRIBUTES = (DESCRIPTION,)  # Attributes matched word by word by the ~~ operator, rather than as a whole
 
 
 class FilterException(Exception):
@@ -24,72 +33,665 @@ class FilterException(Exception):
     pass
 
 
-def filter_function(function):
+def to_positions(bitmap):
     """
-    A decorator which filters through the entries according to a condition provided by the decorated function.
-    The decorated function should have the signature decorated_function(self, obj_value, filter_value) to specify
-    the condition between the value given and that of the object but will end up with the signature
-    decorated_function(attr, value, negate=False) to determine the attribute and value to compare.
+    Convert a bitmap into the positions of its set bits.
 
-    :param function:        The function to be decorated.
-    :return:                A decorated function.
+    :param bitmap:      An int whose set bits mark selected positions.
+    :return:            A list of ints in ascending order.
     """
-    def wrapper(self, attr, value, negate=False):
-        matched = []
-        for obj in self.objects:
-            try:
-                obj_value = getattr(obj, attr)
-            except AttributeError:  # If invalid attribute is specified
-                return ATTR_MSG
-            if obj_value is None and value.lower() != 'none':  # Skip over blank values if not looking for them
-                continue
-            try:
-                if negate:
-                    if not function(self, obj_value, value):
-                        matched.append(obj)
-                else:
-                    if function(self, obj_value, value):
-                        matched.append(obj)
-            except ValueError:  # If type conversion fails
-                return VALUE_MSG
-            except TypeError:  # If a date is converted to int
-                return 'Due date cannot be used with the < or > operator. Use \'days\' instead.'
+    return [match.start() for match in re.finditer('1', bin(bitmap)[:1:-1])]
+
+
+def from_positions(positions, size):
+    """
+    Convert positions into a bitmap.
+
+    :param positions:   An iterable of ints.
+    :param size:        The number of positions which the bitmap covers.
+    :return:            An int whose set bits mark the given positions.
+    """
+    bits = bytearray(b'0' * size)
+    for position in positions:
+        bits[size - 1 - position] = ord('1')
+    return int(bits, 2) if size else 0
+
+
+def intersect(windows):
+    """
+    Combine windows of due dates into the window of dates within all of them.
+
+    :param windows:     An iterable of (first, last) tuples of datetime.date objects, with None for an unbounded side.
+    :return:            A (first, last) tuple.
+    """
+    windows = list(windows)
+    return (max((first for first, last in windows if first is not None), default=None),
+            min((last for first, last in windows if last is not None), default=None))
+
+
+def union(windows):
+    """
+    Combine windows of due dates into the smallest window containing all of them.
+
+    :param windows:     An iterable of (first, last) tuples of datetime.date objects, with None for an unbounded side.
+    :return:            A (first, last) tuple.
+    """
+    firsts, lasts = zip(*windows)
+    return (None if None in firsts else min(firsts)), (None if None in lasts else max(lasts))
+
+
+# The following functions define conditions for the operators.
+# :param obj_val:       The value of the object's attribute.
+# :param filter_val:    The value given in the condition, already prepared by `Condition`.
+# :return:              True if the object's value meets the condition.
+
+def equal_to(obj_val, filter_val):
+    if type(obj_val) == date:
+        return obj_val.strftime(DATE_FORMAT) == filter_val
+    return str(obj_val).lower() == filter_val
+
+
+def less_than(obj_val, filter_val):
+    if type(filter_val) == date:
+        return obj_val < filter_val
+    return int(obj_val) < filter_val
+
+
+def greater_than(obj_val, filter_val):
+    if type(filter_val) == date:
+        return obj_val > filter_val
+    return int(obj_val) > filter_val
+
+
+def contains(obj_val, filter_val):
+    if type(obj_val) == date:
+        return filter_val in obj_val.strftime(DATE_FORMAT)
+    return filter_val in str(obj_val).lower()
+
+
+def matches_pattern(obj_val, filter_val):
+    pattern, literal, anchored = filter_val
+    text = obj_val.strftime(DATE_FORMAT) if type(obj_val) == date else str(obj_val)
+    lowered = text.lower()
+    if not (lowered.startswith(literal) if anchored else literal in lowered):  # Cheap test before the regex
+        return False
+    return pattern.search(text) is not None
+
+
+def within_distance(obj_val, filter_val):
+    text = obj_val.strftime(DATE_FORMAT) if type(obj_val) == date else str(obj_val)
+    return filter_val.distance(text) is not None
+
+
+class FuzzyMatch(object):
+    """
+    The value of a ~~ condition, which matches values with a word close to each of its words by edit distance.
+
+    The close words can be looked up once in a BKTree of every word in use, after which testing a value only looks up
+    its words. Without a tree, the distances to the words of each value are calculated.
+
+    :param value:       The str value of the condition.
+    :param split:       True to match each word of the value, False to match it as one word.
+    """
+
+    def __init__(self, value, split):
+        """Initialise instance variables."""
+        self.split = split
+        self.words = words_of(value, split)
+        self.limits = [max_distance(word) for word in self.words]
+        self.close = None  # Dicts mapping the close words of each word to their distances, once looked up
+
+    def lookup(self, tree):
+        """Find the close words of each word in a BKTree."""
+        self.close = [{match: distance for distance, match in tree.search(word, limit)}
+                      for word, limit in zip(self.words, self.limits)]
+
+    def distance(self, text):
+        """
+        Measure how closely a value matches.
+
+        :param text:    The str value to test.
+        :return:        The int sum of the distances from each word to the closest word of the value, or None if a
+                        word has no close word in the value.
+        """
+        text_words = words_of(text, self.split)
+        total = 0
+        for index, (word, limit) in enumerate(zip(self.words, self.limits)):
+            if self.close is not None:
+                close = self.close[index]
+                best = min((close[text_word] for text_word in text_words if text_word in close), default=None)
+            else:
+                best = min((levenshtein(word, text_word, limit) for text_word in text_words), default=limit + 1)
+                best = best if best <= limit else None
+            if best is None:
+                return None
+            total += best
+        return total
+
+
+def required_literal(pattern):
+    """
+    Find the longest run of literal characters that every match of a regular expression must contain. The search is
+    conservative and gives up on alternation and skips groups and character classes entirely.
+
+    :param pattern:     The regular expression str.
+    :return:            A tuple of the lower case literal str (possibly empty) and whether it must start the string.
+    """
+    if '|' in pattern:
+        return '', False
+    runs = []  # Tuples of (start index, literal)
+    current, start, index = '', 0, 0
+
+    def end_run(next_start):
+        nonlocal current, start
+        if current:
+            runs.append((start, current))
+        current, start = '', next_start
+
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\' and index + 1 < len(pattern):
+            escaped = pattern[index + 1]
+            if escaped in 'xuUN' or escaped.isdigit():  # Codes, octal escapes and back references run past the escape
+                return '', False
+            if escaped.isalnum():  # A character class such as \d
+                end_run(index + 2)
+            else:
+                current += escaped
+            index += 2
+            continue
+        if char in '*?{':  # The previous character is optional
+            current = current[:-1]
+            end_run(index + 1)
+            if char == '{':
+                index = pattern.find('}', index) if '}' in pattern[index:] else len(pattern)
+        elif char in '[(':  # Skip the whole class or group
+            closing = ']' if char == '[' else ')'
+            depth = 0
+            while index < len(pattern):
+                if pattern[index] == '\\':
+                    index += 1
+                elif pattern[index] == char:
+                    depth += 1
+                elif pattern[index] == closing:
+                    depth -= 1
+                    if not depth:
+                        break
+                index += 1
+            end_run(index + 1)
+            if pattern[index + 1:index + 2] in ('?', '*', '{'):
+                index += 1  # A quantifier after a skipped group has nothing to remove
+        elif char in '.^$+)':
+            end_run(index + 1)
+        else:
+            current += char
+        index += 1
+    end_run(index)
+
+    if not runs:
+        return '', False
+    run_start, literal = max(runs, key=lambda run: len(run[1]))
+    return literal.lower(), pattern.startswith('^') and run_start == 1
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern):
+    """
+    Compile a case-insensitive regular expression with its required literal for pre-screening.
+
+    :param pattern:     The regular expression str.
+    :return:            A tuple of the compiled pattern, the required literal and whether the literal is a prefix.
+    """
+    literal, anchored = required_literal(pattern)
+    return (re.compile(pattern, re.IGNORECASE), literal, anchored)
+
+
+OPERATORS = {'=': equal_to, '<': less_than, '>': greater_than, ':': contains, '~': matches_pattern,
+             '~~': within_distance}
+COSTS = {'=': 1, '<': 1, '>': 1, ':': 2, '~': 3, '~~': 3}  # Relative cost of testing one object
+
+
+class Condition(object):
+    """
+    A single [attribute][operator][value] condition of a filter expression.
+
+    :param attr:        The attribute name or abbreviation as entered.
+    :param operator:    The operator, possibly prefixed with !.
+    :param value:       The value to compare to.
+    """
+
+    def __init__(self, attr, operator, value):
+        """Initialise instance variables and convert the value once for all comparisons."""
+        self.attr = FILTER_ATTRIBUTES.get(attr.lower())
+        if self.attr is None:
+            raise FilterException(ATTR_MSG)
+        self.negate = operator.startswith('!')
+        self.operator = operator.strip('!')
+        self.value = value
+        self.compare = OPERATORS[self.operator]
+        self.cost = COSTS[self.operator]
+        self.match_none = value.lower() == 'none'  # Blank values are skipped unless looking for them
+        try:
+            if self.operator in '<>':
+                self.filter_val = str_to_date(value) if self.attr == DUE_DATE else int(value)
+            elif self.operator == '~':
+                self.filter_val = compile_pattern(value)
+            elif self.operator == '~~':
+                self.filter_val = FuzzyMatch(value, self.attr in WORD_ATTRIBUTES)
+                if not self.filter_val.words:
+                    raise ValueError(value)
+            else:
+                self.filter_val = value.lower()
+        except ValueError:  # If type conversion fails
+            raise FilterException(VALUE_MSG)
+        except re.error:
+            raise FilterException(REGEX_MSG)
+
+    def matches(self, obj):
+        """
+        Test a single object against the condition.
+
+        :param obj:         The object to test.
+        :return:            True if the object meets the condition.
+        """
+        obj_value = getattr(obj, self.attr)
+        if obj_value is None and not self.match_none:
+            return False
+        try:
+            return self.compare(obj_value, self.filter_val) != self.negate
+        except (ValueError, TypeError):  # If the object's value cannot be compared to the given value
+            raise FilterException(VALUE_MSG)
+
+    def evaluate(self, filter_obj, candidates):
+        """
+        Select the candidates which meet the condition. Large numbers of candidates are tested across a process pool.
+
+        :param filter_obj:  The Filter object being refined.
+        :param candidates:  A bitmap of positions in `filter_obj.original` to test.
+        :return:            A bitmap of the matching positions.
+        """
+        objects = filter_obj.original
+        positions = to_positions(candidates)
+        if len(positions) >= filter_obj.parallel_threshold and filter_obj.workers > 1:
+            matched, failed = parallel_match(objects, positions, self, filter_obj.workers)
+            if failed:
+                raise FilterException(VALUE_MSG)
+        else:
+            matched = [position for position in positions if self.matches(objects[position])]
+        return from_positions(matched, len(objects))
+
+    def estimate(self, filter_obj):
+        """Estimate the fraction of objects which meet the condition from a sample."""
+        return filter_obj.estimate(self)
+
+    def attributes(self):
+        """Returns a set of the attribute names used in the expression."""
+        return {self.attr}
+
+    def conditions(self):
+        """Returns a list of the conditions in the expression which are not negated, for ranking results."""
+        return [self] if not self.negate else []
+
+    def window(self, today):
+        """
+        Find the due dates which an object meeting the condition can have.
+
+        :param today:       The datetime.date which days left are counted from.
+        :return:            A (first, last) tuple of datetime.date objects, with None for an unbounded side.
+        """
+        if self.negate or self.attr not in (DUE_DATE, DAYS_LEFT) or self.operator not in ('<', '>', '='):
+            return None, None
+        try:
+            if self.attr == DUE_DATE:
+                bound = self.filter_val if self.operator != '=' else str_to_date(self.value)
+            else:
+                bound = today + timedelta(days=self.filter_val if self.operator != '=' else int(self.value))
+        except ValueError:
+            return None, None
+        if bound is None:  # e.g. due=none
+            return None, None
+        if self.operator == '<':
+            return None, bound - timedelta(days=1)
+        if self.operator == '>':
+            return bound + timedelta(days=1), None
+        return bound, bound
+
+    def distance(self, obj):
+        """Returns how closely an object matches a ~~ condition, or None if it does not match."""
+        obj_value = getattr(obj, self.attr)
+        if obj_value is None:
+            return None
+        return self.filter_val.distance(obj_value.strftime(DATE_FORMAT) if type(obj_value) == date else str(obj_value))
+
+    def __str__(self):
+        value = self.value
+        if any(char in value for char in '&|()'):
+            value = "'{}'".format(value) if '"' in value else '"{}"'.format(value)
+        return '{} {}{} {}'.format(self.attr, '!' if self.negate else '', self.operator, value)
+
+
+class Not(object):
+    """Negates a filter expression."""
+
+    def __init__(self, child):
+        self.child = child
+        self.cost = child.cost
+
+    def evaluate(self, filter_obj, candidates):
+        return candidates & ~self.child.evaluate(filter_obj, candidates)
+
+    def estimate(self, filter_obj):
+        return 1 - self.child.estimate(filter_obj)
+
+    def matches(self, obj):
+        return not self.child.matches(obj)
+
+    def attributes(self):
+        return self.child.attributes()
+
+    def conditions(self):
+        return []  # Objects are ranked by how closely they match, not by how closely they do not
+
+    def window(self, today):
+        return None, None
+
+    def __str__(self):
+        return '!({})'.format(self.child)
+
+
+class And(object):
+    """
+    Selects objects meeting all of its child expressions.
+    The most selective and cheapest children are evaluated first, each one only testing what the previous ones kept.
+    """
+
+    def __init__(self, children):
+        self.children = children
+        self.cost = sum(child.cost for child in children)
+
+    def evaluate(self, filter_obj, candidates):
+        ranked = sorted(self.children, key=lambda child: child.cost / max(1 - child.estimate(filter_obj), 1e-6))
+        for child in ranked:
+            if not candidates:
+                break  # Nothing left for the remaining children to reject
+            candidates = child.evaluate(filter_obj, candidates)
+        return candidates
+
+    def estimate(self, filter_obj):
+        selectivity = 1
+        for child in self.children:
+            selectivity *= child.estimate(filter_obj)
+        return selectivity
+
+    def matches(self, obj):
+        return all(child.matches(obj) for child in self.children)
+
+    def attributes(self):
+        return set().union(*(child.attributes() for child in self.children))
+
+    def conditions(self):
+        return [condition for child in self.children for condition in child.conditions()]
+
+    def window(self, today):
+        return intersect(child.window(today) for child in self.children)
+
+    def __str__(self):
+        return ' & '.join(str(child) if not isinstance(child, Or) else '({})'.format(child)
+                          for child in self.children)
+
+
+class Or(object):
+    """
+    Selects objects meeting any of its child expressions.
+    The least selective and cheapest children are evaluated first so that later ones test fewer objects.
+    """
+
+    def __init__(self, children):
+        self.children = children
+        self.cost = sum(child.cost for child in children)
+
+    def evaluate(self, filter_obj, candidates):
+        ranked = sorted(self.children, key=lambda child: child.cost / max(child.estimate(filter_obj), 1e-6))
+        matched = 0
+        for child in ranked:
+            remaining = candidates & ~matched
+            if not remaining:
+                break  # Everything has already been selected
+            matched |= child.evaluate(filter_obj, remaining)
         return matched
-    return wrapper
 
+    def estimate(self, filter_obj):
+        rejected = 1
+        for child in self.children:
+            rejected *= 1 - child.estimate(filter_obj)
+        return 1 - rejected
 
-class Filter:
+    def matches(self, obj):
+        return any(child.matches(obj) for child in self.children)
+
+    def attributes(self):
+        return set().union(*(child.attributes() for child in self.children))
+
+    def conditions(self):
+        return [condition for child in self.children for condition in child.conditions()]
+
+    def window(self, today):
+        return union(child.window(today) for child in self.children)
+
+    def __str__(self):
+        return ' | '.join(str(child) for child in self.children)
+
+
+class Parser(object):
+    """
+    Parses a filter expression made of conditions combined with & (and), | (or), ! (not) and parentheses.
+    & binds more tightly than |.
+
+    :param condition_format:    A compiled regex matching a single condition.
+    :param text:                The expression str.
     """
+
+    def __init__(self, condition_format, text):
+        self.condition_format = condition_format
+        self.text = text
+        self.position = 0
+
+    def parse(self):
+        """
+        Parse the whole expression.
+
+        :return:            An expression object with `evaluate`, `estimate`, `matches`, `attributes`, `conditions`,
+                            `window` and `cost`.
+        """
+        expression = self.parse_or()
+        if self.peek():
+            raise FilterException(SYNTAX_MSG)
+        return expression
+
+    def peek(self):
+        """Skip whitespace and return the next character, or an empty str at the end of the expression."""
+        while self.position < len(self.text) and self.text[self.position].isspace():
+            self.position += 1
+        return self.text[self.position:self.position + 1]
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == '|':
+            self.position += 1
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self):
+        children = [self.parse_factor()]
+        while self.peek() == '&':
+            self.position += 1
+            children.append(self.parse_factor())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_factor(self):
+        char = self.peek()
+        if char == '!':
+            self.position += 1
+            return Not(self.parse_factor())
+        if char == '(':
+            self.position += 1
+            expression = self.parse_or()
+            if self.peek() != ')':
+                raise FilterException(SYNTAX_MSG)
+            self.position += 1
+            return expression
+        match = self.condition_format.match(self.text, self.position)
+        if match is None:
+            raise FilterException(SYNTAX_MSG)
+        self.position = match.end()
+        return to_condition(*match.groups())
+
+
+def to_condition(attr, operator, value):
+    """Returns a Condition from the parts of a condition str, with the quotes around a quoted value removed."""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        value = value[1:-1]  # Quoted values may contain any characters
+    return Condition(attr, operator, value)
+
+
+class Filter:
+    r"""
     A class which can filter through a list of objects by comparing the value of an attribute to a given value.
-    The condition format to use is [attribute][operator][value].
+    The condition format to use is [attribute][operator][value]. Conditions can be combined into an expression with
+    & (and), | (or), ! (not) and parentheses, e.g. (subject=maths | subject=physics) & days<7 & !description:draft.
+    Values containing these characters can be quoted, e.g. description~"^(lab|prac)\s+\d+".
+
+    The ~~ operator matches values within a few typing mistakes of each word, e.g. subject~~phsyics, and the results
+    are ordered by how closely they match.
+
+    The current selection is held as a bitmap over the positions of the original objects.
 
-    :param objects:         A list of objects to be filtered.
-    :param initial:         An initial filter condition string.
+    :param objects:             A list of objects to be filtered.
+    :param workers:             The number of processes used for large filters. Defaults to the number of CPUs.
+    :param parallel_threshold:  The number of candidates from which a condition is tested in parallel.
+    :param cache:               An optional FilterCache to look up and store results in.
+    :param cache_key:           A tuple identifying `objects` in the cache, e.g. their source and Diary generation.
+    :param fuzzy:               An optional dict mapping attribute names to BKTrees of the words of every object's
+                                value, which ~~ conditions look up close words in.
+    :param expand:              An optional function taking the first and last datetime.date of a window, either of
+                                which may be None for the default, and returning the objects due within it, e.g.
+                                with the occurrences of recurring entries generated for it. It is called whenever the
+                                active filters bound the due dates differently, so `objects` should be its result for
+                                the default window.
     """
-    condition_format = re.compile('(.*?)\s*(!?[=<>:])(.*)')
+    condition_format = re.compile(r'\s*([A-Za-z_]+)\s*(!?(?:~~|[=<>:~]))(\s*"[^"]*"|\s*\'[^\']*\'|[^&|()]*)')
+    whole_condition_format = re.compile(r'\s*([A-Za-z_]+)\s*(!?(?:~~|[=<>:~]))(.*)', re.DOTALL)
 
-    def __init__(self, objects):
+    def __init__(self, objects, workers=None, parallel_threshold=PARALLEL_THRESHOLD, cache=None, cache_key=(),
+                 fuzzy=None, expand=None):
         """Initialise instance variables."""
         self.original = objects  # Allows resetting of conditions
+        self.workers = workers if workers is not None else default_workers()
+        self.parallel_threshold = parallel_threshold
+        self.cache = cache
+        self.cache_key = cache_key
+        self.fuzzy = {} if fuzzy is None else fuzzy
+        self.expand = expand
+        self.window = (None, None)  # Window of due dates which `original` was expanded for, None for the default
+        self.everything = (1 << len(objects)) - 1
+        self.selection = self.everything
         self.objects = objects
         self.filters = []
+        self.expressions = []  # The parsed active filters, which are applied again when the window changes
+        self.rankings = []  # The ~~ conditions of the active filters, which order the objects
+        self._estimates = {}
 
     def refine(self, condition):
         """
-        Add a condition to refine the list of filtered objects.
+        Add a condition or expression to refine the list of filtered objects.
 
-        :param condition:   A condition string.
+        :param condition:   A condition or expression string.
         :return:            None.
         """
-        if self.is_valid_condition(condition):
-            attr, operator, value = re.match(self.condition_format, condition).groups()  # Regex splits up raw string
-            attr = FILTER_ATTRIBUTES.get(attr, 'error')  # Attribute could be given in abbreviated form or not exist
-            matched_objects = self.select(attr, operator, value)  # Could be a list of filtered objects or error string
-            if type(matched_objects) is list:  # No error occurred
-                self.objects = matched_objects
-                self.filters.append('{} {} {}'.format(attr, operator, value))
-            else:  # Error occurred
-                raise FilterException(matched_objects)
+        expression = self.parse(condition)
+        rankings = [condition for condition in expression.conditions() if condition.operator == '~~']
+        for ranking in rankings:
+            if ranking.attr in self.fuzzy:
+                ranking.filter_val.lookup(self.fuzzy[ranking.attr])
+        if self.expand is not None:
+            window = intersect(previous.window(date.today()) for previous in self.expressions + [expression])
+            if window != self.window:
+                self.load(window)
+        self.selection = self.narrow(self.selection, self.filters, expression)
+        self.filters.append(str(expression))
+        self.expressions.append(expression)
+        self.rankings.extend(rankings)
+        self.update_objects()
+
+    def narrow(self, selection, filters, expression):
+        """
+        Select the objects which meet an expression, looking the result up in the cache if one is given.
+
+        :param selection:   A bitmap of positions in `original` selected by `filters`.
+        :param filters:     A list of the str filters which were applied before the expression.
+        :param expression:  An expression object.
+        :return:            A bitmap of the matching positions.
+        """
+        key = self.cache_key + (self.window, tuple(filters) + (str(expression),))  # The whole chain determines it
+        narrowed = self.cache.get(key) if self.cache is not None else None
+        if narrowed is None:
+            narrowed = expression.evaluate(self, selection)
+            if self.cache is not None:
+                self.cache.put(key, narrowed)
+        return narrowed
+
+    def load(self, window):
+        """
+        Replace the objects being filtered with those due within a window, and apply the active filters to them again.
+
+        :param window:      A (first, last) tuple of datetime.date objects, with None for the default.
+        :return:            None.
+        """
+        self.window = window
+        self.original = self.expand(*window)
+        self.everything = (1 << len(self.original)) - 1
+        self.selection = self.everything
+        self._estimates = {}
+        for number, expression in enumerate(self.expressions):
+            self.selection = self.narrow(self.selection, self.filters[:number], expression)
+        self.update_objects()
+
+    def update_objects(self):
+        """Update the list of selected objects, ordered by how closely they match any ~~ conditions."""
+        self.objects = [self.original[position] for position in to_positions(self.selection)]
+        if self.rankings:
+            self.objects.sort(key=self.rank)  # Stable, so equally close objects stay in display order
+
+    def rank(self, obj):
+        """Returns a sort key ordering objects by the number of ~~ conditions they miss, then their total distance."""
+        distances = [ranking.distance(obj) for ranking in self.rankings]
+        return distances.count(None), sum(distance for distance in distances if distance is not None)
+
+    def parse(self, condition):
+        """
+        Parse a condition or expression string. A string which is not a valid expression but is a single condition is
+        read as one condition whose value is the rest of the string, so unquoted values such as d:R&D still work.
+
+        :param condition:   The raw condition string.
+        :return:            An expression object.
+        """
+        try:
+            return Parser(self.condition_format, condition).parse()
+        except FilterException as fe:
+            match = self.whole_condition_format.fullmatch(condition) if fe.args[0] == SYNTAX_MSG else None
+            if match is None:
+                raise
+            return to_condition(*match.groups())
+
+    def is_expression(self, condition):
+        """
+        Checks whether a raw string is meant as a condition or expression, even if it is malformed.
+
+        :param condition:   The raw string.
+        :return:            A bool, True if the string starts with a condition, ( or !.
+        """
+        return condition.lstrip()[:1] in ('(', '!') or self.condition_format.match(condition) is not None
 
     def is_valid_condition(self, condition):
         """
@@ -98,31 +700,44 @@ class Filter:
         :param condition:   The raw condition string.
         :return:            A bool specifying whether the condition is valid.
         """
-        return bool(re.match(self.condition_format, condition))
+        try:
+            self.parse(condition)
+        except FilterException as fe:
+            return fe.args[0] != SYNTAX_MSG  # Only syntax errors mean the string is not a condition
+        return True
+
+    def estimate(self, condition):
+        """
+        Estimate the fraction of objects which meet a condition by testing an evenly spaced sample of them.
+
+        :param condition:   A Condition object.
+        :return:            A float between 0 and 1.
+        """
+        key = str(condition)
+        if key not in self._estimates:
+            step = max(1, len(self.original) // SAMPLE_SIZE)
+            sample = self.original[::step]
+            try:
+                matched = sum(1 for obj in sample if condition.matches(obj))
+            except FilterException:
+                matched = len(sample)  # Test unconvertable conditions last so their errors surface last
+            self._estimates[key] = (matched + 1) / (len(sample) + 2)  # Never certain from a sample
+        return self._estimates[key]
 
     def select(self, attr, operator, value):
         """
-        Maps operators to filter functions and selects all objects which match the condition.
+        Selects all currently filtered objects which match a single condition.
 
         :param attr:        The name of the attribute of the object to compare.
-        :param operator:    The operation to perform (either =, <, >, :, possibly with a ! prefixed).
+        :param operator:    The operation to perform (either =, <, >, :, ~, possibly with a ! prefixed).
         :param value:       The value to compare to.
         :return:            A list of matched objects or an error string.
         """
-        if '!' in operator:
-            operator = operator.strip('!')
-            negate = True
-        else:
-            negate = False
-
-        if operator == '=':
-            return self.equal_to(attr, value, negate)
-        elif operator == '>':
-            return self.greater_than(attr, value, negate)
-        elif operator == '<':
-            return self.less_than(attr, value, negate)
-        elif operator == ':':
-            return self.contains(attr, value, negate)
+        try:
+            matched = Condition(attr, operator, value).evaluate(self, self.selection)
+        except FilterException as fe:
+            return fe.args[0]
+        return [self.original[position] for position in to_positions(matched)]
 
     def reset(self):
         """
@@ -130,8 +745,13 @@ class Filter:
 
         :return:            None.
         """
-        self.objects = self.original
         self.filters = []
+        self.expressions = []
+        self.rankings = []
+        if self.window != (None, None):
+            self.load((None, None))
+        self.selection = self.everything
+        self.objects = self.original
 
     @property
     def filter_string(self):
@@ -141,31 +761,3 @@ class Filter:
         :return:            String of active conditions.
         """
         return '\n'.join(self.filters)
-
-    # The following functions define conditions for the operators however are decorated to actually
-    # filter the list of objects
-    # Signature after decoration is function(self, attr, value, negate=False).
-    # :param attr:          The name of the attribute to compare.
-    # :param value:         The given value to compare
-    # :param negate:        Determines whether the condition should be negated
-    # :return:
-
-    @filter_function
-    def equal_to(self, obj_val, filter_val):
-        if type(obj_val) == date:
-            return obj_val.strftime(DATE_FORMAT) == str(filter_val)
-        return str(obj_val).lower() == str(filter_val).lower()
-
-    @filter_function
-    def less_than(self, obj_val, filter_val):
-        return int(obj_val) < int(filter_val)
-
-    @filter_function
-    def greater_than(self, obj_val, filter_val):
-        return int(obj_val) > int(filter_val)
-
-    @filter_function
-    def contains(self, obj_val, filter_val):
-        if type(obj_val) == date:
-            return str(filter_val) in obj_val.strftime(DATE_FORMAT)
-        return str(filter_val).lower() in str(obj_val).lower()
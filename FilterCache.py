@@ -0,0 +1,68 @@
+import sys
+from collections import OrderedDict
+
+CACHE_BUDGET = 4 * 1024 * 1024  # Bytes of filter results kept
+
+
+class FilterCache(object):
+    """
+    A least recently used cache of filter results. Results are stored as selection bitmaps, so their size depends
+    only on the number of entries filtered.
+
+    Keys must identify everything the result depends on: the entries being filtered (including the Diary generation
+    and date) and the normalised chain of conditions.
+
+    :param budget:      The maximum number of bytes of results to keep.
+    """
+
+    def __init__(self, budget=CACHE_BUDGET):
+        """Initialise instance variables."""
+        self.budget = budget
+        self.results = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Look up a result, marking it as recently used.
+
+        :param key:     A hashable key.
+        :return:        The cached bitmap or None.
+        """
+        bitmap = self.results.get(key)
+        if bitmap is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.results.move_to_end(key)
+        return bitmap
+
+    def put(self, key, bitmap):
+        """
+        Store a result, evicting the least recently used results until it fits within the budget.
+
+        :param key:     A hashable key.
+        :param bitmap:  The int selection bitmap.
+        :return:        None.
+        """
+        size = sys.getsizeof(bitmap)
+        if size > self.budget:
+            return
+        if key in self.results:
+            self.size -= sys.getsizeof(self.results.pop(key))
+        while self.size + size > self.budget:
+            _, evicted = self.results.popitem(last=False)
+            self.size -= sys.getsizeof(evicted)
+        self.results[key] = bitmap
+        self.size += size
+
+    @property
+    def hit_rate(self):
+        """Returns the fraction of lookups which found a result."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self):
+        return '{} hits, {} misses ({:.0%} hit rate), {} results using {} of {} bytes'.format(
+            self.hits, self.misses, self.hit_rate, len(self.results), self.size, self.budget)
@@ -0,0 +1,190 @@
+"""
+Content fingerprints of diary entries, used to find the entries which differ between two diary files without reading
+the entries which do not.
+
+Entries are grouped into buckets by the first digits of their key. Each bucket has a digest of the keys and content
+hashes of its entries, so buckets with equal digests are known to hold the same entries. A summary file written
+alongside the data file stores the digest of every bucket in a table, followed by the content hashes and record numbers
+of each bucket's entries, which are only read for buckets whose digests differ.
+"""
+import os
+import struct
+import pickle
+import hashlib
+
+from DiaryEntry import UID, KEY
+
+HASH_EXTENSION = '.hashes'
+BUCKET_DIGITS = 2  # Number of leading key digits which select a bucket
+BUCKET_COUNT = 16 ** BUCKET_DIGITS
+HASH_SIZE = 16  # Bytes in a content hash or bucket digest
+EMPTY_DIGEST = bytes(HASH_SIZE)
+
+MAGIC = b'CMDH'
+HEADER = struct.Struct('<4sqqI')  # Magic, size and modification time of the data file, number of buckets
+BUCKET = struct.Struct('<{}sII'.format(HASH_SIZE))  # Digest, offset and length of the bucket's entries
+
+
+def canonical(value):
+    """Convert a value to an equal one whose repr does not depend on the order items were added to sets and dicts."""
+    if isinstance(value, dict):
+        return tuple(sorted(((canonical(key), canonical(item)) for key, item in value.items()), key=repr))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((canonical(item) for item in value), key=repr))
+    return value
+
+
+def content_hash(entry):
+    """
+    Hash the data of an entry apart from its key, which identifies it, and its uid, which is only its display number.
+
+    :param entry:   A DiaryEntry.
+    :return:        A bytes hash.
+    """
+    data = entry.data
+    del data[UID], data[KEY]
+    return hashlib.blake2b(repr(canonical(data)).encode('utf-8'), digest_size=HASH_SIZE).digest()
+
+
+def bucket_of(key):
+    """Returns the number of the bucket which an entry key falls into."""
+    return int(key[:BUCKET_DIGITS], 16)
+
+
+def bucket_digest(hashes):
+    """
+    Digest the entries of a bucket.
+
+    :param hashes:  A dict mapping the keys of the entries to their content hashes.
+    :return:        A bytes digest, which is EMPTY_DIGEST for an empty bucket.
+    """
+    if not hashes:
+        return EMPTY_DIGEST
+    digest = hashlib.blake2b(digest_size=HASH_SIZE)
+    for key in sorted(hashes):
+        digest.update(bytes.fromhex(key) + hashes[key])
+    return digest.digest()
+
+
+def file_stamp(path):
+    """Returns the size and modification time of a file, which change whenever it is written."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class HashSummary(object):
+    """
+    The content hashes and bucket digests of the stored entries, kept up to date as a Diary index.
+    Hashes are calculated when they are first needed and only recalculated for entries which have changed since.
+
+    :param entries: An iterable of the stored DiaryEntry objects.
+    """
+
+    def __init__(self, entries=()):
+        """Initialise instance variables."""
+        self.buckets = [{} for _ in range(BUCKET_COUNT)]  # Entries by key in each bucket
+        self.hashes = {}  # Content hashes by key, for entries which have not changed since they were hashed
+        self.digests = [None] * BUCKET_COUNT  # None for buckets which have changed since they were digested
+        for entry in entries:
+            self.insert(entry)
+
+    def insert(self, entry):
+        """Add an entry to its bucket."""
+        number = bucket_of(entry.key)
+        self.buckets[number][entry.key] = entry
+        self.digests[number] = None
+
+    def discard(self, entry):
+        """Remove an entry from its bucket."""
+        number = bucket_of(entry.key)
+        self.buckets[number].pop(entry.key, None)
+        self.hashes.pop(entry.key, None)
+        self.digests[number] = None
+
+    def bucket(self, number):
+        """
+        Find the content hashes of the entries in a bucket.
+
+        :param number:  The int number of the bucket.
+        :return:        A dict mapping keys to content hashes.
+        """
+        hashes = {}
+        for key, entry in self.buckets[number].items():
+            entry_hash = self.hashes.get(key)
+            if entry_hash is None:
+                entry_hash = self.hashes[key] = content_hash(entry)
+            hashes[key] = entry_hash
+        return hashes
+
+    def digest(self, number):
+        """Returns the bytes digest of a bucket."""
+        if self.digests[number] is None:
+            self.digests[number] = bucket_digest(self.bucket(number))
+        return self.digests[number]
+
+    def write(self, path, data_file, numbers):
+        """
+        Write the summary file of a data file.
+
+        :param path:        The path of the summary file.
+        :param data_file:   The path of the data file, which must already have been written.
+        :param numbers:     A dict mapping the keys of the entries to their record numbers in the data file.
+        :return:            None.
+        """
+        table = []
+        sections = []
+        offset = HEADER.size + BUCKET.size * BUCKET_COUNT
+        for number in range(BUCKET_COUNT):
+            section = pickle.dumps({key: (entry_hash, numbers[key]) for key, entry_hash in self.bucket(number).items()},
+                                   pickle.HIGHEST_PROTOCOL) if self.buckets[number] else b''
+            table.append(BUCKET.pack(self.digest(number), offset, len(section)))
+            sections.append(section)
+            offset += len(section)
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, *file_stamp(data_file), BUCKET_COUNT))
+            file.write(b''.join(table))
+            file.write(b''.join(sections))
+
+
+class SummaryFile(object):
+    """
+    A summary file written by `HashSummary.write`. Only the table of digests is read when it is opened; the entries
+    of a bucket are read when they are requested.
+
+    :param path:    The path of the summary file.
+    """
+
+    def __init__(self, path):
+        """Initialise instance variables."""
+        self.path = path
+        self.numbers = {}  # Record numbers by key, for the entries of the buckets read so far
+        with open(path, 'rb') as file:
+            magic, size, mtime, count = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or count != BUCKET_COUNT:
+                raise ValueError('Not a diary summary file')
+            self.stamp = size, mtime
+            self.table = list(BUCKET.iter_unpack(file.read(BUCKET.size * count)))
+
+    def is_current(self, data_file):
+        """Returns True if the data file has not been written since the summary was."""
+        return os.path.isfile(data_file) and file_stamp(data_file) == self.stamp
+
+    def digest(self, number):
+        """Returns the bytes digest of a bucket."""
+        return self.table[number][0]
+
+    def bucket(self, number):
+        """
+        Read the content hashes of the entries in a bucket, remembering their record numbers.
+
+        :param number:  The int number of the bucket.
+        :return:        A dict mapping keys to content hashes.
+        """
+        _, offset, length = self.table[number]
+        if not length:
+            return {}
+        with open(self.path, 'rb') as file:
+            file.seek(offset)
+            entries = pickle.loads(file.read(length))
+        self.numbers.update((key, record) for key, (_, record) in entries.items())
+        return {key: entry_hash for key, (entry_hash, _) in entries.items()}
@@ -0,0 +1,131 @@
+import pickle
+import os.path
+from collections import deque
+
+from DiaryEntry import KEY
+
+MAX_STEPS = 100  # Maximum number of undoable steps kept
+MAX_OPERATIONS = 10000  # Maximum number of operations kept across all steps
+REQUIRES_ENTRY = ('remove', 'edit', 'extend', 'replace', 'archive')  # Operations on entries which must be stored
+
+
+def operation_keys(operation):
+    """Returns a list of the keys of the entries which an operation acts on."""
+    name, *args = operation
+    if name == 'add':
+        return [args[0][KEY]]
+    if name == 'extend':
+        return list(args[1])
+    if name in ('archive', 'restore'):
+        return list(args[0])
+    return [args[0]]
+
+
+def is_applicable(step, keys):
+    """
+    Check whether a step can be applied, tracking which entries are stored as its operations are applied.
+
+    :param step:        A list of operation tuples, applied in reverse order.
+    :param keys:        A set of the keys of the stored entries, which is updated to those after the step.
+    :return:            False if an operation acts on an entry which is not stored at that point.
+    """
+    for operation in reversed(step):
+        step_keys = operation_keys(operation)
+        if operation[0] in REQUIRES_ENTRY and not keys.issuperset(step_keys):
+            return False
+        if operation[0] in ('add', 'restore'):
+            keys.update(step_keys)
+        elif operation[0] in ('remove', 'archive'):
+            keys.difference_update(step_keys)
+    return True
+
+
+class History(object):
+    """
+    A bounded log of inverse operations which allows changes to a Diary to be undone and redone.
+
+    Each step is a list of operation tuples which, when applied in reverse order, revert one user action. Operations
+    are recorded into a pending step which becomes undoable once it is committed.
+
+    :param history_file:    An optional path of a file to persist the log to so it survives a restart.
+    :param max_steps:       The maximum number of steps to keep for each of undo and redo.
+    :param max_operations:  The maximum number of operations to keep across all undo steps.
+    """
+
+    def __init__(self, history_file=None, max_steps=MAX_STEPS, max_operations=MAX_OPERATIONS):
+        """Initialise instance variables and load any persisted log."""
+        self.history_file = history_file
+        self.max_operations = max_operations
+        self.undo_steps = deque(maxlen=max_steps)
+        self.redo_steps = deque(maxlen=max_steps)
+        self.pending = []
+        self.load()
+
+    def record(self, operation):
+        """
+        Add an inverse operation to the pending step.
+
+        :param operation:   A tuple whose first item is the name of the operation.
+        :return:            None.
+        """
+        self.pending.append(operation)
+
+    def commit(self):
+        """
+        Make the pending step undoable. A new step invalidates anything that could be redone.
+
+        :return:            None.
+        """
+        if not self.pending:
+            return
+        self.undo_steps.append(self.pending)
+        self.redo_steps.clear()
+        self.pending = []
+        self.trim()
+        self.save()
+
+    def prune(self, keys):
+        """
+        Drop the steps which could no longer be applied, e.g. because the entries they change were archived
+        automatically, along with the steps before them, which depend on their changes.
+
+        :param keys:        An iterable of the keys of the stored entries.
+        :return:            None.
+        """
+        keys = set(keys)
+        pruned = False
+        for steps in (self.undo_steps, self.redo_steps):
+            stored = set(keys)
+            for index in range(len(steps) - 1, -1, -1):  # The newest step is applied first
+                if not is_applicable(steps[index], stored):
+                    for _ in range(index + 1):
+                        steps.popleft()
+                    pruned = True
+                    break
+        if pruned:
+            self.save()
+
+    def trim(self):
+        """Drop the oldest undo steps until the total number of operations is within the limit."""
+        total = sum(len(step) for step in self.undo_steps)
+        while total > self.max_operations and len(self.undo_steps) > 1:
+            total -= len(self.undo_steps.popleft())
+
+    def load(self):
+        """Read a persisted log if one exists."""
+        if self.history_file is None or not os.path.isfile(self.history_file):
+            return
+        try:
+            with open(self.history_file, 'rb') as source:
+                undo_steps, redo_steps = pickle.load(source)
+        except (EOFError, pickle.UnpicklingError, ValueError):  # A damaged log only loses the history
+            return
+        self.undo_steps.extend(undo_steps)
+        self.redo_steps.extend(redo_steps)
+
+    def save(self):
+        """Persist the log if a history file was given."""
+        if self.history_file is None:
+            return
+        with open(self.history_file, 'wb') as file:
+            pickle.dump((list(self.undo_steps), list(self.redo_steps)), file, pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+PARALLEL_THRESHOLD = 200000  # Number of candidates below which filtering stays in the current process
+CHUNK_SIZE = 50000  # Number of values sent to a worker in one task
+# Workers are forked so that they share the loaded modules. Spawned workers would import cmdiary again, which loads
+# and saves the diary at import time, so work stays in one process where workers cannot safely be forked.
+START_METHOD = 'fork'
+UNSAFE_PLATFORMS = ('darwin',)  # Platforms whose system libraries may crash in forked processes
+
+_executor = None
+_executor_workers = 0
+
+
+def get_executor(workers):
+    """
+    Return a process pool with the given number of forked workers, reusing the previous one if possible. Workers are
+    started as tasks are submitted, so no pool is returned while other threads are running, e.g. the thread reading
+    input, as a forked process only gets a copy of the current thread and any locks held by the others stay locked.
+
+    :param workers:     An int specifying the number of worker processes.
+    :return:            A ProcessPoolExecutor, or None if the work should be done in the current process.
+    """
+    global _executor, _executor_workers
+    if not can_fork() or threading.active_count() > 1:
+        return None
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD))
+        _executor_workers = workers
+    return _executor
+
+
+def can_fork():
+    """Returns True if worker processes can safely be forked on this platform."""
+    return START_METHOD in multiprocessing.get_all_start_methods() and sys.platform not in UNSAFE_PLATFORMS
+
+
+def default_workers():
+    """Returns the number of processes to filter with by default, which is 1 where workers cannot be forked."""
+    return (os.cpu_count() or 1) if can_fork() else 1
+
+
+def encode_column(objects, attr, positions):
+    """
+    Extract the values of one attribute into a compact list of str, int and None values which are cheap to send to
+    another process. Dates are sent as their ordinal.
+
+    :param objects:     The list of objects being filtered.
+    :param attr:        The name of the attribute to extract.
+    :param positions:   The positions of the objects to extract values from.
+    :return:            A tuple of the list of values and whether the values are dates.
+    """
+    values = [getattr(objects[position], attr) for position in positions]
+    is_date = any(type(value) == date for value in values)
+    if is_date:
+        values = [value.toordinal() if value is not None else None for value in values]
+    return values, is_date
+
+
+def match_chunk(values, is_date, compare, filter_val, negate, match_none):
+    """
+    Test a chunk of values against a condition. Runs in a worker process.
+
+    :param values:      A list of values from `encode_column`.
+    :param is_date:     Whether the values are date ordinals.
+    :param compare:     The module level function comparing an object's value to `filter_val`.
+    :param filter_val:  The prepared value of the condition.
+    :param negate:      Whether the condition is negated.
+    :param match_none:  Whether blank values can match.
+    :return:            A tuple of a list of the indices of matching values and whether a comparison failed.
+    """
+    matched = []
+    try:
+        for index, value in enumerate(values):
+            if value is None:
+                if not match_none:
+                    continue
+            elif is_date:
+                value = date.fromordinal(value)
+            if compare(value, filter_val) != negate:
+                matched.append(index)
+    except (ValueError, TypeError):
+        return matched, True
+    return matched, False
+
+
+def parallel_match(objects, positions, condition, workers):
+    """
+    Test the objects at the given positions against a condition, split into chunks across a process pool. Only the
+    values of the condition's attribute are sent to the workers.
+
+    :param objects:     The list of objects being filtered.
+    :param positions:   A list of the positions of the objects to test.
+    :param condition:   A Condition object.
+    :param workers:     An int specifying the number of worker processes.
+    :return:            A tuple of the matching positions in order and whether a comparison failed.
+    """
+    values, is_date = encode_column(objects, condition.attr, positions)
+    chunks = [values[start:start + CHUNK_SIZE] for start in range(0, len(values), CHUNK_SIZE)]
+    executor = get_executor(workers)
+    mapper = executor.map if executor is not None else map  # Chunks are tested here while forking is unsafe
+    results = mapper(match_chunk, chunks,
+                     *[[argument] * len(chunks) for argument in (is_date, condition.compare, condition.filter_val,
+                                                                 condition.negate, condition.match_none)])
+
+    matched = []
+    for offset, (indices, failed) in zip(range(0, len(values), CHUNK_SIZE), results):
+        if failed:
+            return [], True
+        matched.extend(positions[offset + index] for index in indices)
+    return matched, False
@@ -1,18 +1,35 @@
+from collections import namedtuple
+
+# The outcome of parsing a value: either `value` is set and `error` is None, or `error` holds the error message.
+ParseResult = namedtuple('ParseResult', ['value', 'error'])
+
+
 class ParameterInfo(object):
     """
     A class containing all required data for analysing and modifying parameters/arguments specified with commands.
 
     :param name:        The str name of the parameter.
-    :param data_type:   The data type required for the parameter.
-    :param condition:   A function that returns True/False depending if a value passes certain criteria.
-    :param modifier:    A function that returns a modified value after passing `condition`.
+    :param parser:      A function that converts, validates and modifies a raw str in one step, raising ValueError if
+                        the value is invalid. The raw str is used unchanged if None.
     :param err_msg:     A str specifying an error message should anything fail.
     """
 
-    def __init__(self, name, data_type=str, condition=None, modifier=None, err_msg=None):
+    def __init__(self, name, parser=None, err_msg=None):
         """Initialise instance variables."""
         self.name = name
-        self.data_type = data_type
-        self.condition = condition
-        self.modifier = modifier
-        self.err_msg = err_msg
+        self.parser = parser
+        self.err_msg = err_msg if err_msg is not None else 'Invalid Argument'
+
+    def parse(self, raw):
+        """
+        Parse a raw value.
+
+        :param raw:     The str entered by the user.
+        :return:        A ParseResult with either the final value or an error message.
+        """
+        if self.parser is None:
+            return ParseResult(raw, None)
+        try:
+            return ParseResult(self.parser(raw), None)
+        except ValueError:
+            return ParseResult(None, self.err_msg)
@@ -0,0 +1,75 @@
+import datetime
+
+INTERVAL = 'interval'
+UNTIL = 'until'
+EXCEPTIONS = 'exceptions'
+OVERRIDES = 'overrides'
+
+
+class Recurrence(object):
+    """
+    A rule describing how a diary entry repeats. Only the rule is stored; occurrences are generated on request for
+    the dates that are actually needed.
+
+    :param interval:    An int specifying the number of days between occurrences.
+    :param until:       A datetime.date of the last possible occurrence or None to repeat indefinitely.
+    :param exceptions:  A set of datetime.date objects of occurrences which have been removed.
+    :param overrides:   A dict mapping the original date of an occurrence to a dict of changed attributes.
+    """
+
+    def __init__(self, interval, until=None, exceptions=None, overrides=None):
+        """Initialise instance variables."""
+        if interval < 1:
+            raise ValueError('Recurrence interval must be at least 1 day.')
+        self.interval = interval
+        self.until = until
+        self.exceptions = set() if exceptions is None else set(exceptions)
+        self.overrides = {} if overrides is None else dict(overrides)
+
+    def dates(self, start, first, last):
+        """
+        Lazily generate the dates of occurrences that fall within a window.
+
+        :param start:   A datetime.date of the first occurrence of the series.
+        :param first:   A datetime.date specifying the start of the window (inclusive).
+        :param last:    A datetime.date specifying the end of the window (inclusive).
+        :return:        A generator of datetime.date objects.
+        """
+        if self.until is not None:
+            last = min(last, self.until)
+        skipped = max(0, -(-(first - start).days // self.interval))  # Ceiling division skips straight to the window
+        current = start + datetime.timedelta(days=skipped * self.interval)
+        step = datetime.timedelta(days=self.interval)
+        while current <= last:
+            if current not in self.exceptions:
+                yield current
+            current += step
+
+    def skip(self, date):
+        """
+        Remove a single occurrence from the series.
+
+        :param date:    The original datetime.date of the occurrence.
+        :return:        None.
+        """
+        self.exceptions.add(date)
+        self.overrides.pop(date, None)
+
+    def override(self, date, attr, value):
+        """
+        Change the value of an attribute for a single occurrence.
+
+        :param date:    The original datetime.date of the occurrence.
+        :param attr:    The str name of the attribute to change.
+        :param value:   The new value.
+        :return:        None.
+        """
+        self.overrides.setdefault(date, {})[attr] = value
+
+    @property
+    def data(self):
+        """Returns a dict of the data required to re-create an identical Recurrence object."""
+        return {INTERVAL: self.interval,
+                UNTIL: self.until,
+                EXCEPTIONS: set(self.exceptions),
+                OVERRIDES: {date: dict(changes) for date, changes in self.overrides.items()}}
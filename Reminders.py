@@ -0,0 +1,130 @@
+import heapq
+import datetime
+from collections import namedtuple
+
+from DiaryEntry import Occurrence
+
+REMINDER_DAYS = (1, 0)  # Days before the due date that an entry is reminded of
+REMINDER_TIME = datetime.time(8)  # Time of day reminders are given
+COMPACT_RATIO = 2  # Rebuild the heap once it holds this many times more items than scheduled reminders
+
+Reminder = namedtuple('Reminder', ['time', 'entry', 'days_before'])
+Reminder.__doc__ = """
+A reminder that an entry is due soon.
+
+:param time:        The datetime.datetime at which the reminder was due.
+:param entry:       The DiaryEntry, or Occurrence of a recurring entry, which is due.
+:param days_before: The number of days before the due date that the reminder was given.
+"""
+
+
+def reminder_time(due_date, days_before):
+    """Returns the datetime.datetime of the reminder given a number of days before a due date."""
+    return datetime.datetime.combine(due_date - datetime.timedelta(days=days_before), REMINDER_TIME)
+
+
+class ReminderIndex(object):
+    """
+    A min-heap of the times of upcoming reminders, kept up to date as a Diary index.
+
+    Changing an entry only pushes its new reminders; the old ones are left in the heap and skipped when they reach the
+    top, as they belong to an older version of the entry. Only the next occurrence of a recurring entry is scheduled at
+    a time, and the one after it is scheduled once its reminders have been given.
+
+    :param entries: An iterable of the stored DiaryEntry objects.
+    :param now:     The datetime.datetime before which reminders are not scheduled. Defaults to now.
+    """
+
+    def __init__(self, entries=(), now=None):
+        """Initialise instance variables."""
+        self.heap = []  # Items of (time, version, key, occurrence date, days before)
+        self.entries = {}  # Scheduled entries by key
+        self.versions = {}  # Current version of each scheduled entry by key
+        self.pending = {}  # Number of reminders of the current version of each entry left in the heap
+        self.counter = 0  # Last version given out, so every version is unique
+        for entry in entries:
+            self.schedule(entry, now=now, push=self.heap.append)
+        heapq.heapify(self.heap)
+
+    def insert(self, entry):
+        """Schedule the reminders of an entry."""
+        self.schedule(entry)
+
+    def discard(self, entry):
+        """Cancel the reminders of an entry."""
+        if self.versions.pop(entry.key, None) is not None:
+            del self.entries[entry.key]
+            del self.pending[entry.key]
+        if len(self.heap) > COMPACT_RATIO * len(REMINDER_DAYS) * max(len(self.versions), 1):
+            self.compact()
+
+    def schedule(self, entry, after=None, now=None, push=None):
+        """
+        Push the reminders of the next due date of an entry which are still to come.
+
+        :param entry:   The stored DiaryEntry.
+        :param after:   For recurring entries, the datetime.date of the occurrence after which to look for the next
+                        one, or None to start from today.
+        :param now:     The datetime.datetime before which reminders are not scheduled. Defaults to now.
+        :param push:    A function adding an item to the heap. Defaults to pushing while keeping the heap invariant.
+        :return:        None.
+        """
+        push = push or (lambda item: heapq.heappush(self.heap, item))
+        now = now or datetime.datetime.now()
+        self.counter += 1
+        self.versions[entry.key] = self.counter
+        self.entries[entry.key] = entry
+        self.pending[entry.key] = 0
+        if entry.recurrence is None:
+            dates = [(None, entry.due_date)] if entry.due_date is not None else []
+        else:
+            first = after + datetime.timedelta(days=1) if after is not None else now.date()
+            dates = ((date, Occurrence(entry, date).due_date)
+                     for date in entry.recurrence.dates(entry.due_date, first, datetime.date.max))
+        for date, due_date in dates:
+            if due_date is None:
+                continue
+            for days_before in REMINDER_DAYS:
+                time = reminder_time(due_date, days_before)
+                if time > now:
+                    push((time, self.counter, entry.key, date, days_before))
+                    self.pending[entry.key] += 1
+            if self.pending[entry.key] or date is None:
+                break  # Only the next occurrence with reminders still to come is scheduled
+
+    def is_current(self, item):
+        """Returns True if a heap item belongs to the current version of its entry."""
+        return self.versions.get(item[2]) == item[1]
+
+    def next_time(self):
+        """
+        Find the time of the next reminder, dropping outdated items from the top of the heap.
+
+        :return:        A datetime.datetime, or None if there are no reminders to come.
+        """
+        while self.heap and not self.is_current(self.heap[0]):
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now=None):
+        """
+        Take the reminders which are due.
+
+        :param now:     The current datetime.datetime. Defaults to now.
+        :return:        A list of Reminder objects in order of time.
+        """
+        now = now or datetime.datetime.now()
+        reminders = []
+        while self.next_time() is not None and self.heap[0][0] <= now:
+            time, _, key, date, days_before = heapq.heappop(self.heap)
+            entry = self.entries[key]
+            reminders.append(Reminder(time, Occurrence(entry, date) if date is not None else entry, days_before))
+            self.pending[key] -= 1
+            if not self.pending[key] and date is not None:
+                self.schedule(entry, after=date, now=now)
+        return reminders
+
+    def compact(self):
+        """Rebuild the heap without the items of old versions."""
+        self.heap = [item for item in self.heap if self.is_current(item)]
+        heapq.heapify(self.heap)
@@ -0,0 +1,84 @@
+import datetime
+
+from DiaryEntry import UID, DAYS_LEFT
+from Filter import Filter, FilterException, Parser
+
+UID_MSG = 'Filters using UIDs cannot be saved as UIDs change when the diary is displayed'
+
+
+class SavedFilter(object):
+    """
+    A named filter expression whose result is kept up to date as entries change, so it can be opened without scanning
+    the diary. Only stored, non-recurring entries are kept in the result; occurrences of recurring entries are tested
+    when the filter is opened.
+
+    Results of expressions which depend on the number of days left are only valid on the day they were calculated and
+    must be rebuilt with `rollover` after that.
+
+    :param name:        The str name of the filter.
+    :param condition:   The filter expression str.
+    :param keys:        An optional set of keys of matching entries from a previous session.
+    :param evaluated:   The datetime.date on which `keys` was calculated.
+    """
+
+    def __init__(self, name, condition, keys=None, evaluated=None):
+        """Initialise instance variables."""
+        self.name = name
+        self.condition = condition
+        self.expression = Parser(Filter.condition_format, condition).parse()
+        if UID in self.expression.attributes():
+            raise FilterException(UID_MSG)
+        self.daily = DAYS_LEFT in self.expression.attributes()
+        self.keys = set() if keys is None else set(keys)
+        self.evaluated = evaluated
+
+    def matches(self, entry):
+        """
+        Test a single entry against the filter. Entries which cannot be compared do not match.
+
+        :param entry:   A DiaryEntry or Occurrence object.
+        :return:        True if the entry matches.
+        """
+        try:
+            return self.expression.matches(entry)
+        except FilterException:
+            return False
+
+    def insert(self, entry):
+        """Add a stored entry to the result if it matches."""
+        if entry.recurrence is None and self.matches(entry):
+            self.keys.add(entry.key)
+
+    def discard(self, entry):
+        """Remove a stored entry from the result."""
+        self.keys.discard(entry.key)
+
+    def prune(self, keys):
+        """
+        Drop the keys of entries which are no longer stored, e.g. because the data file was replaced by a sync.
+
+        :param keys:        An iterable of the keys of the stored entries.
+        :return:            None.
+        """
+        self.keys.intersection_update(keys)
+
+    def rebuild(self, entries):
+        """
+        Calculate the result from scratch.
+
+        :param entries:     An iterable of all stored DiaryEntry objects.
+        :return:            None.
+        """
+        self.keys = set()
+        for entry in entries:
+            self.insert(entry)
+        self.evaluated = datetime.date.today()
+
+    def is_stale(self):
+        """Returns True if the result depends on the date and was calculated on another day."""
+        return self.daily and self.evaluated != datetime.date.today()
+
+    @property
+    def data(self):
+        """Returns a tuple of the data required to re-create an identical SavedFilter object."""
+        return self.name, self.condition, set(self.keys), self.evaluated
@@ -0,0 +1,93 @@
+"""
+Recordings of the lines entered in CMDiary, which can be replayed to reproduce its workload:
+
+    python cmdiary.py --record session.jsonl
+    python benchmarks/replay.py session.jsonl [--file data.pickle] [--scale N]
+
+Each line is stored as JSON with the seconds since recording started, where it was entered and its prompt. Recordings
+are appended to, so one file can hold several sessions.
+"""
+import json
+import time
+from collections import namedtuple
+
+SESSION_FILE = 'session.jsonl'
+COMMAND = 'command'  # A line entered at the main prompt
+FILTER = 'filter'  # A line entered in filter mode
+ANSWER = 'answer'  # A value entered at any other prompt, e.g. for data missing from a command
+
+Record = namedtuple('Record', ['time', 'kind', 'prompt', 'line'])
+Record.__doc__ = """
+A line entered by the user.
+
+:param time:    The float number of seconds since recording started.
+:param kind:    COMMAND, FILTER or ANSWER.
+:param prompt:  The str prompt the line was entered at.
+:param line:    The str entered.
+"""
+
+Step = namedtuple('Step', ['command', 'inputs'])
+Step.__doc__ = """
+A line entered at the main prompt and everything entered while it ran.
+
+:param command: The Record of the command line.
+:param inputs:  A list of the Records of the lines entered in filter mode or at prompts before the next command line.
+"""
+
+
+class SessionRecorder(object):
+    """
+    Appends the lines entered by the user to a session file as they are entered, so nothing is lost if CMDiary is
+    closed without quitting.
+
+    :param path:    The path of the session file.
+    """
+
+    def __init__(self, path=SESSION_FILE):
+        """Initialise instance variables and open the session file."""
+        self.path = path
+        self.start = time.perf_counter()
+        self.file = open(path, 'a', buffering=1)  # Line buffered, so every record is written immediately
+
+    def record(self, kind, prompt, line):
+        """
+        Write a line entered by the user.
+
+        :param kind:    COMMAND, FILTER or ANSWER.
+        :param prompt:  The str prompt the line was entered at.
+        :param line:    The str entered.
+        :return:        None.
+        """
+        self.file.write(json.dumps(Record(round(time.perf_counter() - self.start, 3), kind, prompt, line)._asdict(),
+                                   separators=(',', ':')) + '\n')
+
+    def close(self):
+        """Close the session file."""
+        self.file.close()
+
+
+def read_session(path):
+    """
+    Read a session file.
+
+    :param path:    The path of the session file.
+    :return:        A list of Record objects in the order they were entered.
+    """
+    with open(path) as file:
+        return [Record(**json.loads(line)) for line in file if line.strip()]
+
+
+def split_steps(records):
+    """
+    Group records into the steps replayed one at a time. Records before the first command line are dropped.
+
+    :param records: An iterable of Record objects.
+    :return:        A list of Step objects.
+    """
+    steps = []
+    for record in records:
+        if record.kind == COMMAND:
+            steps.append(Step(record, []))
+        elif steps:
+            steps[-1].inputs.append(record)
+    return steps
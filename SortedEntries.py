@@ -0,0 +1,74 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+
+def sort_key(entry):
+    """
+    Provides the data of an entry in order as to prioritise sorting of data fields.
+    Entries are sorted by due date then item type then subject then description, with undated entries last.
+
+    :param entry:           A DiaryEntry to be processed.
+    :return:                A tuple containing the data of the entry in a sortable order.
+    """
+    return (entry.due_date is None,
+            entry.due_date or date.min,
+            entry.item_type or '',
+            entry.subject or '',
+            entry.description or '')
+
+
+class SortedEntries(object):
+    """
+    A list of DiaryEntry objects which is always kept in display order.
+
+    The sort key of each entry is stored alongside it so that entries can be inserted and removed with a binary
+    search. An entry must be removed before any of its sorting attributes change and added again afterwards.
+
+    :param entries:         An optional iterable of DiaryEntry objects to start with.
+    """
+
+    def __init__(self, entries=()):
+        """Initialise instance variables."""
+        self._entries = sorted(entries, key=sort_key)
+        self._keys = [sort_key(entry) for entry in self._entries]
+
+    def add(self, entry):
+        """
+        Insert an entry at its sorted position.
+
+        :param entry:   The DiaryEntry to insert.
+        :return:        None.
+        """
+        key = sort_key(entry)
+        index = bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self._entries.insert(index, entry)
+
+    def remove(self, entry):
+        """
+        Remove an entry, searching only the entries which share its sort key.
+
+        :param entry:   The DiaryEntry to remove.
+        :return:        None.
+        """
+        key = sort_key(entry)
+        index = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, index)
+        for position in range(index, end):
+            if self._entries[position] is entry:
+                del self._keys[position]
+                del self._entries[position]
+                return
+        raise ValueError('Entry is not in the diary or was changed before being removed.')
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        return self._entries[index]
+
+    def __contains__(self, entry):
+        return any(existing is entry for existing in self._entries)
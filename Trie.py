@@ -0,0 +1,100 @@
+END = ''  # Key holding the number of words which end at a node. Cannot clash with a character.
+
+
+class Trie(object):
+    """
+    A prefix tree of words for completion. Each word is counted, so a word added for several entries stays until it
+    has been removed for all of them.
+
+    :param words:   An optional iterable of words to add.
+    """
+
+    def __init__(self, words=()):
+        """Initialise instance variables."""
+        self.root = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """Add one occurrence of a word."""
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[END] = node.get(END, 0) + 1
+
+    def remove(self, word):
+        """Remove one occurrence of a word, pruning branches which no longer lead to a word."""
+        path = []
+        node = self.root
+        for char in word:
+            if char not in node:
+                return
+            path.append((node, char))
+            node = node[char]
+        if END not in node:
+            return
+        node[END] -= 1
+        if node[END]:
+            return
+        del node[END]
+        for parent, char in reversed(path):
+            if parent[char]:
+                break
+            del parent[char]
+
+    def __contains__(self, word):
+        node = self.root
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return False
+        return END in node
+
+    def complete(self, prefix):
+        """
+        Find the words starting with a prefix. Only the branch below the prefix is visited.
+
+        :param prefix:  The str typed so far.
+        :return:        A sorted list of words.
+        """
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        words = []
+        stack = [(prefix, node)]
+        while stack:
+            word, node = stack.pop()
+            for char, child in node.items():
+                if char == END:
+                    words.append(word)
+                else:
+                    stack.append((word + char, child))
+        return sorted(words)
+
+
+class AttributeTrie(Trie):
+    """
+    A Trie of the values of one attribute of the stored entries, kept up to date as a Diary index.
+
+    :param attr:    The str name of the attribute.
+    :param entries: An iterable of the stored DiaryEntry objects.
+    """
+
+    def __init__(self, attr, entries=()):
+        """Initialise instance variables."""
+        self.attr = attr
+        super().__init__(getattr(entry, attr) for entry in entries if getattr(entry, attr))
+
+    def insert(self, entry):
+        """Add the attribute value of an entry."""
+        value = getattr(entry, self.attr)
+        if value:
+            self.add(value)
+
+    def discard(self, entry):
+        """Remove the attribute value of an entry."""
+        value = getattr(entry, self.attr)
+        if value:
+            self.remove(value)
@@ -0,0 +1,179 @@
+"""
+Workload analytics: the number of entries due per day, week, subject and type over the next weeks, along with overdue
+and undated counts and the share of priority entries.
+
+Stored entries are counted in groups of the same due date, subject, type and priority by a Diary index as they
+change, so the statistics are computed in one pass over the groups, whose number is bounded by the dates and subjects
+in use, rather than over every entry.
+"""
+import datetime
+from collections import namedtuple, Counter
+
+from DiaryEntry import Occurrence, HOMEWORK, ASSESSMENT, NOTE
+
+ITEM_TYPES = (HOMEWORK, ASSESSMENT, NOTE)
+DEFAULT_WEEKS = 4  # Number of weeks ahead covered by default
+BAR_WIDTH = 30  # Width of the longest bar in a chart
+BAR_CHARACTER = '#'
+SPARK_CHARACTERS = ' .:-=+*%@'  # Day counts from zero up to the busiest day
+
+Workload = namedtuple('Workload', ['start', 'days', 'weeks', 'subjects', 'types', 'upcoming', 'overdue', 'undated',
+                                   'priority', 'total'])
+Workload.__doc__ = """
+The statistics of a diary over a number of weeks starting from a date.
+
+:param start:       The datetime.date of the first day counted.
+:param days:        A list of the number of entries due on each day.
+:param weeks:       A list of the number of entries due in each week.
+:param subjects:    A dict mapping subjects to the number of entries due over the period.
+:param types:       A dict mapping item types to the number of entries due over the period.
+:param upcoming:    The number of entries due over the period.
+:param overdue:     The number of entries due before the start.
+:param undated:     The number of entries without a due date.
+:param priority:    The number of priority entries due over the period.
+:param total:       The number of entries counted, including overdue and undated ones.
+"""
+
+
+class WorkloadIndex(object):
+    """
+    Counts of the stored entries by due date, subject, type and priority, kept up to date as a Diary index.
+    Recurring entries are kept aside, as their occurrences depend on the period being counted.
+
+    :param entries: An iterable of the stored DiaryEntry objects.
+    """
+
+    def __init__(self, entries=()):
+        """Initialise instance variables."""
+        self.groups = Counter()  # Numbers of entries by (due date, subject, item type, priority)
+        self.recurring = {}  # Recurring entries by key
+        for entry in entries:
+            self.insert(entry)
+
+    def insert(self, entry):
+        """Count an entry."""
+        if entry.recurrence is not None:
+            self.recurring[entry.key] = entry
+        else:
+            self.groups[entry.due_date, entry.subject, entry.item_type, entry.priority] += 1
+
+    def discard(self, entry):
+        """Stop counting an entry."""
+        if entry.recurrence is not None:
+            self.recurring.pop(entry.key, None)
+            return
+        group = (entry.due_date, entry.subject, entry.item_type, entry.priority)
+        self.groups[group] -= 1
+        if not self.groups[group]:
+            del self.groups[group]
+
+    def counted(self, first, last):
+        """
+        Generate the counted entries, with recurring entries replaced by their occurrences within a window of dates.
+
+        :param first:   The datetime.date of the first occurrence to include.
+        :param last:    The datetime.date of the last occurrence to include.
+        :return:        A generator of ((due date, subject, item type, priority), count) tuples.
+        """
+        yield from self.groups.items()
+        for series in self.recurring.values():
+            for date in series.recurrence.dates(series.due_date, first, last):
+                occurrence = Occurrence(series, date)
+                yield (occurrence.due_date, occurrence.subject, occurrence.item_type, occurrence.priority), 1
+
+
+def workload(index, weeks=DEFAULT_WEEKS, today=None, lookbehind=0):
+    """
+    Compute the workload statistics of a diary in one pass over its counted groups of entries.
+
+    :param index:       The WorkloadIndex of the diary.
+    :param weeks:       The number of weeks to count from today.
+    :param today:       The datetime.date of the first day counted. Defaults to today.
+    :param lookbehind:  The number of days before today in which occurrences of recurring entries count as overdue.
+    :return:            A Workload.
+    """
+    today = today or datetime.date.today()
+    length = weeks * 7
+    days = [0] * length
+    subjects = {}
+    types = dict.fromkeys(ITEM_TYPES, 0)
+    overdue = undated = priority = total = 0
+    start = today.toordinal()
+    first = today - datetime.timedelta(days=lookbehind)
+    last = today + datetime.timedelta(days=length - 1)
+    for (due_date, subject, item_type, important), count in index.counted(first, last):
+        total += count
+        if due_date is None:
+            undated += count
+            continue
+        offset = due_date.toordinal() - start
+        if offset < 0:
+            overdue += count
+        elif offset < length:
+            days[offset] += count
+            subjects[subject] = subjects.get(subject, 0) + count
+            types[item_type] += count
+            priority += count if important else 0
+
+    weeks_counts = [sum(days[week:week + 7]) for week in range(0, length, 7)]
+    return Workload(today, days, weeks_counts, subjects, types, sum(days), overdue, undated, priority, total)
+
+
+def bar(count, largest):
+    """Draw a bar of a length proportional to a count, with at least one character for non-zero counts."""
+    if not count:
+        return ''
+    return BAR_CHARACTER * max(1, round(count * BAR_WIDTH / largest))
+
+
+def chart(rows):
+    """
+    Draw a horizontal bar chart.
+
+    :param rows:    A list of (label, count) tuples.
+    :return:        A list of line strs.
+    """
+    if not rows:
+        return ['  (none)']
+    width = max(len(label) for label, _ in rows)
+    largest = max(count for _, count in rows) or 1
+    return ['  {}  {:>5}  {}'.format(label.ljust(width), count, bar(count, largest)).rstrip() for label, count in rows]
+
+
+def sparkline(counts, largest):
+    """Draw one character per count, scaled to the largest count."""
+    largest = largest or 1
+    top = len(SPARK_CHARACTERS) - 1
+    return ''.join(SPARK_CHARACTERS[-(-count * top // largest)] for count in counts)
+
+
+def render(stats):
+    """
+    Render workload statistics as compact text charts.
+
+    :param stats:   A Workload.
+    :return:        A str.
+    """
+    lines = ['Due in the next {} weeks: {}   overdue: {}   undated: {}   priority: {}'.format(
+        len(stats.weeks), stats.upcoming, stats.overdue, stats.undated,
+        '{:.0%}'.format(stats.priority / stats.upcoming) if stats.upcoming else '-')]
+
+    lines.append('')
+    lines.append('Per day, from {}:'.format(stats.start.strftime('%a %d/%m')))
+    busiest = max(stats.days, default=0)
+    for week in range(len(stats.weeks)):
+        days = stats.days[week * 7:week * 7 + 7]
+        lines.append('  |{}|  {}'.format(sparkline(days, busiest), ' '.join('{:>3}'.format(count) for count in days)))
+
+    lines.append('')
+    lines.append('Per week:')
+    lines.extend(chart([((stats.start + datetime.timedelta(weeks=week)).strftime('%d/%m'), count)
+                        for week, count in enumerate(stats.weeks)]))
+    lines.append('')
+    lines.append('Per subject:')
+    lines.extend(chart(sorted(stats.subjects.items(), key=lambda item: (-item[1], item[0]))))
+    lines.append('')
+    lines.append('Per type:')
+    lines.extend(chart(list(stats.types.items())))
+    lines.append('')
+    return '\n'.join(lines)
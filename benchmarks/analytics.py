@@ -0,0 +1,48 @@
+"""
+Benchmark of computing the workload analytics of a large diary.
+
+Usage: python benchmarks/analytics.py [entries] [weeks]
+"""
+import os
+import sys
+import time
+import random
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from DiaryEntry import DiaryEntry, HOMEWORK, ASSESSMENT, NOTE
+import Workload
+
+SUBJECTS = ['maths', 'physics', 'chemistry', 'biology', 'english', 'history', 'geography', 'music']
+
+
+def make_entries(count):
+    """Create `count` random diary entries, a tenth of them undated."""
+    today = datetime.date.today()
+    return [DiaryEntry(uid,
+                       random.choice((HOMEWORK, ASSESSMENT, NOTE)),
+                       random.choice(SUBJECTS),
+                       'entry',
+                       today + datetime.timedelta(days=random.randint(-30, 90)) if uid % 10 else None,
+                       priority=random.randint(0, 1))
+            for uid in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else Workload.DEFAULT_WEEKS
+    index = Workload.WorkloadIndex(make_entries(count))
+    print('{} entries, {} weeks, {} groups'.format(count, weeks, len(index.groups)))
+
+    start = time.perf_counter()
+    stats = Workload.workload(index, weeks)
+    print('workload:  {:8.3f}s  ({} upcoming, {} overdue)'.format(time.perf_counter() - start, stats.upcoming,
+                                                                 stats.overdue))
+    start = time.perf_counter()
+    Workload.render(stats)
+    print('render:    {:8.3f}s'.format(time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
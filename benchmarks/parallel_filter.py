@@ -0,0 +1,58 @@
+"""
+Benchmark of filtering a large diary with an increasing number of worker processes.
+
+Usage: python benchmarks/parallel_filter.py [entries] [condition] [max workers]
+"""
+import os
+import sys
+import time
+import random
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from DiaryEntry import DiaryEntry, HOMEWORK, ASSESSMENT, NOTE
+from Filter import Filter
+import ParallelFilter
+
+SUBJECTS = ['maths', 'physics', 'chemistry', 'biology', 'english', 'history', 'geography', 'music']
+WORDS = ['lab', 'report', 'essay', 'draft', 'exercise', 'chapter', 'revision', 'test', 'questions', 'notes']
+
+
+def make_entries(count):
+    """Create `count` random diary entries."""
+    today = datetime.date.today()
+    return [DiaryEntry(uid,
+                       random.choice((HOMEWORK, ASSESSMENT, NOTE)),
+                       random.choice(SUBJECTS),
+                       ' '.join(random.choice(WORDS) for _ in range(random.randint(2, 6))),
+                       today + datetime.timedelta(days=random.randint(-30, 90)))
+            for uid in range(count)]
+
+
+def run(entries, condition, workers):
+    """Return the seconds taken to refine a new filter with one condition."""
+    f = Filter(entries, workers=workers, parallel_threshold=0 if workers > 1 else len(entries) + 1)
+    start = time.perf_counter()
+    f.refine(condition)
+    return time.perf_counter() - start, len(f.objects)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    condition = sys.argv[2] if len(sys.argv) > 2 else r'description~revision\s+t'
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    entries = make_entries(count)
+    print('{} entries, condition: {}'.format(count, condition))
+
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        if workers > 1:
+            run(entries[:ParallelFilter.CHUNK_SIZE * workers], condition, workers)  # Start the pool before timing
+        seconds, matched = run(entries, condition, workers)
+        baseline = baseline or seconds
+        print('{:>3} worker(s): {:8.3f}s  {:5.2f}x  ({} matched)'.format(workers, seconds, baseline / seconds, matched))
+
+
+if __name__ == '__main__':
+    main()
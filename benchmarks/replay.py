@@ -0,0 +1,193 @@
+"""
+Replay sessions recorded with 'cmdiary.py --record' against a copy of a diary file, without a terminal, and report the
+throughput and the latency of each command.
+
+With --scale N the sessions are replayed N times. Every replay after the first varies the recorded commands: entries
+are added with shuffled descriptions and new due dates, and commands on UIDs act on randomly chosen entries.
+
+Usage: python benchmarks/replay.py SESSION_FILE... [--file DATA_FILE] [--scale N] [--seed SEED]
+"""
+import os
+import sys
+import glob
+import time
+import random
+import shutil
+import builtins
+import datetime
+import tempfile
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from SessionRecorder import Step, read_session, split_steps
+from CommandParser import RE_COMMAND
+
+PERCENTILES = (50, 90, 99)
+DATE_RANGE = 60  # Varied due dates fall within this many days from today
+
+
+class InputExhausted(Exception):
+    """Raised when a replayed command prompts for more input than was recorded with it."""
+    pass
+
+
+def percentile(values, percent):
+    """Returns the value below which `percent` percent of a sorted list of values fall (nearest rank)."""
+    return values[min(len(values) - 1, max(0, -(-len(values) * percent // 100) - 1))]
+
+
+def canonical_name(cmdiary, name):
+    """Returns the full name of a command from any of its names or abbreviations, e.g. 'add' from 'a'."""
+    function = cmdiary.COMMANDS.get(name)
+    return max((key for key, value in cmdiary.COMMANDS.items() if value is function), key=len) if function else name
+
+
+def vary_command(cmdiary, text, rng):
+    """
+    Create a variation of the text of a single command.
+
+    :param cmdiary:     The cmdiary module being replayed.
+    :param text:        The str of one command and its arguments.
+    :param rng:         A random.Random.
+    :return:            The varied str.
+    """
+    tokens = text.split()
+    function = cmdiary.COMMANDS.get(tokens[0]) if tokens else None
+    if function is cmdiary.add:
+        command = cmdiary.parser.parse_command(text)
+        words = command.args[2:]
+        rng.shuffle(words)
+        date = datetime.date.today() + datetime.timedelta(days=rng.randrange(DATE_RANGE))
+        return ' '.join(tokens[:1] + command.args[:2] + words +
+                        (['{} {} {}'.format(date.day, date.month, date.year)] if command.date else []))
+    if function in cmdiary.BULK_COMMANDS and len(tokens) > 1 and tokens[1].isdigit() and cmdiary.diary.taken_uids:
+        return ' '.join([tokens[0], str(rng.choice(sorted(cmdiary.diary.taken_uids)))] + tokens[2:])
+    return text
+
+
+def vary(cmdiary, step, rng):
+    """Returns a Step whose command line is a variation of that of `step`, with the same inputs."""
+    line = '; '.join(vary_command(cmdiary, text, rng) for text in RE_COMMAND.findall(step.command.line))
+    return Step(step.command._replace(line=line), step.inputs)
+
+
+def replay(cmdiary, steps, scale=1, seed=None):
+    """
+    Run the steps of recorded sessions as fast as possible.
+
+    :param cmdiary:     The cmdiary module, imported in the directory of the diary to replay against.
+    :param steps:       A list of Step objects.
+    :param scale:       The int number of times to replay the steps.
+    :param seed:        The seed of the variations, so that runs can be repeated.
+    :return:            A tuple of the total float seconds, an OrderedDict mapping command names to lists of latencies
+                        in seconds, and a dict mapping command names to the number of steps which failed.
+    """
+    rng = random.Random(seed)
+    latencies = OrderedDict()
+    failures = {}
+    inputs = []
+
+    def recorded_input(prompt=''):
+        if not inputs:
+            raise InputExhausted(prompt)
+        return inputs.pop(0)
+
+    builtins.input = recorded_input
+    cmdiary.display()  # Numbers the entries, as CMDiary does before its first prompt
+    total = 0
+    for repeat in range(scale):
+        for step in steps:
+            if repeat:
+                step = vary(cmdiary, step, rng)
+            first = step.command.line.split()[:1]
+            if not first or cmdiary.COMMANDS.get(first[0]) is cmdiary.quit_cmdiary:
+                continue
+            name = canonical_name(cmdiary, first[0])
+            inputs[:] = [record.line for record in step.inputs]
+            start = time.perf_counter()
+            try:
+                cmdiary.run(cmdiary.parser.parse(step.command.line))
+            except (Exception, SystemExit):  # Including InputExhausted if the diary differs from the recorded one
+                failures[name] = failures.get(name, 0) + 1
+                continue
+            finally:
+                seconds = time.perf_counter() - start
+                total += seconds
+            latencies.setdefault(name, []).append(seconds)
+    return total, latencies, failures
+
+
+def report(total, latencies, failures):
+    """Returns a str table of the throughput and the latency distribution of each command in milliseconds."""
+    count = sum(map(len, latencies.values()))
+    lines = ['{} commands in {:.3f}s: {:.1f} commands/s'.format(count, total, count / total if total else 0), '',
+             '{:<12}{:>7}{:>9}'.format('command', 'count', 'mean') +
+             ''.join('{:>9}'.format('p{}'.format(percent)) for percent in PERCENTILES) +
+             '{:>9}{:>8}'.format('max', 'failed')]
+    for name in sorted(latencies.keys() | failures.keys()):
+        values = sorted(latencies.get(name, ()))
+        if values:
+            cells = [sum(values) / len(values)] + [percentile(values, percent) for percent in PERCENTILES] + [values[-1]]
+            timing = ''.join('{:9.2f}'.format(seconds * 1000) for seconds in cells)
+        else:
+            timing = '{:>9}'.format('-') * (len(PERCENTILES) + 2)
+        lines.append('{:<12}{:>7}{}{:>8}'.format(name, len(values), timing, failures.get(name, 0)))
+    return '\n'.join(lines)
+
+
+def main(args):
+    """
+    Replay session files against a copy of a diary.
+
+    :param args:        A list of command line arguments.
+    :return:            An int exit status.
+    """
+    sessions = []
+    data_file = None
+    scale = 1
+    seed = None
+    while args:
+        arg = args.pop(0)
+        if arg == '--file' and args:
+            data_file = args.pop(0)
+        elif arg == '--scale' and args and args[0].isdigit() and int(args[0]) > 0:
+            scale = int(args.pop(0))
+        elif arg == '--seed' and args:
+            seed = args.pop(0)
+        elif not arg.startswith('--'):
+            sessions.append(arg)
+        else:
+            sessions = []
+            break
+    if not sessions:
+        sys.stderr.write('Usage: replay.py SESSION_FILE... [--file DATA_FILE] [--scale N] [--seed SEED]\n')
+        return 2
+    steps = [step for path in sessions for step in split_steps(read_session(path))]
+
+    # The diary and its sidecar files (archive, summaries, saved filters) are copied so that the original is unchanged
+    directory = tempfile.mkdtemp()
+    if data_file is not None:
+        for path in glob.glob(glob.escape(data_file) + '*'):
+            shutil.copy2(path, os.path.join(directory, 'data.pickle' + path[len(data_file):]))
+    cwd = os.getcwd()
+    os.chdir(directory)
+    stdout = sys.stdout
+    try:
+        with open(os.devnull, 'w') as devnull:
+            sys.stdout = devnull
+            import cmdiary
+            total, latencies, failures = replay(cmdiary, steps, scale, seed)
+    finally:
+        sys.stdout = stdout
+        os.chdir(cwd)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print('{} step(s) from {} session file(s), replayed {} time(s) against {}'.format(
+        len(steps), len(sessions), scale, data_file or 'an empty diary'))
+    print(report(total, latencies, failures))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,69 @@
+"""
+Benchmark of loading a large diary file with different numbers of segments and worker processes, and of loading only
+a few entries by record number.
+
+Usage: python benchmarks/segmented_load.py [entries] [max workers]
+"""
+import io
+import os
+import sys
+import time
+import random
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from DiaryEntry import DiaryEntry, HOMEWORK, ASSESSMENT, NOTE
+from SortedEntries import SortedEntries
+import storage
+
+SUBJECTS = ['maths', 'physics', 'chemistry', 'biology', 'english', 'history', 'geography', 'music']
+WORDS = ['lab', 'report', 'essay', 'draft', 'exercise', 'chapter', 'revision', 'test', 'questions', 'notes']
+SEGMENT_COUNTS = (1, 4, 16, 64, 256)
+PARTIAL_COUNT = 100  # Number of entries read by record number, as a sync reads the entries which differ
+
+
+def make_entries(count):
+    """Create `count` random diary entries in display order."""
+    today = datetime.date.today()
+    return SortedEntries(DiaryEntry(uid,
+                                    random.choice((HOMEWORK, ASSESSMENT, NOTE)),
+                                    random.choice(SUBJECTS),
+                                    ' '.join(random.choice(WORDS) for _ in range(random.randint(2, 6))),
+                                    today + datetime.timedelta(days=random.randint(-30, 365)))
+                         for uid in range(count))
+
+
+def run(data, workers, **kwargs):
+    """Return the seconds taken to load a file and the number of entries loaded."""
+    start = time.perf_counter()
+    loaded = storage.load(io.BytesIO(data), workers=workers, **kwargs)
+    return time.perf_counter() - start, len(loaded)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    entries = make_entries(count)
+    storage.PARALLEL_THRESHOLD = 0  # Measure every worker count, however small the file
+    print('{} entries, {} CPUs'.format(count, os.cpu_count()))
+
+    for segments in SEGMENT_COUNTS:
+        file = io.BytesIO()
+        storage.dump(entries, file, segment_size=-(-count // segments))
+        data = file.getvalue()
+        baseline = None
+        for workers in range(1, max_workers + 1):
+            if workers > 1:
+                run(data, workers)  # Start the pool before timing
+            seconds, _ = run(data, workers)
+            baseline = baseline or seconds
+            print('{:>4} segment(s) {:>3} worker(s): {:8.3f}s  {:5.2f}x'.format(segments, workers, seconds,
+                                                                            baseline / seconds))
+        numbers = sorted(random.sample(range(count), min(count, PARTIAL_COUNT)))
+        seconds, loaded = run(data, 1, numbers=numbers)
+        print('{:>4} segment(s), {} entries by number: {:8.3f}s'.format(segments, loaded, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,37 +4,64 @@ VERSION = 'v2.5'
 AUTHOR = 'Aaron Lucas'
 GITHUB_REPO = 'https://github.com/aaron-lucas/CMDiary'
 
-import datetime
+import sys
+
+if __name__ == '__main__' and '--summary' in sys.argv[1:]:  # Answer from the summary file without loading the diary
+    from summary import main
+    sys.exit(main(sys.argv[1:]))
+
+if __name__ == '__main__' and '--events' in sys.argv[1:]:  # Read the change feed without loading the diary
+    from ChangeFeed import main
+    sys.exit(main(sys.argv[1:]))
+
 import re
 import os
-import sys
+import shutil
+import asyncio
+import datetime
+import threading
 from collections import OrderedDict
 from string_analysis import get_best_match
 
 from termcolor import cprint, colored
 from tabulate import tabulate
+from table import render_table
 
 if os.name == 'nt':  # Colorama only required on Windows machines
     from colorama import init, deinit
 
 from DiaryEntry import ASSESSMENT, HOMEWORK, NOTE, UID, ITEM_TYPE, SUBJECT, DESCRIPTION, DUE_DATE, PRIORITY
-from Diary import Diary
+from Recurrence import INTERVAL
+from Diary import Diary, RECURRENCE_LOOKBEHIND
+from CommandParser import CommandParser
 from ParameterInfo import ParameterInfo
-from info import get_info
-from Filter import Filter, FilterException
+from info import get_info, HELP_TOPICS
+from Filter import Filter, FilterException, FILTER_ATTRIBUTES
+from Completer import Completer, CONDITION, VALUE
+from sync import sync, SyncException
+from Workload import workload, render as render_workload, DEFAULT_WEEKS
+from Agenda import week_of, month_of
+from dates import NO_DATE, str_to_date, date_to_str
+from CommandProfiler import CommandProfiler
+from SessionRecorder import SessionRecorder, SESSION_FILE, COMMAND, FILTER, ANSWER
 
 # Define custom parameter names
 ATTRIBUTE = 'attribute'
-VALUE = 'value'  # Changes depending on chosen attribute - used in edit()
 DAYS = 'days'  # days parameter name/reference
 
 COLOUR_MAP = {ASSESSMENT: 'red',
               HOMEWORK: 'blue',
               NOTE: 'green'}
 
-NO_DATE = 'N/A'  # String used as placeholder if no date is specified
 CANCEL_CHARACTER = '\\'
+UID_SEPARATOR = ','  # Separates UIDs in a list, e.g. 1,3,5-9
+UID_RANGE = '-'  # Separates the first and last UID of a range
+ALL_FLAG = '--all'  # Includes archived entries in filter mode
+MAX_WEEKS = 52  # Longest period covered by the analytics command
 PROMPT = 'CMDiary {}'.format(VERSION)
+REMINDER_RECHECK = 3600  # Longest sleep in seconds between checks for reminders, in case the clock changes
+PROFILE_FLAG = '--profile'  # Profiles every command from startup
+RECORD_FLAG = '--record'  # Records the lines entered to a session file, optionally followed by its path
 
 
 def requires_parameters(*params):
@@ -42,7 +69,7 @@ def requires_parameters(*params):
     A decorator that specifies what data must be entered for the function to run correctly.
 
     Creates an empty dict of required data which is passed to the function which must have a signature of
-    func(input_data, required_data), where this dict is passed to the required_data parameter.
+    func(command, required_data), where this dict is passed to the required_data parameter.
 
     :param params: An automatically packed list of data names for which values are required from the user.
                    Must have an entry in the PARAMETERS dict using these names for which the value is a
@@ -51,40 +78,36 @@ def requires_parameters(*params):
     """
 
     def decorator(func):
-        def wrapper(input_data):
+        def wrapper(command):
             required_data = OrderedDict([(key, False) for key in params])  # OrderedDict to keep order of data prompts
-            return func(input_data, required_data)
+            return func(command, required_data)
 
         return wrapper
 
     return decorator
 
 
-def get_input(prompt, response_type=str, condition=None, modifier=None, err_msg='Invalid Argument'):
+def get_input(prompt, param_info=None, kind=ANSWER):
     """
-    Prompt the user for input.
+    Prompt the user for input until a valid value is entered.
 
     :param prompt:          The text displayed to the user.
-    :param response_type:   The data type expected as a response. The str value is converted to this data type.
-    :param condition:       A function which evaluates the input and returns True/False depending on if the input
-                            passes the condition.
-    :param modifier:        A function that changes the input after testing the condition. Returns the modified value.
-    :param err_msg:         An error message or template that can be formatted with the input if the function fails.
-    :return:                A value of any type based on modifier and response_type.
+    :param param_info:      A ParameterInfo object which parses the input. The raw str is returned if None.
+    :param kind:            The kind of input recorded when the session is being recorded, FILTER or ANSWER.
+    :return:                The parsed value, or CANCEL_CHARACTER if the user cancelled.
     """
     while True:
         inp = input(prompt)
-        try:
-            if inp == CANCEL_CHARACTER:
-                return CANCEL_CHARACTER
-            if inp or inp == '':  # Empty string signifies no value
-                inp = response_type(inp)
-        except ValueError:
-            print_error_message(err_msg, inp)
-        else:
-            if condition is None or condition(inp):  # Bypass condition check if condition is None
-                return inp if modifier is None else modifier(inp)  # Bypass value modification if modifier is None
-            print_error_message(err_msg, inp)
+        if recorder is not None:
+            recorder.record(kind, prompt, inp)
+        if inp == CANCEL_CHARACTER:
+            return CANCEL_CHARACTER
+        if param_info is None:
+            return inp
+        result = param_info.parse(inp)
+        if result.error is None:
+            return result.value
+        print_error_message(result.error, inp)
 
 
 def print_error_message(msg_template, inp):
@@ -100,30 +123,21 @@ def print_error_message(msg_template, inp):
 
 
 @requires_parameters(ITEM_TYPE, SUBJECT, DESCRIPTION, DUE_DATE)
-def add(input_data, required_data):
+def add(command, required_data):
     """
     Take and evaluate input to add a diary entry.
 
-    Signature is add(input_data) after decoration.
+    Signature is add(command) after decoration.
 
-    :param input_data:      The raw str data entered after the 'add' command.
+    :param command:         The Command object parsed from the 'add' command.
     :param required_data:   A dict provided by the requires_parameters decorator. Doesn't need to be specified when
                             called due to the decorator.
     :return:                None.
     """
-    try:
-        required_data[ITEM_TYPE] = input_data.split()[0]  # item_type is always first word
-        required_data[SUBJECT] = input_data.split()[1]  # subject is always second word
-    except IndexError:
-        pass  # Ignore error if data not specified as it will be entered later
-
-    unparsed_data = ' '.join(input_data.split()[2:])  # Strip first two words from input_data
-
-    match = re.search(RE_DUE_DATE, unparsed_data)
-
-    required_data[DUE_DATE] = match.group(1) if match is not None else False  # Check for due date with regex
-    # Remaining data is description
-    required_data[DESCRIPTION] = match.string[:match.start()] if match is not None else unparsed_data
+    required_data[ITEM_TYPE] = command.arg(0)  # item_type is always first word
+    required_data[SUBJECT] = command.arg(1)  # subject is always second word
+    required_data[DUE_DATE] = command.date or False
+    required_data[DESCRIPTION] = command.rest(2)  # Remaining data is description
 
     format_existing_data(required_data)
     cancel = complete_data(required_data) == CANCEL_CHARACTER
@@ -133,104 +147,255 @@ def add(input_data, required_data):
 
 
 @requires_parameters(UID)
-def remove(input_data, required_data):
+def remove(command, required_data):
     """
     Take and evaluate input to remove an entry from the diary.
 
-    Signature is remove(input_data) after decoration.
+    Signature is remove(command) after decoration.
 
-    :param input_data:      The raw str data entered after the 'remove' command.
+    :param command:         The Command object parsed from the 'remove' command.
     :param required_data:   A dict provided by the requires_parameters decorator. Doesn't need to be specified when
                             called due to the decorator.
     :return:                None.
     """
-    try:
-        required_data[UID] = input_data.split()[0]  # UID is always first word
-    except IndexError:
-        pass  # Ignore error if data not specified as it will be entered later
+    required_data[UID] = command.arg(0)  # UID is always first word
 
     format_existing_data(required_data)
     cancel = complete_data(required_data) == CANCEL_CHARACTER
     if cancel:
         return
-    diary.remove(required_data[UID])
+    diary.remove(*required_data[UID])
 
 
 @requires_parameters(UID, ATTRIBUTE, VALUE)
-def edit(input_data, required_data):
+def edit(command, required_data):
     """
     Take and evaluate input to edit an entry in the diary.
 
-    Signature is edit(input_data) after decoration.
+    Signature is edit(command) after decoration.
 
-    :param input_data:      The raw str data entered after the 'edit' command.
+    :param command:         The Command object parsed from the 'edit' command.
     :param required_data:   A dict provided by the requires_parameters decorator. Doesn't need to be specified when
                             called due to the decorator.
     :return:                None.
     """
-    try:
-        required_data[UID] = input_data.split()[0]  # UID is always first word
-        required_data[ATTRIBUTE] = input_data.split()[1]  # atribute is always second word
-        required_data[VALUE] = ' '.join(input_data.split()[2:])  # Rest of the string is new value
-    except IndexError:
-        pass  # Ignore error if data not specified as it will be entered later
+    required_data[UID] = command.arg(0)  # UID is always first word
+    required_data[ATTRIBUTE] = command.arg(1)  # atribute is always second word
+    required_data[VALUE] = command.rest(2)  # Rest of the string is new value
 
     format_existing_data(required_data)
     if any([not bool(val) for val in required_data.values()]):  # Check if any data needs to be entered
         cancel = complete_data(required_data) == CANCEL_CHARACTER
         if cancel:
             return
-    diary.edit(required_data[ATTRIBUTE], required_data[VALUE], required_data[UID])
+    diary.edit(required_data[ATTRIBUTE], required_data[VALUE], *required_data[UID])
 
 
 @requires_parameters(UID, DAYS)
-def extend(input_data, required_data):
+def extend(command, required_data):
     """
     Take and evaluate input to extend the due date of an entry.
 
-    Signature is remove(input_data) after decoration.
+    Signature is extend(command) after decoration.
 
-    :param input_data:      The raw str data entered after the 'remove' command.
+    :param command:         The Command object parsed from the 'extend' command.
     :param required_data:   A dict provided by the requires_parameters decorator. Doesn't need to be specified when
                             called due to the decorator.
     :return:                None.
     """
-    try:
-        required_data[UID] = input_data.split()[0]  # UID is always first word
-        required_data[DAYS] = input_data.split()[1]  # days is always second word
-    except IndexError:
-        pass  # Ignore error if data not specified as it will be entered later
+    required_data[UID] = command.arg(0)  # UID is always first word
+    required_data[DAYS] = command.arg(1)  # days is always second word
 
     format_existing_data(required_data)
     cancel = complete_data(required_data) == CANCEL_CHARACTER
     if cancel:
         return
-    diary.extend(required_data[DAYS], required_data[UID])
+    diary.extend(required_data[DAYS], *required_data[UID])
 
 
 @requires_parameters(UID, PRIORITY)
-def priority(input_data, required_data):
+def priority(command, required_data):
     """
     Take and evaluate input to change the priority of an entry.
 
-    Signature is priority(input_data) after decoration.
+    Signature is priority(command) after decoration.
 
-    :param input_data:      The raw str data entered after the 'remove' command.
+    :param command:         The Command object parsed from the 'priority' command.
     :param required_data:   A dict provided by the requires_parameters decorator. Doesn't need to be specified when
                             called due to the decorator.
     :return:                None.
     """
-    try:
-        required_data[UID] = input_data.split()[0]
-        required_data[PRIORITY] = input_data.split()[1]
-    except IndexError:
-        pass  # Ignore error if data not specified as it will be entered later
+    required_data[UID] = command.arg(0)
+    required_data[PRIORITY] = command.arg(1)
 
     format_existing_data(required_data)
     cancel = complete_data(required_data) == CANCEL_CHARACTER
     if cancel:
         return
-    diary.priority(required_data[PRIORITY], required_data[UID])
+    diary.priority(required_data[PRIORITY], *required_data[UID])
+
+
+@requires_parameters(UID, INTERVAL)
+def repeat(command, required_data):
+    """
+    Take and evaluate input to make an entry recur. The end date is optional and can only be given with the command.
+
+    Signature is repeat(command) after decoration.
+
+    :param command:         The Command object parsed from the 'repeat' command.
+    :param required_data:   A dict provided by the requires_parameters decorator. Doesn't need to be specified when
+                            called due to the decorator.
+    :return:                None.
+    """
+    required_data[UID] = command.arg(0)
+    required_data[INTERVAL] = command.arg(1)
+
+    until, error = i_until.parse(command.rest(2))  # Rest of the string is the end date
+    if error is not None:
+        print_error_message(error, command.rest(2))
+        return
+
+    format_existing_data(required_data)
+    cancel = complete_data(required_data) == CANCEL_CHARACTER
+    if cancel:
+        return
+    diary.repeat(required_data[INTERVAL], until, *required_data[UID])
+
+
+@requires_parameters(UID)
+def archive(command, required_data):
+    """
+    Take and evaluate input to move entries to the archive.
+
+    Signature is archive(command) after decoration.
+
+    :param command:         The Command object parsed from the 'archive' command.
+    :param required_data:   A dict provided by the requires_parameters decorator. Doesn't need to be specified when
+                            called due to the decorator.
+    :return:                None.
+    """
+    required_data[UID] = command.arg(0)
+
+    format_existing_data(required_data)
+    cancel = complete_data(required_data) == CANCEL_CHARACTER
+    if cancel:
+        return
+    diary.archive_entries(*required_data[UID])
+
+
+def analytics(command):
+    """
+    Print charts of the workload over the next weeks.
+
+    :param command:         The Command object parsed from the 'analytics' command.
+    :return:                None.
+    """
+    weeks, error = i_weeks.parse(command.arg(0) or str(DEFAULT_WEEKS))
+    if error is not None:
+        print_error_message(error, command.arg(0))
+        return
+    print(render_workload(workload(diary.workload, weeks, lookbehind=RECURRENCE_LOOKBEHIND)))
+
+
+def week_agenda(command):
+    """
+    Print the entries due on each day of a week.
+
+    :param command:         The Command object parsed from the 'week' command, optionally with a date in the week.
+    :return:                None.
+    """
+    date, error = i_due_date.parse(command.rest(0))
+    if error is not None:
+        print_error_message(error, command.rest(0))
+        return
+    first, last = week_of(date or datetime.date.today())
+    print_agenda('Week of ' + date_to_str(first), first, last, skip_empty=False)
+
+
+def month_agenda(command):
+    """
+    Print the entries due on each day of a month which has any.
+
+    :param command:         The Command object parsed from the 'month' command, optionally with a month and year.
+    :return:                None.
+    """
+    today = datetime.date.today()
+    values = []
+    for arg, param_info, default in ((command.arg(0), i_month, today.month), (command.arg(1), i_year, today.year)):
+        value, error = param_info.parse(arg) if arg else (default, None)
+        if error is not None:
+            print_error_message(error, arg)
+            return
+        values.append(value)
+    first, last = month_of(datetime.date(values[1], values[0], 1))
+    print_agenda(first.strftime('%B %Y'), first, last, skip_empty=True)
+
+
+def print_agenda(title, first, last, skip_empty):
+    """
+    Print the entries due on each day of a period, coloured and emphasised as in the diary table.
+
+    :param title:           The str heading of the agenda.
+    :param first:           The datetime.date of the first day.
+    :param last:            The datetime.date of the last day.
+    :param skip_empty:      True to leave out days without entries.
+    :return:                None.
+    """
+    days = diary.agenda.between(first, last, diary.occurrences)  # Occurrences keep their uids from the table
+    subject_width = max((len(entry.subject) for _, entries in days for entry in entries), default=0)
+    today = datetime.date.today()
+    lines = [colored(title, attrs=['bold', 'underline'])]
+    for date, entries in days:
+        if skip_empty and not entries:
+            continue
+        lines.append(colored('{} {}{}'.format(date.strftime('%a'), date_to_str(date),
+                                              '  (today)' if date == today else ''), attrs=['bold']))
+        if not entries:
+            lines.append('  -')
+        for entry in entries:
+            days_left = entry.days_left if entry.days_left is not None else NO_DATE
+            uid = '{:0>3}'.format(entry.uid) if entry.uid is not None else '---'
+            text = '  {}  {:<10}  {}  {}'.format(uid, entry.item_type, entry.subject.ljust(subject_width),
+                                                 entry.description)
+            lines.append(colored(text, COLOUR_MAP[entry.item_type],
+                                 attrs=get_text_attributes([days_left, entry.priority])))
+    if len(lines) == 1:
+        lines.append(colored('No entries are due', 'yellow'))
+    print('\n'.join(lines) + '\n')
+
+
+def profile_commands(command):
+    """
+    Turn profiling of each command on or off, or show whether it is on.
+
+    :param command:         The Command object parsed from the 'profile' command.
+    :return:                None.
+    """
+    global profiler
+    setting = command.arg(0)
+    if setting == 'on':
+        profiler = profiler or CommandProfiler()
+    elif setting == 'off':
+        profiler = None
+    elif setting:
+        print_error_message("'{}' is invalid, please enter on or off.", setting)
+        return
+    if profiler is None:
+        cprint('Profiling is off', 'green')
+    else:
+        cprint('Profiling is on, writing to {}'.format(os.path.abspath(profiler.directory)), 'green')
+
+
+def undo(*ignore):
+    """Undo the most recent change to the diary."""
+    if not diary.undo():
+        cprint('Nothing to undo', 'yellow')
+
+
+def redo(*ignore):
+    """Redo the most recently undone change to the diary."""
+    if not diary.redo():
+        cprint('Nothing to redo', 'yellow')
 
 
 def filter_entries(filter_str=''):
@@ -239,19 +404,44 @@ def filter_entries(filter_str=''):
 
     Prompts for filter conditions to filter the list of entries and commands to handle entries in bulk.
 
-    :param filter_str:      An optional initial filter condition string.
+    With --all, archived entries are included and the only command available is `restore`.
+
+    :param filter_str:      An optional initial filter condition string, or @name to open a saved filter, optionally
+                            preceded by --all.
     :return:                None.
     """
-    f = Filter(list(diary.entries))  # Pass a copy of diary.entries to prevent skipping when using `remove`
-    if filter_str:
+    include_archive = filter_str.split()[:1] == [ALL_FLAG]
+    if include_archive:
+        filter_str = filter_str[len(ALL_FLAG):].strip()
+        f = Filter(with_archive(), cache=diary.filter_cache, cache_key=diary.cache_key('all'))
+    else:
+        # Pass a copy of the displayed entries to prevent skipping when using `remove`
+        f = Filter(list(diary.visible), cache=diary.filter_cache, cache_key=diary.cache_key('visible'),
+                   fuzzy=diary.fuzzy, expand=diary.find_within)
+    if filter_str.startswith('@'):
+        f = open_saved_filter(f, filter_str[1:].strip())
+    elif filter_str:
         handle_add_filter_condition(f, filter_str)
     else:
         display_filters(f)
 
+    completer.filter_mode = True
+    try:
+        filter_loop(f, include_archive)
+    finally:
+        completer.filter_mode = False
+
+
+def filter_loop(f, include_archive):
+    """
+    Prompt for filter conditions and commands until filter mode is left.
+
+    :param f:               The Filter object of the entries being filtered.
+    :param include_archive: True if archived entries are included, which makes the entries read-only.
+    :return:                None.
+    """
     while True:
-        cmd = get_input('{} (filter mode)> '.format(PROMPT),
-                        condition=lambda x: x != '',  # Do not accept blank string
-                        err_msg='')  # No error message if blank string is entered
+        cmd = get_input('{} (filter mode)> '.format(PROMPT), i_command, FILTER)
 
         if f.is_valid_condition(cmd):
             handle_add_filter_condition(f, cmd)
@@ -262,15 +452,91 @@ def filter_entries(filter_str=''):
             display_filters(f)
         elif cmd in ['l', 'list']:
             display_filters(f)
-        else:  # Otherwise a diary command has been entered
-            cmd, f_args = process_input(cmd)  # Separate command and arguments
-            if cmd in [remove, edit, priority, extend]:  # These are the only commands available in filter mode
-                for obj in f.objects:
-                    new_args = '{} {}'.format(obj.uid, f_args)  # Insert UID of each entry one at a time
-                    cmd(new_args)
+        elif cmd == 'cache':
+            cprint('Filter cache: {}'.format(diary.filter_cache), 'yellow')
+        elif cmd.startswith('@'):
+            f = open_saved_filter(f, cmd[1:].strip())
+        elif cmd.split()[0] in ['save', 'unsave']:
+            handle_saved_filter_command(f, *cmd.split(maxsplit=1))
+        elif cmd == 'restore':
+            diary.restore(*(obj.key for obj in f.objects))  # Entries which are not archived are ignored
+            break
+        elif f.is_expression(cmd):  # Malformed expressions are reported rather than corrected into commands
+            handle_add_filter_condition(f, cmd)
+        elif include_archive:
+            cprint("Archived entries are read-only. Use 'restore' to move them back into the diary", 'yellow')
+        else:  # Otherwise diary commands have been entered
+            # These are the only commands available in filter mode
+            commands = [command for command in parser.parse(cmd) if command.function in BULK_COMMANDS]
+            if commands:
+                uids = tuple(obj.uid for obj in f.objects)
+                with diary.batch():  # Changes to all selected entries are saved and undone together
+                    for command in commands:
+                        if uids:
+                            command.function(command._replace(args=[uids] + command.args))  # Insert UIDs directly
                 break
 
 
+def with_archive():
+    """
+    Read the archived entries and number them after the visible entries.
+
+    :return:                A list of the visible entries followed by the archived entries.
+    """
+    archived = list(diary.archive.entries)
+    for uid, entry in enumerate(archived, len(diary.visible) + 1):
+        entry.uid = uid
+    return list(diary.visible) + archived
+
+
+def open_saved_filter(current, name):
+    """
+    Create a Filter of the entries matching a saved filter, or list the saved filters if no name is given.
+
+    :param current:         The Filter object to keep if the saved filter cannot be opened.
+    :param name:            The name of the saved filter.
+    :return:                A Filter object.
+    """
+    if name not in diary.saved_filters:
+        if name:
+            cprint("No saved filter named '{}'".format(name), 'yellow')
+        saved = ['@{}: {}'.format(saved.name, saved.condition) for saved in diary.saved_filters.values()]
+        cprint('Saved filters:\n' + ('\n'.join(saved) if saved else 'None'), 'yellow')
+        return current
+
+    f = Filter(diary.open_filter(name), cache=diary.filter_cache, cache_key=diary.cache_key('@' + name))
+    f.filters.append(diary.saved_filters[name].condition)
+    display_filters(f)
+    return f
+
+
+def handle_saved_filter_command(filter_obj, command, name=''):
+    """
+    Save the active filters under a name or delete a saved filter.
+
+    :param filter_obj:      The Filter object holding the active filters.
+    :param command:         Either 'save' or 'unsave'.
+    :param name:            The name of the saved filter.
+    :return:                None.
+    """
+    if not re.fullmatch(r'\w+', name):
+        cprint('Saved filter names can only contain letters, numbers and underscores', 'yellow')
+    elif command == 'unsave':
+        message = 'Deleted @{}' if diary.delete_filter(name) else "No saved filter named '{}'"
+        cprint(message.format(name), 'yellow')
+    elif not filter_obj.filters:
+        cprint('There are no filters to save', 'yellow')
+    else:
+        condition = ' & '.join('({})'.format(condition) for condition in filter_obj.filters) \
+            if len(filter_obj.filters) > 1 else filter_obj.filters[0]
+        try:
+            diary.save_filter(name, condition)
+        except FilterException as fe:
+            cprint(fe.args[0], 'yellow')
+        else:
+            cprint("Saved as @{}. Open it with 'filter @{}'".format(name, name), 'yellow')
+
+
 def handle_add_filter_condition(filter, condition):
     try:
         filter.refine(condition)
@@ -291,35 +557,39 @@ def display_filters(filter_obj):
                                          'yellow'))
 
 
-def create_table(items=[], filter_mode=False):
+def create_table(items=[]):
     """
     Formats a list of diary entries into table form.
 
-    :param items:           The list of entries to format.
-    :param filter_mode:     Specifies whether CMDiary is currently in filter mode.
+    :param items:           The list of entries to format, already in display order and numbered.
     :return:                A formatted str which will display a table when printed.
     """
     headers = ('UID', 'Type', 'Subject', 'Description', 'Due Date', 'Days Left')
     rows = []
-    sorted_items = sorted(items, key=entry_sort_info)
+    styles = []
+    style_codes = {}  # Escape codes for each combination of item type and text attributes
 
-    for index, entry in enumerate(sorted_items):
-        if not filter_mode:  # Leave UIDs unchanged in filter mode otherwise they are updated to match their index
-            entry.uid = index + 1
+    for entry in items:
         due_date = entry.due_date if entry.due_date is not None else NO_DATE
         days_left = entry.days_left if entry.days_left is not None else NO_DATE
-        rows.append(['{:0>3}'.format(entry.uid),  # Ensure 3 digit UIDs,
-                     entry.item_type,
-                     entry.subject,
-                     entry.description,
-                     date_to_str(due_date),
-                     days_left,
-                     entry.priority])
-
-    rows = [[colored(str(cell), color=COLOUR_MAP[row[1]], attrs=get_text_attributes(row))
-             for cell in row[:-1]]  # Do not explicitly display priority state
-            for row in rows]  # Colourise each entry, however only the actual entry text not the table characters
-    table = tabulate(rows, headers)
+        row = ['{:0>3}'.format(entry.uid),  # Ensure 3 digit UIDs,
+               entry.item_type,
+               entry.subject,
+               entry.description,
+               date_to_str(due_date),
+               days_left,
+               entry.priority]
+        style = (row[1], tuple(get_text_attributes(row)))
+        if style not in style_codes:
+            prefix, _, suffix = colored('\0', color=COLOUR_MAP[style[0]], attrs=list(style[1])).partition('\0')
+            style_codes[style] = prefix, suffix
+        rows.append([str(cell) for cell in row[:-1]])  # Do not explicitly display priority state
+        styles.append(style_codes[style])
+
+    table = render_table(headers, rows, styles) if rows else None
+    if table is None:  # Colourise each entry, however only the actual entry text not the table characters
+        table = tabulate([[prefix + cell + suffix for cell in row] for row, (prefix, suffix) in zip(rows, styles)],
+                         headers)
     return table
 
 
@@ -332,8 +602,9 @@ def display(filter_items=None, extra=None):
     :return:                None.
     """
     filter_mode = filter_items is not None
-    items = filter_items if filter_mode else diary.entries
-    os.system('cls' if os.name == 'nt' else 'clear')  # For Windows/Mac/Linux compatibility
+    items = filter_items if filter_mode else diary.expand()
+    if sys.stdout.isatty():  # Nothing to clear when output is redirected, e.g. when replaying a session
+        os.system('cls' if os.name == 'nt' else 'clear')  # For Windows/Mac/Linux compatibility
 
     if not items:
         message = 'No entries match these criteria\n' if filter_mode else 'Diary has no entries\n'
@@ -342,9 +613,9 @@ def display(filter_items=None, extra=None):
             print(extra + '\n')
         return
 
-    table = create_table(items, filter_mode)
+    table = create_table(items)
     # Get current terminal height so it is not changed. This allows proper functioning when in full screen mode on mac.
-    rows = os.popen('stty size', 'r').read().split()[0]
+    rows = shutil.get_terminal_size().lines
     sys.stdout.write("\x1b[8;{rows};{cols}t".format(rows=rows,
                                                     cols=max((len(table.split('\n')[1])), 80)))  # Resize window
     print(table + '\n')  # Newline after table is more aesthetically pleasing.
@@ -352,18 +623,6 @@ def display(filter_items=None, extra=None):
         print(extra + '\n')
 
 
-def entry_sort_info(entry):
-    """
-    Provides the data of an entry in order as to prioritise sorting of data fields.
-    Required to sort by days remaining then item type then subject then description.
-
-    :param entry:           A DiaryEntry to be processed.
-    :return:                A tuple containing the data of the entry in a sortable order.
-    """
-    days_left = entry.days_left if entry.days_left is not None else float('infinity')
-    return days_left, entry.item_type, entry.subject, entry.description
-
-
 def get_text_attributes(row_data):
     """
     Analyse entry data and return list of formatting attributes to add to the row.
@@ -389,59 +648,6 @@ def get_text_attributes(row_data):
     return attrs
 
 
-def determine_date_separator(string):
-    """Analyse a date string and determine the character separating the components."""
-    if not string:
-        return None
-
-    for separator in (' ', '/', '-'):
-        if separator in string:
-            return separator
-
-
-def str_to_date(string):
-    """
-    Convert a string representation of a date to the datetime.date form and supplement missing values with
-    corresponding values from today's date.
-
-    :param string:          The date string.
-    :return:                A datetime.date representation of `string`.
-    """
-    separator = determine_date_separator(string)
-    if not string or string is NO_DATE:
-        return None
-
-    # No separator means only one value, and converting to datetime.date requires a list
-    components = string.split(separator) if separator is not None else [string]
-    today = datetime.date.today()
-
-    # Substitute empty values with corresponding values from today's date
-    day = int(components[0]) if len(components) >= 1 else today.day
-    month = int(components[1]) if len(components) >= 2 else today.month
-    year = int(components[2]) if len(components) >= 3 else today.year
-
-    return datetime.date(year, month, day)
-
-
-def date_to_str(date):
-    """Convert a date to a string with a pre-determined format."""
-    return date.strftime('%d/%m/%Y') if date not in (NO_DATE, None) else NO_DATE
-
-
-def validate_date(string):
-    """
-    A condition to check whether a date string can be converted to a valid date.
-
-    :param string:          The date str.
-    :return:                True/False depending on whether the date string is valid.
-    """
-    try:
-        _ = str_to_date(string)  # If fails, then invalid date
-    except ValueError:
-        return False
-    return True
-
-
 def complete_data(data):
     """
     Prompt user to enter previously unentered or invalid data.
@@ -450,19 +656,14 @@ def complete_data(data):
     :return:                None.
     """
     for key, value in data.items():
-        if value or (key == PRIORITY and value is 0):
+        if value or (key in (PRIORITY, INTERVAL) and type(value) is int and value == 0):
             continue  # Data is already present
 
-        if key == ATTRIBUTE or data.get(ATTRIBUTE, False):  # Attribute has or is about to be specified
-            i_value = match_value_parameter(data)
         label = key.capitalize().replace('_', ' ') + ': '  # Change data name to readable label
 
-        param_info = PARAMETERS[key] if key != VALUE else i_value  # ATTRIBUTE comes before VALUE
-        inp = get_input(prompt=label,
-                        response_type=param_info.data_type,
-                        condition=param_info.condition,
-                        modifier=param_info.modifier,
-                        err_msg=param_info.err_msg)
+        # ATTRIBUTE comes before VALUE and is already its canonical name
+        param_info = PARAMETERS[key] if key != VALUE else PARAMETERS.get(data[ATTRIBUTE])
+        inp = get_input(label, param_info)
 
         if inp == CANCEL_CHARACTER:
             return CANCEL_CHARACTER
@@ -472,7 +673,7 @@ def complete_data(data):
 
 def format_existing_data(data):
     """
-    Convert data to required format for processing.
+    Convert data to required format for processing. Each value is parsed and validated in a single step.
 
     :param data:            A dict of data names and values.
     :return:                None.
@@ -480,99 +681,266 @@ def format_existing_data(data):
     for key, value in data.items():
         if not value:
             continue  # No value to be formatted
-        if key == ATTRIBUTE and value:  # `edit` function is running
-            i_value = match_value_parameter(data)
-            if i_value is None:  # Invalid attribute name passed
-                data[ATTRIBUTE] = False
-                break  # Continuing loop with no attribute causes crash as no parameter info exists for the new value
-        param_info = PARAMETERS.get(key, None) if key != VALUE else i_value  # ATTRIBUTE comes before VALUE
-        # Format value
+        # ATTRIBUTE comes before VALUE and has already been replaced by its canonical name
+        param_info = PARAMETERS.get(key) if key != VALUE else PARAMETERS.get(data[ATTRIBUTE])
+        value, error = param_info.parse(value)
+        data[key] = value if error is None else False  # Mark data as invalid by resetting value
+        if key == ATTRIBUTE and error is not None:
+            break  # Continuing loop with no attribute causes crash as no parameter info exists for the new value
+
+
+async def read_line(text):
+    """
+    Read a line of input without blocking the event loop, so that reminders can be printed while waiting. The line is
+    read in a daemon thread, which does not keep CMDiary running after it quits.
+
+    :param text:            The prompt str.
+    :return:                The str entered.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def read():
         try:
-            value = param_info.data_type(value)
-        except ValueError:
-            pass
+            line = input(text)
+        except Exception as e:  # e.g. EOFError, raised in the waiting coroutine instead
+            loop.call_soon_threadsafe(future.set_exception, e)
         else:
-            if param_info.condition is None or param_info.condition(value):
-                data[key] = param_info.modifier(value) if param_info.modifier is not None else value
-                continue
-        data[key] = False  # Mark data as invalid by resetting value
+            loop.call_soon_threadsafe(future.set_result, line)
+
+    threading.Thread(target=read, daemon=True).start()
+    return await future
 
 
-def match_value_parameter(data):
+def print_reminders(reminders):
     """
-    Match attribute name from raw text to its ParameterInfo object
+    Print reminders above the prompt, then redraw the prompt and anything typed at it so far.
 
-    :param data:            A dict containing names and values of data
-    :return:
+    :param reminders:       A list of Reminder objects.
+    :return:                None.
     """
-    if data.get(ATTRIBUTE, False):  # Check to see if the attribute field has a value
-        return PARAMETERS.get(ATTRIBUTES.get(data[ATTRIBUTE], None), None)  # Match parameter to data value
+    sys.stdout.write('\r\x1b[K')  # Clear the prompt line
+    for reminder in reminders:
+        entry = reminder.entry
+        when = {0: 'today', 1: 'tomorrow'}.get(reminder.days_before, 'in {} days'.format(reminder.days_before))
+        cprint('Reminder: {} {} - {} is due {}'.format(entry.subject, entry.item_type, entry.description, when),
+               COLOUR_MAP[entry.item_type], attrs=['bold'] if entry.priority else None)
+    sys.stdout.write(PROMPT + '> ' + completer.line_buffer())
+    sys.stdout.flush()
 
 
-def prompt():
+async def remind(changed):
     """
-    Prompt the user for a command to run and any arguments they wish to supply.
+    Print reminders as they become due. Sleeps until the next reminder is due or the diary changes, so nothing is done
+    between reminders.
 
-    :return:                The strings of the command and arguments. Command is None if not supplied.
+    :param changed:         An asyncio.Event which is set whenever commands have been run.
+    :return:                None.
     """
-    inp = input(PROMPT + '> ')
-    if not inp:
-        return None, ''
-    return process_input(inp)
+    while True:
+        reminders = diary.reminders.pop_due()
+        if reminders:
+            print_reminders(reminders)
+        next_time = diary.reminders.next_time()
+        timeout = REMINDER_RECHECK
+        if next_time is not None:
+            timeout = min(timeout, (next_time - datetime.datetime.now()).total_seconds())
+        changed.clear()
+        try:
+            await asyncio.wait_for(changed.wait(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            pass
 
 
-def process_input(inp):
+async def main():
     """
-    Split the raw command string into a command and its arguments.
+    Run commands as they are entered, while reminders are given in the background.
 
-    :param inp:             A string containing the users command.
-    :return:                A tuple containing the name of the command and a string of arguments.
+    :return:                None.
     """
-    split_input = inp.split(maxsplit=1)  # Separate command from arguments
-    command_str = split_input[0]
+    changed = asyncio.Event()
+    reminders = asyncio.ensure_future(remind(changed))
     try:
-        command_str = COMMANDS[command_str]
-    except KeyError:
-        cprint("'{}' is not a valid command".format(command_str), 'yellow')
-        best_match = get_best_match(command_str)
-        fix_response = get_input("Did you mean " + colored('{}', 'magenta', attrs=['underline'])
-                                 .format(best_match) + " [Y/n]? ", condition=lambda i: i.lower() in 'yn',
-                                 err_msg='').lower()
-        if fix_response == 'y':
-            command_str = COMMANDS[best_match]
-        else:
-            return None, ''
-    arg_string = split_input[1] if len(split_input) == 2 else ''  # Check if arguments were supplied
-    return command_str, arg_string
+        while True:
+            line = await read_line(PROMPT + '> ')
+            if recorder is not None:
+                recorder.record(COMMAND, PROMPT + '> ', line)
+            run(parser.parse(line))
+            changed.set()
+    finally:
+        reminders.cancel()
+
+
+def correct_command(name):
+    """
+    Suggest a correction for an unknown command name.
+
+    :param name:            The str name which is not a valid command.
+    :return:                The name of the suggested command if the user accepts it, otherwise None.
+    """
+    cprint("'{}' is not a valid command".format(name), 'yellow')
+    best_match = get_best_match(name)
+    fix_response = get_input("Did you mean " + colored('{}', 'magenta', attrs=['underline'])
+                             .format(best_match) + " [Y/n]? ", i_confirm)
+    return best_match if fix_response == 'y' else None
+
+
+def execute(command):
+    """
+    Run a single command.
+
+    :param command:         A Command object.
+    :return:                None.
+    """
+    if command.function in TEXT_COMMANDS:
+        command.function(command.text)
+    elif command.function is get_info:
+        get_info(command.text if command.text else None)
+    elif command.function is display:
+        display()
+    else:
+        command.function(command)
+
+
+def run(commands):
+    """
+    Run the commands entered on one line as a single step which is saved and undone together, then redraw the
+    diary once if any of them could have changed it.
+
+    :param commands:        A list of Command objects.
+    :return:                None.
+    """
+    if not commands:
+        return
+    with diary.batch():
+        for command in commands:
+            if profiler is None:
+                execute(command)
+            else:
+                profiler.run(command.name, execute, command)
+    if any(command.function not in (get_info, display, analytics, sync_diary, profile_commands, week_agenda,
+                                    month_agenda) for command in commands):
+        display()
 
 
 def quit_cmdiary(*ignore):
     """Clean up and quit diary."""
     if os.name == 'nt':  # Colorama only required on Windows machines
         deinit()  # Colorama deinit function
+    if recorder is not None:
+        recorder.close()
     quit()
 
 
+def sync_diary(other_file):
+    """
+    Merge the diary with another diary file, e.g. a copy kept on another machine, so that both hold every change.
+
+    :param other_file:      The path of the other diary's data file.
+    :return:                None.
+    """
+    other_file = other_file or get_input('Diary file to sync with: ', i_command)
+    if other_file == CANCEL_CHARACTER:
+        return
+    try:
+        result = sync(diary, other_file)
+    except SyncException as e:
+        cprint(str(e), 'yellow')
+        return
+    display(extra=colored('Synced with {}: {} entries pulled, {} pushed, {} conflicts'.format(other_file, *result),
+                          'green'))
+
+
 def switch_diary(name):
     global diary
     if name == 'test':
-        diary = Diary('test_data.pickle')
+        diary = Diary('test_data.pickle', 'test_history.pickle')
     elif name == 'main':
-        diary = Diary('data.pickle')
+        diary = Diary('data.pickle', 'history.pickle')
+    completer.tries[SUBJECT] = diary.subjects
+
 
 # Initialise diary object
-diary = Diary('data.pickle')
+diary = Diary('data.pickle', 'history.pickle')
+
+# Profiles each command while profiling is on, otherwise None
+profiler = None
+
+# Records the lines entered when started with --record, otherwise None
+recorder = None
+
+# Dict mapping strings and abbreviations to possible attributes
+ATTRIBUTES = {'t': ITEM_TYPE, 'type': ITEM_TYPE, ITEM_TYPE: ITEM_TYPE,
+              's': SUBJECT, SUBJECT: SUBJECT,
+              'd': DESCRIPTION, DESCRIPTION: DESCRIPTION,
+              'due': DUE_DATE, 'duedate': DUE_DATE, DUE_DATE: DUE_DATE,
+              'p': PRIORITY, 'priority': PRIORITY}
+
+# Dict mapping strings and abbreviations to item types
+ITEM_TYPES = {
+    'a': ASSESSMENT, 'assessment': ASSESSMENT,
+    'h': HOMEWORK, 'homework': HOMEWORK,
+    'n': NOTE, 'note': NOTE
+}
+
+
+def parse_uids(raw):
+    """
+    Convert a UID, or a list of UIDs and ranges such as 3-40,52, to a tuple of ints in one pass, raising ValueError if
+    any of them is not in use. A tuple of ints from filter mode is only validated.
+    """
+    taken = diary.taken_uids
+    if isinstance(raw, tuple):
+        uids = raw
+    else:
+        uids = []
+        for part in raw.split(UID_SEPARATOR):
+            first, _, last = part.partition(UID_RANGE)
+            first = int(first)
+            last = int(last) if last else first
+            if not 0 <= last - first < len(taken):  # Backwards ranges or ranges larger than the diary
+                raise ValueError(raw)
+            uids.extend(range(first, last + 1))
+    if not all(uid in taken for uid in uids):
+        raise ValueError(raw)
+    return tuple(uids)
+
+
+def parse_choice(choices):
+    """Create a parser which maps a str to a value in a dict of choices, raising ValueError if it is not a key."""
+    def parser(raw):
+        try:
+            return choices[raw]
+        except KeyError:
+            raise ValueError(raw)
+    return parser
+
+
+def parse_int(minimum=None, maximum=None):
+    """Create a parser which converts a str to an int, raising ValueError if it is outside an inclusive range."""
+    def parser(raw):
+        value = int(raw)
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            raise ValueError(raw)
+        return value
+    return parser
+
+
+def parse_non_blank(raw):
+    """Return a str unchanged, raising ValueError if it is blank."""
+    if not raw:
+        raise ValueError(raw)
+    return raw
+
 
 # Define command parameters and required information.
 # Variables with the i_ prefix are ParameterInfo types.
 i_uid = ParameterInfo(UID,
-                      int,
-                      condition=lambda uid: int(uid) in diary.taken_uids,
-                      err_msg='Object with UID {} does not exist')
+                      parse_uids,
+                      err_msg="UID '{}' does not exist. Several UIDs can be given as a list and ranges, e.g. 1,3,5-9")
 
 i_item_type = ParameterInfo(ITEM_TYPE,
-                            condition=lambda x: x in ITEM_TYPES.keys(),
-                            modifier=lambda x: ITEM_TYPES.get(x, HOMEWORK),
+                            parse_choice(ITEM_TYPES),
                             err_msg="Item type '{}' does not exist. Available item types are "
                                     "assessment, homework and note.")
 
@@ -581,13 +949,11 @@ i_subject = ParameterInfo(SUBJECT)
 i_description = ParameterInfo(DESCRIPTION)
 
 i_due_date = ParameterInfo(DUE_DATE,
-                           condition=validate_date,
-                           modifier=str_to_date,
+                           str_to_date,
                            err_msg="Invalid date. Date format is dd/mm/yyyy. See help page or type 'help date' "
                                    "for more info.")
 i_attr = ParameterInfo(ATTRIBUTE,
-                       condition=lambda attr: attr in ATTRIBUTES,
-                       modifier=lambda attr: ATTRIBUTES[attr],
+                       parse_choice(ATTRIBUTES),
                        err_msg="Attribute '{}' does not exist. Available attributes are type, subject, "
                                "description and duedate.")
 i_days = ParameterInfo(DAYS,
@@ -595,12 +961,34 @@ i_days = ParameterInfo(DAYS,
                        err_msg="'{}' is an invalid number. Please enter a number of days to extend by.")
 
 i_priority = ParameterInfo(PRIORITY,
-                           int,
-                           condition=lambda x: x in (0, 1),
+                           parse_int(0, 1),
                            err_msg="'{}' is invalid, please enter 0 or 1.")
 
-# Define regex for matching sections of input
-RE_DUE_DATE = re.compile(r' (([0-9]{1,2} ?){1,2}([0-9]{4})?)$')
+i_interval = ParameterInfo(INTERVAL,
+                           parse_int(minimum=0),
+                           err_msg="'{}' is invalid. Please enter a number of days between occurrences, or 0 to stop "
+                                   "repeating.")
+
+i_until = ParameterInfo('until',
+                        str_to_date,
+                        err_msg="Invalid date. Date format is dd/mm/yyyy. See help page or type 'help date' "
+                                "for more info.")
+
+i_weeks = ParameterInfo('weeks',
+                        parse_int(1, MAX_WEEKS),
+                        err_msg="'{}' is invalid. Please enter a number of weeks from 1 to " + str(MAX_WEEKS) + ".")
+
+i_month = ParameterInfo('month',
+                        parse_int(1, 12),
+                        err_msg="'{}' is invalid. Please enter a month from 1 to 12.")
+
+i_year = ParameterInfo('year',
+                       parse_int(datetime.MINYEAR, datetime.MAXYEAR),
+                       err_msg="'{}' is invalid. Please enter a year, e.g. 2016.")
+
+i_command = ParameterInfo('command', parse_non_blank, err_msg='')  # No error message if blank string is entered
+
+i_confirm = ParameterInfo('confirm', parse_choice({'y': 'y', 'Y': 'y', 'n': 'n', 'N': 'n'}), err_msg='')
 
 # Dict of parameter names and info objects
 PARAMETERS = {UID: i_uid,
@@ -610,21 +998,8 @@ PARAMETERS = {UID: i_uid,
               DUE_DATE: i_due_date,
               ATTRIBUTE: i_attr,
               DAYS: i_days,
-              PRIORITY: i_priority}
-
-# Dict mapping strings and abbreviations to possible attributes
-ATTRIBUTES = {'t': ITEM_TYPE, 'type': ITEM_TYPE, ITEM_TYPE: ITEM_TYPE,
-              's': SUBJECT, SUBJECT: SUBJECT,
-              'd': DESCRIPTION, DESCRIPTION: DESCRIPTION,
-              'due': DUE_DATE, 'duedate': DUE_DATE, DUE_DATE: DUE_DATE,
-              'p': PRIORITY, 'priority': PRIORITY}
-
-# Dict mapping strings and abbreviations to item types
-ITEM_TYPES = {
-    'a': ASSESSMENT, 'assessment': ASSESSMENT,
-    'h': HOMEWORK, 'homework': HOMEWORK,
-    'n': NOTE, 'note': NOTE
-}
+              PRIORITY: i_priority,
+              INTERVAL: i_interval}
 
 # Dict mapping strings and abbreviations to command functions
 COMMANDS = {'add': add, 'a': add,
@@ -636,28 +1011,52 @@ COMMANDS = {'add': add, 'a': add,
             'help': get_info, 'h': get_info,
             'priority': priority, 'p': priority,
             'filter': filter_entries, 'f': filter_entries,
+            'repeat': repeat, 'rep': repeat,
+            'undo': undo, 'u': undo,
+            'redo': redo,
+            'archive': archive, 'ar': archive,
+            'analytics': analytics, 'an': analytics,
+            'week': week_agenda, 'w': week_agenda,
+            'month': month_agenda, 'm': month_agenda,
+            'sync': sync_diary,
+            'profile': profile_commands,
 
             'switchto': switch_diary}
 
+# Commands which act on selected entries in filter mode
+BULK_COMMANDS = (remove, edit, priority, extend, repeat, archive)
+
+# Commands which are passed the unsplit text of their arguments
+TEXT_COMMANDS = (filter_entries, switch_diary, sync_diary)
+
+# Splits input lines into commands. The arguments of `add` may end with a due date after the item type and subject.
+parser = CommandParser(COMMANDS, dated={add: 2}, correct=correct_command)
+
+# Tab completion of the kinds of words expected by each command. None marks arguments which are not completed.
+completer = Completer(COMMANDS,
+                      grammar={add: (ITEM_TYPE, SUBJECT),
+                               edit: (None, ATTRIBUTE, VALUE),
+                               filter_entries: (CONDITION,),
+                               get_info: ('help',),
+                               profile_commands: ('profile',),
+                               remove: (None,), extend: (None,), priority: (None,), repeat: (None,), archive: (None,)},
+                      tries={ITEM_TYPE: ITEM_TYPES, SUBJECT: diary.subjects, ATTRIBUTE: ATTRIBUTES, 'help': HELP_TOPICS,
+                             'profile': ('on', 'off')},
+                      attributes=ATTRIBUTES,
+                      filter_attributes=FILTER_ATTRIBUTES)
+
 # Run the diary
 if __name__ == '__main__':
     if os.name == 'nt':  # Colorama only required on Windows machines
         init()  # Colorama init function -- allows coloured text on Windows machines
+    if PROFILE_FLAG in sys.argv[1:]:
+        profiler = CommandProfiler()
+    if RECORD_FLAG in sys.argv[1:]:
+        path = sys.argv[sys.argv.index(RECORD_FLAG) + 1:][:1]
+        recorder = SessionRecorder(path[0] if path and not path[0].startswith('--') else SESSION_FILE)
+    completer.install()
     display()
     try:
-        while True:
-            command, args = prompt()
-            if command is None:
-                continue
-
-            # These commands have slightly different parameters so they must be changed
-            if command is get_info:
-                args = args if args else None
-            if command is display:
-                args = None
-
-            command(args)
-            if command not in [get_info, display]:
-                display()
+        asyncio.run(main())
     except KeyboardInterrupt:
         quit_cmdiary()  # Exit without crash info and perform cleanup
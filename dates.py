@@ -0,0 +1,56 @@
+import datetime
+from functools import lru_cache
+
+NO_DATE = 'N/A'  # String used as placeholder if no date is specified
+DATE_FORMAT = '%d/%m/%Y'
+DATE_CACHE_SIZE = 256  # Number of parsed date strings remembered
+
+
+def determine_date_separator(string):
+    """Analyse a date string and determine the character separating the components."""
+    if not string:
+        return None
+
+    for separator in (' ', '/', '-'):
+        if separator in string:
+            return separator
+
+
+def str_to_date(string):
+    """
+    Convert a string representation of a date to the datetime.date form and supplement missing values with
+    corresponding values from today's date. Results are memoised for each day.
+
+    :param string:          The date string.
+    :return:                A datetime.date representation of `string`.
+    """
+    if not string or string == NO_DATE:
+        return None
+    return parse_date(string, datetime.date.today())
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(string, today):
+    """
+    Convert a non-empty date string to a datetime.date relative to a given day. See `str_to_date`.
+
+    :param string:          The date string.
+    :param today:           The datetime.date supplying omitted components.
+    :return:                A datetime.date representation of `string`.
+    """
+    separator = determine_date_separator(string)
+
+    # No separator means only one value, and converting to datetime.date requires a list
+    components = string.split(separator) if separator is not None else [string]
+
+    # Substitute empty values with corresponding values from today's date
+    day = int(components[0]) if len(components) >= 1 else today.day
+    month = int(components[1]) if len(components) >= 2 else today.month
+    year = int(components[2]) if len(components) >= 3 else today.year
+
+    return datetime.date(year, month, day)
+
+
+def date_to_str(date):
+    """Convert a date to a string with a pre-determined format."""
+    return date.strftime(DATE_FORMAT) if date not in (NO_DATE, None) else NO_DATE
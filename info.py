@@ -28,13 +28,37 @@ COMMANDS = OrderedDict([('add',      cmd('(a)dd') + arg('       [type] [subject]
                         ('list',     cmd('(l)ist') + '      list all diary entries'),
                         ('priority', cmd('(p)riority') + arg('  [uid] [0:1]') +
                          ' - Gives or takes priority of an entry. An entry with priority will appear in bold.'),
+                        ('repeat',   cmd('(rep)eat') + arg('    [uid] [days] [until]') +
+                         ' - repeat an entry every (days) days, optionally until a date. 0 days stops repeating.'),
+                        ('undo',     cmd('(u)ndo') + '      undo the last change (changes made in filter mode or on one '
+                         'line are undone together)'),
+                        ('redo',     cmd('redo') + '        redo the last undone change'),
+                        ('archive',  cmd('(ar)chive') + arg('   [uid]') + ' - move an entry out of the diary into the '
+                         'archive. Entries long overdue are archived automatically'),
+                        ('analytics', cmd('(an)alytics') + arg(' [weeks]') + ' - chart the entries due per day, week, '
+                         'subject and type over the next (weeks) weeks'),
+                        ('week',     cmd('(w)eek') + arg('      [date]') + ' - list the entries due on each day of the '
+                         'week containing (date), this week by default'),
+                        ('month',    cmd('(m)onth') + arg('     [month] [year]') + ' - list the entries due on each day '
+                         'of a month, this month by default'),
+                        ('sync',     cmd('sync') + arg('        [file]') + ' - merge the diary with a copy of it in another '
+                         'data file, e.g. from another machine, so both hold every change'),
+                        ('profile',  cmd('profile') + arg('     [on:off]') + ' - write a flame graph stack file and the '
+                         'top allocation sites of each command to the profiles folder'),
                         ('filter',   cmd('(f)ilter') + arg('    [condition]') +
                          ' - enter filter mode to select multiple entries at once'),
                         ('quit',     cmd('(q)uit') + '      quit CMDiary'),
                         ('help',     cmd('(h)elp') + arg("      [command : 'types' : 'attrs' : 'date']") +
                          ' - display command info'),
                         ('cancel',   'Use ' + cmd('\\') + ' to ' + arg('cancel') +
-                         ' a prompt and return to the main screen')])
+                         ' a prompt and return to the main screen'),
+                        ('uids',     'Commands taking a ' + arg('[uid]') + ' also accept lists and ranges, e.g. ' +
+                         cmd('remove 3-40,52') + ' or ' + cmd('priority 1-10 1')),
+                        ('multiple', 'Separate commands with ' + cmd(';') + ' to run ' + arg('multiple') +
+                         ' commands at once, e.g. ' + cmd('e 1 s maths; x 1 7') + '. They are undone together')])
+
+# Topics which can be passed to the help command
+HELP_TOPICS = list(COMMANDS) + ['types', 'attrs', 'date']
 
 # A list of available item types
 ITEM_TYPES = ['(h)omework', '(a)ssessment', '(n)ote']
@@ -54,15 +78,30 @@ DATE_FORMATTING = '* Dates can be represented by using 1 to 3 numbers, separated
 FILTER_HELP = '* In filter mode, you can specify conditions to select multiple entries.\n' + \
               '* Conditions are entered in the form ' + arg('[attribute][operator][value]') + '.\n' + \
               '* Conditions can be entered at the prompt until a selection has been made.\n' + \
-              '* The ' + cmd('remove') + ', ' + cmd('edit') + ', ' + cmd('extend') + ' and ' + cmd('priority') + \
+              '* The ' + cmd('remove') + ', ' + cmd('edit') + ', ' + cmd('extend') + ', ' + cmd('priority') + ', ' + \
+              cmd('repeat') + ' and ' + cmd('archive') + \
               ' commands can then be used, without the need to specify uids.\n' + \
               '* Entries with the due date or days left displayed as \'N/A\' can be selected with \'' + \
               cmd('due=none') + '\'.\n' + \
               important('Attributes') + ': (u)id, (s)ubject, (d)escription, (due)date, (days)left.\n' + \
               important('Operators') + ':\n    =    Equal to\n    >    Greater than\n    <    Less than\n' \
-              '    :    Contains\n' + 'Operators can be prefixed by  !  to negate their selection\n' + \
+              '    :    Contains\n    ~    Matches regular expression (case insensitive)\n' + \
+              '    ~~   Within a few typing mistakes of each word, closest first\n' + \
+              'Operators can be prefixed by  !  to negate their selection\n' + \
+              '* Due dates can be compared with ' + cmd('<') + ' and ' + cmd('>') + ' using the usual date formatting.\n' + \
+              '* Conditions can be combined with ' + cmd('&') + ' (and), ' + cmd('|') + ' (or), ' + cmd('!') + \
+              ' (not) and parentheses, e.g. ' + cmd('(s=maths | s=physics) & days<7 & !d:draft') + '.\n' + \
+              '* Values containing these characters can be quoted, e.g. ' + cmd('d~"^(lab|prac) \\d+"') + '. A single\n' + \
+              '  condition may use them unquoted, e.g. ' + cmd('d:R&D') + '.\n' + \
               important('Extra Commands:') + '\n ' + cmd('(q)uit') + '  Quit filter mode\n ' + \
-              cmd('(l)ist') + '  List entries currently selected by filter\n ' + cmd('(c)lear') + ' Clear all filters'
+              cmd('(l)ist') + '  List entries currently selected by filter\n ' + cmd('(c)lear') + ' Clear all filters\n ' + \
+              cmd('save') + arg(' [name]') + '    Save the active filters, which are kept up to date as entries change\n ' + \
+              cmd('unsave') + arg(' [name]') + '  Delete a saved filter\n ' + \
+              cmd('cache') + '         Show how often filter results are reused from the cache\n ' + \
+              cmd('@') + arg('[name]') + '       Open a saved filter (also ' + cmd('filter @') + arg('[name]') + \
+              '). ' + cmd('@') + ' alone lists saved filters\n' + \
+              '* ' + cmd('filter --all') + ' includes archived entries. They are read-only, but ' + cmd('restore') + \
+              ' moves the selected entries back into the diary.'
 
 # Create help strings using the above three lists/strings
 item_types_help = important('Item Types: ') + '{}'.format(', '.join(ITEM_TYPES))
@@ -0,0 +1,287 @@
+"""
+A compact, versioned file format for diary entries.
+
+    header          magic, format version and number of entries
+    strings         a dictionary of the item types and subjects used by the entries
+    segment index   the position, number of entries and range of due dates of each segment
+    segments        the entries in fixed-size segments, in the order they were written
+
+Each segment holds:
+
+    records         one fixed-width record per entry: key, uid, due date, item type, subject and priority
+    descriptions    the descriptions of the segment's entries, compressed together
+    recurrences     the recurrence rules of recurring entries by record number within the segment, compressed
+
+Every section after the header is preceded by its length in bytes. Due dates are stored as day ordinals (0 for no
+date), item types and subjects as positions in the string dictionary, and keys as the 16 bytes of their hex digits.
+
+Segments are decoded independently, so the segments of a large file are decoded by several processes, and segments
+which cannot hold the requested entries are skipped. Version 1 files, which hold the sections of a single
+segment straight after the string dictionary, can still be read.
+"""
+import zlib
+import pickle
+import hashlib
+import struct
+import datetime
+
+from DiaryEntry import UID, ITEM_TYPE, SUBJECT, DESCRIPTION, DUE_DATE, PRIORITY, RECURRENCE, KEY
+from ParallelFilter import get_executor, default_workers
+
+MAGIC = b'CMDY'
+FORMAT_VERSION = 2
+SEGMENT_SIZE = 4096  # Number of entries in each segment apart from the last
+PARALLEL_THRESHOLD = 200000  # Number of entries to decode below which segments are decoded in the current process
+
+HEADER = struct.Struct('<4sBI')  # Magic, format version, number of entries
+SECTION = struct.Struct('<I')  # Length of the following section
+RECORD = struct.Struct('<16sIiIIB')  # Key, uid, due date ordinal, item type, subject, priority
+SEGMENT = struct.Struct('<QIIii')  # Offset and length in the file, number of entries, first and last due date ordinal
+NO_DATE_ORDINAL = 0  # datetime.date ordinals start at 1
+
+
+class StorageException(Exception):
+    """
+    An exception class which indicates that a file is not a valid compact diary file.
+    Is only defined for the custom name.
+    """
+    pass
+
+
+def is_compact(path):
+    """
+    Check whether a file is in the compact format.
+
+    :param path:        The path of the file.
+    :return:            True if the file starts with the compact format header.
+    """
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def pack_strings(strings):
+    """Encode a list of strs as their count, their lengths in bytes and their concatenated UTF-8 bytes."""
+    encoded = [string.encode('utf-8') for string in strings]
+    return struct.pack('<I{}I'.format(len(encoded)), len(encoded), *map(len, encoded)) + b''.join(encoded)
+
+
+def pack_sections(sections):
+    """Join sections of bytes, each preceded by its length."""
+    return b''.join(SECTION.pack(len(section)) + section for section in sections)
+
+
+def unpack_sections(data, position=0, count=None):
+    """
+    Split bytes created by `pack_sections`.
+
+    :param data:        A bytes-like object.
+    :param position:    The position of the first section.
+    :param count:       The number of sections to split off. Defaults to all sections up to the end of the data.
+    :return:            A tuple of a list of memoryviews of the sections and the position after the last one.
+    """
+    data = memoryview(data)
+    sections = []
+    while position < len(data) and (count is None or len(sections) < count):
+        length, = SECTION.unpack_from(data, position)
+        position += SECTION.size
+        sections.append(data[position:position + length])
+        position += length
+    return sections, position
+
+
+def unpack_strings(data):
+    """Decode the bytes created by `pack_strings` into a list of strs."""
+    count, = struct.unpack_from('<I', data)
+    lengths = struct.unpack_from('<{}I'.format(count), data, 4)
+    strings = []
+    position = 4 + 4 * count
+    for length in lengths:
+        strings.append(str(data[position:position + length], 'utf-8'))
+        position += length
+    return strings
+
+
+def encode_segment(entries, strings):
+    """
+    Encode the entries of one segment.
+
+    :param entries:     A list of DiaryEntry objects.
+    :param strings:     A dict mapping strs to their positions in the string dictionary, which is added to.
+    :return:            A tuple of the bytes of the segment and its first and last due date ordinals.
+    """
+    records = []
+    descriptions = []
+    recurrences = {}
+    dates = []
+    for number, entry in enumerate(entries):
+        item_type = strings.setdefault(entry.item_type, len(strings))
+        subject = strings.setdefault(entry.subject, len(strings))
+        due = entry.due_date.toordinal() if entry.due_date is not None else NO_DATE_ORDINAL
+        records.append(RECORD.pack(bytes.fromhex(entry.key), entry.uid, due, item_type, subject, entry.priority))
+        descriptions.append(entry.description)
+        if entry.recurrence is not None:
+            recurrences[number] = entry.recurrence.data
+        if due != NO_DATE_ORDINAL:
+            dates.append(due)
+    segment = pack_sections((b''.join(records),
+                             zlib.compress(pack_strings(descriptions)),
+                             zlib.compress(pickle.dumps(recurrences, pickle.HIGHEST_PROTOCOL))))
+    return segment, min(dates, default=NO_DATE_ORDINAL), max(dates, default=NO_DATE_ORDINAL)
+
+
+def decode_segment(segment, strings, numbers=None):
+    """
+    Decode the entries of one segment. Runs in a worker process when many entries are read.
+
+    :param segment:     The bytes of the segment.
+    :param strings:     The list of strs in the string dictionary.
+    :param numbers:     An optional list of the record numbers within the segment of the entries to decode.
+    :return:            A list of dicts of data which can be used to create DiaryEntry objects.
+    """
+    (record_data, description_data, recurrence_data), _ = unpack_sections(segment, count=3)
+    if numbers is None:
+        numbered = enumerate(RECORD.iter_unpack(record_data))
+    else:
+        numbered = ((number, RECORD.unpack_from(record_data, number * RECORD.size)) for number in numbers)
+
+    descriptions = unpack_strings(zlib.decompress(description_data))
+    recurrences = pickle.loads(zlib.decompress(recurrence_data))
+    from_ordinal = datetime.date.fromordinal
+    return [{KEY: key.hex(),
+             UID: uid,
+             DUE_DATE: from_ordinal(due) if due != NO_DATE_ORDINAL else None,
+             ITEM_TYPE: strings[item_type],
+             SUBJECT: strings[subject],
+             PRIORITY: priority,
+             DESCRIPTION: descriptions[number],
+             RECURRENCE: recurrences.get(number)}
+            for number, (key, uid, due, item_type, subject, priority) in numbered]
+
+
+def dump(entries, file, segment_size=SEGMENT_SIZE):
+    """
+    Write entries in the compact format.
+
+    :param entries:         An iterable of DiaryEntry objects.
+    :param file:            A file object opened for writing in binary mode.
+    :param segment_size:    The number of entries in each segment.
+    :return:                None.
+    """
+    entries = list(entries)
+    strings = {}  # String dictionary in order of first use
+    starts = range(0, len(entries), segment_size)
+    segments = [encode_segment(entries[start:start + segment_size], strings) for start in starts]
+
+    string_data = pack_strings(list(strings))
+    offset = HEADER.size + 2 * SECTION.size + len(string_data) + SEGMENT.size * len(segments)
+    index = []
+    for start, (segment, first, last) in zip(starts, segments):
+        index.append(SEGMENT.pack(offset, len(segment), min(segment_size, len(entries) - start), first, last))
+        offset += len(segment)
+
+    file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(entries)))
+    file.write(pack_sections((string_data, b''.join(index))))
+    for segment, _, _ in segments:
+        file.write(segment)
+
+
+def read_index(data):
+    """
+    Read the string dictionary and segment index of a file in the compact format.
+
+    :param data:        A memoryview of the whole file.
+    :return:            A tuple of the list of strs in the string dictionary, and a list of the (offset, length,
+                        number of entries, first due date, last due date) tuples of the segments.
+    """
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise StorageException('Not a compact diary file')
+    if version > FORMAT_VERSION:
+        raise StorageException('Diary file format version {} is newer than this version of CMDiary'.format(version))
+
+    if version == 1:  # One segment of unknown due dates follows the string dictionary
+        (strings_data,), offset = unpack_sections(data, HEADER.size, count=1)
+        segments = [(offset, len(data) - offset, count, datetime.date.min.toordinal(), datetime.date.max.toordinal())]
+    else:
+        (strings_data, index_data), _ = unpack_sections(data, HEADER.size, count=2)
+        segments = list(SEGMENT.iter_unpack(index_data))
+    if sum(segment[2] for segment in segments) != count:
+        raise StorageException('Diary file is damaged')
+    return unpack_strings(strings_data), segments
+
+
+def load(file, numbers=None, workers=None):
+    """
+    Read entries written in the compact format. Segments which hold none of the requested entries are not decoded.
+
+    :param file:        A file object opened for reading in binary mode.
+    :param numbers:     An optional iterable of the record numbers of the entries to read. Defaults to all entries.
+    :param workers:     The number of processes to decode many entries with. Defaults to one per CPU.
+    :return:            A list of dicts of data which can be used to create DiaryEntry objects, in the order they were
+                        written.
+    """
+    data = memoryview(file.read())
+    strings, segments = read_index(data)
+
+    if numbers is not None:
+        segment_size = (segments[0][2] if segments else 0) or 1  # Every segment but the last is full
+        selected = {}
+        for number in numbers:
+            selected.setdefault(number // segment_size, []).append(number % segment_size)
+        tasks = [(segments[segment], local) for segment, local in sorted(selected.items())]
+    else:
+        tasks = [(segment, None) for segment in segments]
+
+    workers = workers if workers is not None else default_workers()
+    parallel = workers > 1 and len(tasks) > 1 and sum(segment[2] for segment, _ in tasks) >= PARALLEL_THRESHOLD
+    executor = get_executor(workers) if parallel else None
+    segments = [data[offset:offset + length] for (offset, length, _, _, _), _ in tasks]
+    if executor is not None:
+        segments = [bytes(segment) for segment in segments]  # Memoryviews cannot be sent to worker processes
+    arguments = [(segment, strings, local) for segment, (_, local) in zip(segments, tasks)]
+    if executor is not None:
+        results = executor.map(decode_segment, *zip(*arguments))
+    else:
+        results = (decode_segment(*argument) for argument in arguments)
+    return [dataset for result in results for dataset in result]
+
+
+def legacy_key(data, seen):
+    """
+    Derive the key of an entry written by a version which did not store keys. Keys are derived from the data of the
+    entry rather than generated, so that every copy of a file gives its entries the same keys and they can be synced.
+
+    :param data:        A dict of the data of the entry.
+    :param seen:        A dict counting the entries with each data so far, so that identical entries get distinct keys.
+    :return:            A str key of 32 hex digits.
+    """
+    content = repr((data.get(ITEM_TYPE), data.get(SUBJECT), data.get(DESCRIPTION), data.get(DUE_DATE)))
+    seen[content] = seen.get(content, 0) + 1
+    return hashlib.blake2b('{}#{}'.format(content, seen[content]).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def read_file(path, numbers=None):
+    """
+    Read the entries of a diary file, which is either in the compact format or a stream of pickled dicts of data as
+    written by earlier versions.
+
+    :param path:        The path of the file.
+    :param numbers:     An optional iterable of the record numbers of the entries to read from a compact file.
+                        Files in the earlier format are always read in full, and their entries are given keys derived
+                        from their data if they have none.
+    :return:            A list of dicts of data which can be used to create DiaryEntry objects.
+    """
+    with open(path, 'rb') as source:
+        if is_compact(path):
+            return load(source, numbers)
+        entry_data = []
+        seen = {}
+        try:
+            while True:
+                data = pickle.load(source)
+                if data.get(KEY) is None:
+                    data[KEY] = legacy_key(data, seen)
+                entry_data.append(data)
+        except EOFError:  # Stop looping through data at end of file
+            pass
+        return entry_data
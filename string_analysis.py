@@ -69,8 +69,37 @@ def median(values):
     return median
 
 
+def levenshtein(test_str, standard, limit=None):
+    """
+    Returns the edit distance between two strings: the least number of characters which must be inserted, deleted or
+    substituted to turn one into the other.
+
+    :param test_str:            A string to compare
+    :param standard:            A string to compare against
+    :param limit:               An optional distance beyond which the exact distance is not needed. Once every
+                                alignment exceeds it, limit + 1 is returned early.
+    :return: An int distance
+    """
+    if len(test_str) < len(standard):
+        test_str, standard = standard, test_str  # Keep the rows as short as possible
+    if limit is not None and len(test_str) - len(standard) > limit:
+        return limit + 1
+    previous = list(range(len(standard) + 1))
+    for i, test_char in enumerate(test_str, 1):
+        current = [i]
+        for j, std_char in enumerate(standard, 1):
+            current.append(min(previous[j] + 1,  # Deletion
+                               current[j - 1] + 1,  # Insertion
+                               previous[j - 1] + (test_char != std_char)))  # Substitution
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
 def get_best_match(test_str):
-    commands = ('add', 'remove', 'edit', 'priority', 'extend', 'list', 'filter', 'quit', 'help')
+    commands = ('add', 'remove', 'edit', 'priority', 'extend', 'repeat', 'undo', 'redo', 'archive', 'analytics',
+                'week', 'month', 'sync', 'profile', 'list', 'filter', 'quit', 'help')
 
     match_char_results = OrderedDict(sorted({standard: match_chars(test_str, standard) for standard in commands}.items(),
                                      key=lambda t: t[1]))
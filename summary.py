@@ -0,0 +1,135 @@
+"""
+A small summary of the diary which is written alongside the data file so that it can be read without loading the
+diary, e.g. for a shell prompt or status bar:
+
+    python cmdiary.py --summary [--file data.pickle] [--format '{today} due today / {overdue} overdue']
+
+This module must stay free of third-party and diary imports so that reading the summary is fast.
+"""
+import sys
+import json
+import datetime
+from collections import defaultdict
+
+SUMMARY_EXTENSION = '.summary'
+DEFAULT_FORMAT = '{today} due today / {overdue} overdue'
+BUCKETS = ('overdue', 'today', 'tomorrow', 'week', 'later', 'undated')
+
+
+def bucket(days_left):
+    """Name the bucket which a number of days left falls into."""
+    if days_left is None:
+        return 'undated'
+    if days_left < 0:
+        return 'overdue'
+    if days_left == 0:
+        return 'today'
+    if days_left == 1:
+        return 'tomorrow'
+    return 'week' if days_left <= 7 else 'later'
+
+
+def count_buckets(due_counts, undated, today):
+    """
+    Count entries per bucket of days left.
+
+    :param due_counts:  A dict mapping ISO format due dates to the number of entries due then.
+    :param undated:     The number of entries without a due date.
+    :param today:       The datetime.date to count days left from.
+    :return:            A dict mapping bucket names to counts.
+    """
+    counts = dict.fromkeys(BUCKETS, 0)
+    counts['undated'] = undated
+    for due, count in due_counts.items():
+        counts[bucket((datetime.date.fromisoformat(due) - today).days)] += count
+    return counts
+
+
+def write_summary(path, entries):
+    """
+    Write the summary of a list of entries.
+
+    :param path:        The path of the summary file.
+    :param entries:     An iterable of DiaryEntry objects, including occurrences of recurring entries.
+    :return:            None.
+    """
+    today = datetime.date.today()
+    due_counts = {}
+    types = {}
+    undated = priority = 0
+    for entry in entries:
+        if entry.due_date is None:
+            undated += 1
+        else:
+            due = entry.due_date.isoformat()
+            due_counts[due] = due_counts.get(due, 0) + 1
+        types[entry.item_type] = types.get(entry.item_type, 0) + 1
+        priority += entry.priority
+
+    upcoming = [due for due in due_counts if due >= today.isoformat()]
+    summary = {'written': today.isoformat(),
+               'buckets': count_buckets(due_counts, undated, today),
+               'due': due_counts,
+               'types': types,
+               'priority': priority,
+               'next_due': min(upcoming) if upcoming else None}
+    with open(path, 'w') as file:
+        json.dump(summary, file, separators=(',', ':'))
+
+
+def read_summary(path):
+    """
+    Read a summary, recounting the buckets if it was written on an earlier day.
+
+    :param path:        The path of the summary file.
+    :return:            A dict of values which can be used in a summary format string.
+    """
+    with open(path) as file:
+        summary = json.load(file)
+    today = datetime.date.today()
+    if summary['written'] == today.isoformat():
+        values = dict(summary['buckets'])
+    else:
+        values = count_buckets(summary['due'], summary['buckets']['undated'], today)
+        upcoming = [due for due in summary['due'] if due >= today.isoformat()]
+        summary['next_due'] = min(upcoming) if upcoming else None
+
+    values.update(summary['types'])
+    values['total'] = sum(summary['types'].values())
+    values['priority'] = summary['priority']
+    values['next_due'] = summary['next_due'] or 'none'
+    return values
+
+
+def main(args):
+    """
+    Print the summary of a diary.
+
+    :param args:        A list of command line arguments.
+    :return:            An int exit status.
+    """
+    data_file = 'data.pickle'
+    summary_format = DEFAULT_FORMAT
+    args = [arg for arg in args if arg != '--summary']
+    while args:
+        option = args.pop(0)
+        if option in ('--file', '--format') and args:
+            if option == '--file':
+                data_file = args.pop(0)
+            else:
+                summary_format = args.pop(0)
+        else:
+            sys.stderr.write('Usage: cmdiary.py --summary [--file DATA_FILE] [--format FORMAT]\n')
+            return 2
+
+    try:
+        values = read_summary(data_file + SUMMARY_EXTENSION)
+    except (OSError, ValueError, KeyError):
+        sys.stderr.write('No summary found for {}\n'.format(data_file))
+        return 1
+    try:
+        print(summary_format.format_map(defaultdict(int, values)))  # Types without entries count as 0
+    except (KeyError, IndexError, ValueError) as e:
+        sys.stderr.write('Invalid format: {}\n'.format(e))
+        return 2
+    return 0
@@ -0,0 +1,134 @@
+"""
+Two-way sync between diary files, e.g. copies of the same diary kept on several machines.
+
+Only the buckets of entries whose digests differ between the two files are compared, and only the entries which
+differ are read from the other file. Each side of a difference is compared with the base, the state of the entries
+when the two files were last synced, to find which side changed it:
+
+    changed on one side         the changed version is kept, including removals
+    changed on both sides       a conflict, resolved by keeping the side which did not remove the entry, or the
+                                version with the greater content hash if both edited it
+
+The rule gives the same result whichever file the sync is run from. Afterwards both files hold the merged entries and
+the base is updated for both of them.
+"""
+import os
+import shutil
+import hashlib
+from collections import namedtuple
+
+from DiaryEntry import DiaryEntry, KEY
+from HashSummary import HashSummary, SummaryFile, HASH_EXTENSION, BUCKET_COUNT
+from summary import SUMMARY_EXTENSION
+import storage
+
+BASE_EXTENSION = '.base-'  # Followed by an id of the other file
+
+SyncResult = namedtuple('SyncResult', ['pulled', 'pushed', 'conflicts'])
+SyncResult.__doc__ = """
+The number of entries which were changed by a sync.
+
+:param pulled:      The number of entries added, changed or removed in the diary from the other file.
+:param pushed:      The number of entries added, changed or removed in the other file from the diary.
+:param conflicts:   The number of entries changed in both, which are also counted as pulled or pushed.
+"""
+
+
+class SyncException(Exception):
+    """
+    An exception class which indicates that a diary file cannot be synced.
+    Is only defined for the custom name.
+    """
+    pass
+
+
+def base_path(data_file, other_file):
+    """Returns the path of the file storing the base of two data files, which is kept alongside the first one."""
+    other_id = hashlib.blake2b(os.path.realpath(other_file).encode('utf-8'), digest_size=4).hexdigest()
+    return data_file + BASE_EXTENSION + other_id
+
+
+def open_summary(data_file):
+    """
+    Open the summary file of a data file, writing it first if it is missing or older than the data file.
+
+    :param data_file:   The path of the data file.
+    :return:            A SummaryFile.
+    """
+    path = data_file + HASH_EXTENSION
+    if os.path.isfile(path):
+        summary = SummaryFile(path)
+        if summary.is_current(data_file):
+            return summary
+    entries = [DiaryEntry(**data) for data in storage.read_file(data_file)]
+    HashSummary(entries).write(path, data_file, {entry.key: number for number, entry in enumerate(entries)})
+    return SummaryFile(path)
+
+
+def winner(local_hash, other_hash, base_hash):
+    """
+    Decide which version of an entry to keep.
+
+    :param local_hash:  The content hash of the entry in the diary, or None if it is not there.
+    :param other_hash:  The content hash of the entry in the other file, or None if it is not there.
+    :param base_hash:   The content hash of the entry when the files were last synced, or None if it was not there.
+    :return:            A tuple of True if the other version is kept and True if the versions conflict.
+    """
+    if local_hash == base_hash:
+        return True, False
+    if other_hash == base_hash:
+        return False, False
+    if local_hash is None or other_hash is None:
+        return local_hash is None, True
+    return other_hash > local_hash, True
+
+
+def sync(diary, other_file):
+    """
+    Merge the entries of a diary and another diary file, and write the merged entries to both.
+
+    :param diary:       The Diary being synced.
+    :param other_file:  The path of the other data file.
+    :return:            A SyncResult.
+    """
+    if not os.path.isfile(other_file):
+        raise SyncException("Diary file '{}' does not exist".format(other_file))
+    if os.path.realpath(other_file) == os.path.realpath(diary.data_file):
+        raise SyncException('A diary cannot be synced with itself')
+
+    other = open_summary(other_file)
+    base_file = base_path(diary.data_file, other_file)
+    base = SummaryFile(base_file) if os.path.isfile(base_file) else None
+
+    pulled = {}  # Content hashes by key of the entries to take from the other file, None for removals
+    pushed = conflicts = 0
+    for number in range(BUCKET_COUNT):
+        if diary.fingerprints.digest(number) == other.digest(number):
+            continue
+        local_hashes = diary.fingerprints.bucket(number)
+        other_hashes = other.bucket(number)
+        base_hashes = base.bucket(number) if base is not None else {}
+        for key in local_hashes.keys() | other_hashes.keys():
+            local_hash, other_hash = local_hashes.get(key), other_hashes.get(key)
+            if local_hash == other_hash:
+                continue
+            take_other, conflict = winner(local_hash, other_hash, base_hashes.get(key))
+            conflicts += conflict
+            if take_other:
+                pulled[key] = other_hash
+            else:
+                pushed += 1
+
+    numbers = sorted(other.numbers[key] for key, other_hash in pulled.items() if other_hash is not None)
+    changed = [data for data in storage.read_file(other_file, numbers) if data[KEY] in pulled]
+    removed = [key for key, other_hash in pulled.items() if other_hash is None]
+    if changed or removed:
+        diary.merge(changed, removed)
+    diary.save_data()  # Saved now, as the save after merging is deferred while a batch of commands runs
+
+    # Copying keeps modification times, so the copied summary stays current for the copied data file
+    for extension in ('', HASH_EXTENSION, SUMMARY_EXTENSION):
+        shutil.copy2(diary.data_file + extension, other_file + extension)
+    shutil.copyfile(diary.data_file + HASH_EXTENSION, base_file)
+    shutil.copyfile(diary.data_file + HASH_EXTENSION, base_path(other_file, diary.data_file))
+    return SyncResult(len(pulled), pushed, conflicts)
@@ -0,0 +1,89 @@
+"""
+A renderer for the diary table which produces the same output as tabulate's 'simple' format for the kinds of values in
+the diary, without parsing escape codes or formatting cells one at a time.
+"""
+import re
+
+MIN_PADDING = 2  # Extra width given to each header, as in tabulate
+COLUMN_SEPARATOR = '  '
+HEADER_RULE = '-'
+
+RE_INT = re.compile(r'[-+]?[0-9]+')
+
+
+def cell_kind(cell):
+    """
+    Classify a cell the way tabulate decides the type of a column.
+
+    :param cell:    A plain str.
+    :return:        'empty', 'int', 'text', or None if tabulate could treat the cell as another kind of number.
+    """
+    if not cell:
+        return 'empty'
+    if RE_INT.fullmatch(cell):
+        return 'int'
+    if cell in ('True', 'False'):
+        return 'text'  # Columns of booleans are left aligned like text
+    if any(char.isdigit() for char in cell) and (',' in cell or '_' in cell):
+        return None  # Possibly a number with separators
+    try:
+        float(cell)
+    except ValueError:
+        return 'text'
+    return None
+
+
+def is_right_aligned(column):
+    """
+    Determine the alignment of a column, which tabulate right aligns only if every non-empty cell is a number.
+
+    :param column:  A tuple of plain strs.
+    :return:        True if the column is right aligned, False if it is left aligned, or None if the column contains
+                    numbers which tabulate would reformat.
+    """
+    numeric = False
+    for cell in column:
+        kind = cell_kind(cell)
+        if kind == 'text':
+            return False
+        if kind is None:
+            return None
+        numeric = numeric or kind == 'int'
+    return numeric
+
+
+def render_table(headers, rows, styles):
+    """
+    Render a table with every cell of a row wrapped in the same escape codes. The padding between cells is left
+    unstyled.
+
+    :param headers:     A tuple of header strs.
+    :param rows:        A non-empty list of lists of plain strs.
+    :param styles:      A list of (prefix, suffix) tuples of escape code strs, one for each row.
+    :return:            The table str, or None if a cell needs rules which are not reproduced here, i.e. non-ASCII
+                        text whose display width may differ from its length, surrounding whitespace or non-integer
+                        numbers.
+    """
+    columns = list(zip(*rows))
+    right_aligned = []
+    widths = []
+    for header, column in zip(headers, columns):
+        if not all(cell.isascii() and cell == cell.strip() for cell in column):
+            return None  # tabulate strips surrounding whitespace differently depending on the escape codes
+        right = is_right_aligned(column)
+        if right is None:
+            return None
+        right_aligned.append(right)
+        widths.append(max(len(header) + MIN_PADDING, max(map(len, column))))
+
+    lines = [COLUMN_SEPARATOR.join(header.rjust(width) if right else header.ljust(width)
+                                   for header, width, right in zip(headers, widths, right_aligned)).rstrip(),
+             COLUMN_SEPARATOR.join(HEADER_RULE * width for width in widths)]
+    layout = list(zip(widths, right_aligned))
+    for row, (prefix, suffix) in zip(rows, styles):
+        cells = []
+        for cell, (width, right) in zip(row, layout):
+            padding = ' ' * (width - len(cell))
+            cells.append(padding + prefix + cell + suffix if right else prefix + cell + suffix + padding)
+        lines.append(COLUMN_SEPARATOR.join(cells).rstrip())
+    return '\n'.join(lines)
@@ -0,0 +1,37 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Filter import required_literal, compile_pattern, matches_pattern
+
+
+class RequiredLiteralTest(unittest.TestCase):
+    """The literal pre-check must never reject text which the regular expression matches."""
+
+    def assertMatches(self, pattern, text):
+        self.assertTrue(matches_pattern(text, compile_pattern(pattern)))
+
+    def test_hex_escape(self):
+        self.assertMatches(r'ab\x41cd', 'abAcd')
+
+    def test_unicode_escape(self):
+        self.assertMatches(r'caf\u00e9 menu', 'café menu')
+
+    def test_octal_escape(self):
+        self.assertMatches(r'x\012yz', 'x\nyz')
+
+    def test_back_reference(self):
+        self.assertMatches(r'(ab)cd\1', 'abcdab')
+
+    def test_character_class_escapes(self):
+        self.assertEqual(required_literal(r'lab\s+\d+'), ('lab', False))
+        self.assertMatches(r'lab\s+\d+', 'lab 12')
+
+    def test_escaped_punctuation(self):
+        self.assertEqual(required_literal(r'^rev\.'), ('rev.', True))
+
+
+if __name__ == '__main__':
+    unittest.main()
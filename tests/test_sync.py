@@ -0,0 +1,58 @@
+import os
+import sys
+import shutil
+import datetime
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Diary import Diary
+
+
+class SyncTest(unittest.TestCase):
+    """Syncs run from the command loop, where every command runs within a batch of changes."""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        import cmdiary  # Loads a diary from the current directory
+        self.cmdiary = cmdiary
+        self.previous = cmdiary.diary
+        cmdiary.diary = Diary('a.pickle', 'a_history.pickle')
+        self.other = os.path.join(self.directory, 'b.pickle')
+        Diary(self.other).save_data()
+
+    def tearDown(self):
+        self.cmdiary.diary = self.previous
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def run_line(self, line):
+        self.cmdiary.run(self.cmdiary.parser.parse(line))
+
+    def test_sync_keeps_changes_of_both_diaries(self):
+        self.run_line('sync ' + self.other)
+        other = Diary(self.other)
+        other.add('homework', 'maths', 'from b', datetime.date(2030, 1, 1))
+        self.run_line('add h maths from a 1 1 2030')
+        self.run_line('sync ' + self.other)
+        expected = ['from a', 'from b']
+        self.assertEqual(sorted(entry.description for entry in self.cmdiary.diary.entries), expected)
+        self.assertEqual(sorted(entry.description for entry in Diary(self.other).entries), expected)
+
+    def test_saved_filter_after_sync_removes_entry(self):
+        self.run_line('add h maths first 1 1 2030')
+        self.run_line('add h maths second 2 1 2030')
+        self.run_line('sync ' + self.other)
+        other = Diary(self.other)
+        other.save_filter('maths', 's=maths')
+        self.run_line('remove 1')
+        self.run_line('sync ' + self.other)
+        other = Diary(self.other)
+        self.assertEqual(len(other.open_filter('maths')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()